@@ -0,0 +1,129 @@
+"""Agent runs per second with a scripted, tool-calling stub LLM.
+
+Compares building a fresh ReAct graph for every run (the old behaviour)
+against the process-wide compiled graph. The LLM answers instantly and the
+pipeline is warmed first, so the numbers isolate per-run agent overhead.
+
+    python -m benchmarks.agent_throughput --runs 50 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from benchmarks.fixtures import DEFAULT_LAT, DEFAULT_LON, offline_services
+
+
+class ScriptedToolModel(BaseChatModel):
+    """Calls select_zone, then run_solar_analysis, then answers."""
+
+    area_hectares: float = 2.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-tool-model"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        tool_results = [m for m in messages if isinstance(m, ToolMessage)]
+        if not tool_results:
+            message = AIMessage(
+                content="",
+                tool_calls=[
+                    {
+                        "name": "select_zone",
+                        "args": {
+                            "latitude": DEFAULT_LAT,
+                            "longitude": DEFAULT_LON,
+                            "area_hectares": self.area_hectares,
+                        },
+                        "id": "call_zone",
+                    }
+                ],
+            )
+        elif len(tool_results) == 1:
+            zone = json.loads(tool_results[0].content)
+            message = AIMessage(
+                content="",
+                tool_calls=[
+                    {
+                        "name": "run_solar_analysis",
+                        "args": {
+                            "latitude": DEFAULT_LAT,
+                            "longitude": DEFAULT_LON,
+                            "polygon_coordinates": zone["polygon_geojson"]["coordinates"][0],
+                            "row_spacing_m": zone.get("row_spacing_m", 3.0),
+                        },
+                        "id": "call_analysis",
+                    }
+                ],
+            )
+        else:
+            message = AIMessage(content="Strong irradiance and a competitive LCOE.")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+async def _one_run(shared_graph, llm) -> None:
+    from services.agent_service import SolarAgent, build_agent_graph
+
+    graph = shared_graph if shared_graph is not None else build_agent_graph(llm)
+    agent = SolarAgent(graph=graph)
+    async for event in agent.run_stream(DEFAULT_LAT, DEFAULT_LON, llm.area_hectares):
+        if event["type"] == "error":
+            raise RuntimeError(event["message"])
+    if agent.analysis_data is None:
+        raise RuntimeError("agent run produced no analysis")
+
+
+async def _measure(shared: bool, runs: int, concurrency: int) -> dict:
+    from services.agent_service import build_agent_graph
+
+    llm = ScriptedToolModel()
+    shared_graph = build_agent_graph(llm) if shared else None
+    sem = asyncio.Semaphore(concurrency)
+
+    async def bounded():
+        async with sem:
+            await _one_run(shared_graph, llm)
+
+    await _one_run(shared_graph, llm)  # warm the pipeline memo and imports
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(bounded() for _ in range(runs)))
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "runs_per_s": runs / elapsed,
+        "ms_per_run": elapsed / runs * 1000,
+        "peak_mb": peak / 1e6,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    with offline_services():
+        for label, shared in (("graph per run", False), ("shared graph", True)):
+            r = asyncio.run(_measure(shared, args.runs, args.concurrency))
+            print(
+                f"{label:<16} {r['runs_per_s']:>8.1f} runs/s "
+                f"{r['ms_per_run']:>8.1f} ms/run  peak {r['peak_mb']:>7.1f} MB"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,78 @@
+"""Import-time budget check for the API entry point.
+
+Runs ``python -X importtime -c "import main"`` in a fresh interpreter,
+reports the slowest modules and fails when the total exceeds the budget or
+when a heavy dependency is imported eagerly.
+
+    python -m benchmarks.import_budget --budget-ms 600 --top 15
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Deferred until first use; importing any of these at startup is a regression.
+LAZY_MODULES = (
+    "pvlib",
+    "pandas",
+    "scipy",
+    "shapely",
+    "langchain_openai",
+    "langgraph",
+    "fal_client",
+    "websockets",
+    "openai",
+    "timezonefinder",
+)
+
+
+def measure(entry: str = "main") -> list[tuple[str, int, int]]:
+    """Return (module, self_us, cumulative_us) for every module imported."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {entry}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entry", default="main")
+    parser.add_argument("--budget-ms", type=float, default=600.0)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    rows = measure(args.entry)
+    total_ms = next(cum for name, _, cum in rows if name == args.entry) / 1000
+    top_level = {name.split(".")[0] for name, _, _ in rows}
+
+    print(f"{'module':<48} {'self ms':>9} {'cumul ms':>9}")
+    for name, self_us, cum_us in sorted(rows, key=lambda r: r[1], reverse=True)[: args.top]:
+        print(f"{name:<48} {self_us / 1000:>9.1f} {cum_us / 1000:>9.1f}")
+    print(f"\nimport {args.entry}: {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+
+    status = 0
+    eager = [m for m in LAZY_MODULES if m in top_level]
+    if eager:
+        print(f"Eagerly imported heavy modules: {', '.join(eager)}")
+        status = 1
+    if total_ms > args.budget_ms:
+        print("Import-time budget exceeded")
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
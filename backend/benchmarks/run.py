@@ -0,0 +1,242 @@
+"""Benchmark the analysis services across site sizes and zone shapes.
+
+Run from ``backend/``:
+
+    python -m benchmarks.run                     # all sizes and shapes
+    python -m benchmarks.run --sizes 1 10 --save # store a baseline
+    python -m benchmarks.run --compare           # report against the baseline
+
+Every case is timed over ``--repeat`` runs (min and median are kept) and
+then executed once more under tracemalloc to record peak memory.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.fixtures import (
+    DEFAULT_LAT,
+    DEFAULT_LON,
+    SITE_SIZES_HA,
+    ZONE_SHAPES,
+    offline_services,
+    pvgis_frame,
+    site_polygon,
+)
+from services.heatmap_gen import generate_seasonal_heatmaps
+from services.panel_layout import generate_panel_layout
+from services.shadow_calc import calculate_shadow_matrix, compute_seasonal_shadow_losses
+from services.solar_engine import get_solar_positions
+from services.yield_calc import calculate_yield
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_BASELINE = RESULTS_DIR / "baseline.json"
+
+TILT = 25.0
+AZIMUTH = 180.0
+ROW_SPACING = 3.0
+MODULE_W = 1.134
+MODULE_H = 2.278
+
+
+def _measure(fn, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "peak_mb": peak / 1e6,
+    }
+
+
+def _site_cases(shape: str, hectares: float) -> dict:
+    """Build the inputs for one site and return {bench_name: callable}."""
+    lat, lon = DEFAULT_LAT, DEFAULT_LON
+    polygon = site_polygon(lat, lon, hectares, shape)
+    pvgis_data, _ = pvgis_frame(lat, lon)
+    tilted_data, _ = pvgis_frame(lat, lon, TILT, AZIMUTH)
+    solpos = get_solar_positions(lat, lon)
+
+    def layout():
+        return generate_panel_layout(
+            zone_polygon=polygon,
+            module_width_m=MODULE_W,
+            module_height_m=MODULE_H,
+            row_spacing_m=ROW_SPACING,
+            panel_azimuth_deg=AZIMUTH,
+            latitude=lat,
+            longitude=lon,
+        )
+
+    layout_result = layout()
+    n_rows = max(layout_result["properties"]["n_rows"], 1)
+    n_panels = layout_result["properties"]["n_panels"]
+
+    def shadow():
+        return calculate_shadow_matrix(
+            solpos=solpos,
+            panel_height_m=MODULE_H,
+            panel_tilt_deg=TILT,
+            row_spacing_m=ROW_SPACING,
+            n_rows=n_rows,
+            panel_azimuth_deg=AZIMUTH,
+        )
+
+    shadow_matrix = shadow()
+
+    def heatmaps():
+        return generate_seasonal_heatmaps(
+            pvgis_data=pvgis_data,
+            shadow_matrix=shadow_matrix,
+            zone_polygon=polygon,
+            resolution_m=2.0,
+            latitude=lat,
+        )
+
+    def yield_calc():
+        return calculate_yield(
+            pvgis_data=tilted_data,
+            shadow_matrix=shadow_matrix,
+            n_panels=n_panels,
+            module_power_wc=550,
+        )
+
+    def seasonal():
+        return compute_seasonal_shadow_losses(shadow_matrix, lat)
+
+    return {
+        "generate_panel_layout": layout,
+        "calculate_shadow_matrix": shadow,
+        "generate_seasonal_heatmaps": heatmaps,
+        "calculate_yield": yield_calc,
+        "compute_seasonal_shadow_losses": seasonal,
+        "api_analyze": _analyze_case(polygon, lat, lon),
+    }
+
+
+def _analyze_case(polygon, lat: float, lon: float):
+    from fastapi.testclient import TestClient
+    from main import app
+    from services.pipeline import clear_cache
+
+    client = TestClient(app)
+    body = {
+        "latitude": lat,
+        "longitude": lon,
+        "polygon_geojson": {
+            "type": "Polygon",
+            "coordinates": [list(polygon.exterior.coords)],
+        },
+        "panel_tilt_deg": TILT,
+        "panel_azimuth_deg": AZIMUTH,
+        "row_spacing_m": ROW_SPACING,
+    }
+
+    def api_analyze():
+        # Time the cold pipeline, not the memoized report from the last repeat.
+        clear_cache()
+        with offline_services():
+            resp = client.post("/api/analyze", json=body)
+        resp.raise_for_status()
+        return resp
+
+    return api_analyze
+
+
+def run(sizes, shapes, only, repeat: int) -> dict:
+    results = {}
+    for shape in shapes:
+        for hectares in sizes:
+            cases = _site_cases(shape, hectares)
+            for name, fn in cases.items():
+                if only and name not in only:
+                    continue
+                key = f"{name}[{shape}-{hectares:g}ha]"
+                results[key] = _measure(fn, repeat)
+                r = results[key]
+                print(
+                    f"{key:<56} {r['median_s'] * 1000:>10.1f} ms "
+                    f"(min {r['min_s'] * 1000:.1f})  peak {r['peak_mb']:>8.1f} MB",
+                    flush=True,
+                )
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Print a comparison table and return the keys that regressed."""
+    regressions = []
+    print(f"\n{'benchmark':<56} {'time':>8} {'memory':>8}")
+    for key, r in results.items():
+        base = baseline.get(key)
+        if base is None:
+            print(f"{key:<56} {'new':>8} {'new':>8}")
+            continue
+        t_ratio = r["median_s"] / base["median_s"] if base["median_s"] else 1.0
+        m_ratio = r["peak_mb"] / base["peak_mb"] if base["peak_mb"] else 1.0
+        flag = ""
+        if t_ratio > 1 + threshold or m_ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        elif t_ratio < 1 - threshold:
+            flag = "  faster"
+        print(f"{key:<56} {t_ratio:>7.2f}x {m_ratio:>7.2f}x{flag}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=float, nargs="+", default=list(SITE_SIZES_HA))
+    parser.add_argument("--shapes", nargs="+", choices=ZONE_SHAPES, default=list(ZONE_SHAPES))
+    parser.add_argument("--only", nargs="+", help="Benchmark names to run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="Store results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="Compare against the baseline")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.shapes, args.only, args.repeat)
+
+    status = 0
+    if args.compare:
+        if not args.baseline.is_file():
+            print(f"No baseline at {args.baseline}", file=sys.stderr)
+            return 1
+        baseline = json.loads(args.baseline.read_text())["results"]
+        if compare(results, baseline, args.threshold):
+            status = 1
+
+    if args.save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(
+            json.dumps(
+                {
+                    "machine": platform.node(),
+                    "python": platform.python_version(),
+                    "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "results": results,
+                },
+                indent=2,
+            )
+        )
+        print(f"Baseline written to {args.baseline}")
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Hourly vs sub-hourly yield simulation: runtime, peak memory and accuracy.
+
+Runs services.subhourly on the offline PVGIS fixture at each time step.
+The 60-minute step is the same model on the original hourly samples, and
+the finest step is the reference the others are compared against. Tight
+row spacing and a high DC/AC ratio bring out the effects that hourly
+averages blur (shading near sunrise and sunset, clipping at noon peaks).
+
+    python -m benchmarks.subhourly
+    python -m benchmarks.subhourly --row-spacing 4 --dc-ac 1.2 --repeat 5
+"""
+
+import argparse
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.fixtures import DEFAULT_LAT, DEFAULT_LON, pvgis_frame
+from services.subhourly import SUBHOURLY_STEPS, simulate_yield
+
+MODULE_H = 2.278
+
+
+def _measure(fn, repeat: int) -> tuple[dict, object]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"median_s": statistics.median(times), "peak_mb": peak / 1e6}, result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lat", type=float, default=DEFAULT_LAT)
+    parser.add_argument("--lon", type=float, default=DEFAULT_LON)
+    parser.add_argument("--tilt", type=float, default=25.0)
+    parser.add_argument("--row-spacing", type=float, default=2.5)
+    parser.add_argument("--n-rows", type=int, default=20)
+    parser.add_argument("--dc-ac", type=float, default=1.3)
+    parser.add_argument("--steps", type=int, nargs="+", default=list(SUBHOURLY_STEPS))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    tilted, _ = pvgis_frame(args.lat, args.lon, args.tilt, 180)
+
+    def case(step):
+        return lambda: simulate_yield(
+            tilted_data=tilted,
+            latitude=args.lat,
+            longitude=args.lon,
+            n_panels=1000,
+            n_rows=args.n_rows,
+            module_power_wc=550,
+            module_height_m=MODULE_H,
+            panel_tilt_deg=args.tilt,
+            row_spacing_m=args.row_spacing,
+            time_step_min=step,
+            dc_ac_ratio=args.dc_ac,
+        )
+
+    runs = {}
+    for step in args.steps:
+        case(step)()  # warm imports and caches
+        runs[step] = _measure(case(step), args.repeat)
+
+    reference = runs[min(args.steps)][1]
+    print(
+        f"{'step':>6} {'time':>9} {'peak':>9} {'kWh/kWp':>9} {'Δ yield':>9} "
+        f"{'shading':>9} {'Δ':>7} {'clipping':>9} {'Δ':>7}"
+    )
+    for step, (timing, r) in runs.items():
+        yield_delta = (r["specific_yield_kwh_kwp"] / reference["specific_yield_kwh_kwp"] - 1) * 100
+        print(
+            f"{step:>4}min {timing['median_s'] * 1000:>7.0f}ms {timing['peak_mb']:>7.1f}MB "
+            f"{r['specific_yield_kwh_kwp']:>9.1f} {yield_delta:>+8.2f}% "
+            f"{r['shadow_loss_pct']:>8.2f}% {r['shadow_loss_pct'] - reference['shadow_loss_pct']:>+6.2f} "
+            f"{r['clipping_loss_pct']:>8.2f}% {r['clipping_loss_pct'] - reference['clipping_loss_pct']:>+6.2f}"
+        )
+    print(f"(Δ against the {min(args.steps)}-minute run; shading and clipping deltas in points)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,174 @@
+"""Concurrent load generator for /api/analyze, /api/agent/run and /api/chat.
+
+    python -m loadtest.loadgen --url http://127.0.0.1:8100 \
+        --concurrency 16 --duration 60 --mix analyze=1 agent=1 chat=2
+
+Each worker picks a scenario by weight, runs it to completion (SSE streams
+are read until their final event) and records latency. The report gives
+p50/p95/p99 latency, time to first byte and requests/second per scenario.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+import httpx
+import numpy as np
+
+from benchmarks.fixtures import DEFAULT_LAT, DEFAULT_LON, site_polygon
+
+_SITES = [(DEFAULT_LAT, DEFAULT_LON), (31.63, -8.0), (37.39, -5.98)]
+
+
+@dataclass
+class Sample:
+    scenario: str
+    ok: bool
+    latency_s: float
+    ttfb_s: float
+
+
+async def _consume_sse(client: httpx.AsyncClient, path: str, body: dict) -> tuple[bool, float]:
+    """Read an SSE response to the end; return (ok, time to first event)."""
+    start = time.perf_counter()
+    ttfb = None
+    ok = True
+    async with client.stream("POST", path, json=body) as resp:
+        if resp.status_code != 200:
+            return False, time.perf_counter() - start
+        async for line in resp.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            if ttfb is None:
+                ttfb = time.perf_counter() - start
+            event = json.loads(line[6:])
+            if event.get("type") == "error":
+                ok = False
+    return ok, ttfb if ttfb is not None else time.perf_counter() - start
+
+
+async def scenario_analyze(client: httpx.AsyncClient) -> tuple[bool, float]:
+    lat, lon = random.choice(_SITES)
+    polygon = site_polygon(lat, lon, random.choice((1, 2, 5)))
+    start = time.perf_counter()
+    resp = await client.post(
+        "/api/analyze",
+        json={
+            "latitude": lat,
+            "longitude": lon,
+            "polygon_geojson": {
+                "type": "Polygon",
+                "coordinates": [list(polygon.exterior.coords)],
+            },
+        },
+    )
+    return resp.status_code == 200, time.perf_counter() - start
+
+
+async def scenario_agent(client: httpx.AsyncClient) -> tuple[bool, float]:
+    lat, lon = random.choice(_SITES)
+    return await _consume_sse(
+        client,
+        "/api/agent/run",
+        {"latitude": lat, "longitude": lon, "area_hectares": 2.0, "mode": "test"},
+    )
+
+
+async def scenario_chat(client: httpx.AsyncClient) -> tuple[bool, float]:
+    return await _consume_sse(
+        client,
+        "/api/chat",
+        {
+            "message": "What is the LCOE for this site?",
+            "history": [
+                {"role": "user", "content": "Is this site good?"},
+                {"role": "assistant", "content": "Yes, irradiance is high."},
+            ],
+            "analysis_data": {"yield_info": {"lcoe_eur_mwh": 31.2}},
+        },
+    )
+
+
+SCENARIOS = {
+    "analyze": scenario_analyze,
+    "agent": scenario_agent,
+    "chat": scenario_chat,
+}
+
+
+async def _worker(client, names, weights, deadline, samples):
+    while time.perf_counter() < deadline:
+        name = random.choices(names, weights)[0]
+        start = time.perf_counter()
+        try:
+            ok, ttfb = await SCENARIOS[name](client)
+        except httpx.HTTPError:
+            ok, ttfb = False, time.perf_counter() - start
+        samples.append(Sample(name, ok, time.perf_counter() - start, ttfb))
+
+
+async def run(url: str, concurrency: int, duration_s: float, mix: dict) -> tuple[list, float]:
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    samples: list[Sample] = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=300, limits=limits) as client:
+        start = time.perf_counter()
+        deadline = start + duration_s
+        await asyncio.gather(
+            *(_worker(client, names, weights, deadline, samples) for _ in range(concurrency))
+        )
+        elapsed = time.perf_counter() - start
+    return samples, elapsed
+
+
+def report(samples: list, elapsed_s: float) -> None:
+    by_scenario = defaultdict(list)
+    for s in samples:
+        by_scenario[s.scenario].append(s)
+    by_scenario["all"] = samples
+
+    print(
+        f"\n{'scenario':<10} {'n':>6} {'err%':>6} {'req/s':>8} "
+        f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ttfb p50':>9}"
+    )
+    for name, group in by_scenario.items():
+        if not group:
+            continue
+        lat = np.array([s.latency_s for s in group]) * 1000
+        ttfb = np.array([s.ttfb_s for s in group]) * 1000
+        errors = sum(not s.ok for s in group)
+        p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+        print(
+            f"{name:<10} {len(group):>6} {100 * errors / len(group):>6.1f} "
+            f"{len(group) / elapsed_s:>8.2f} {p50:>9.0f} {p95:>9.0f} {p99:>9.0f} "
+            f"{np.percentile(ttfb, 50):>9.0f}"
+        )
+
+
+def _parse_mix(items: list[str]) -> dict:
+    mix = {}
+    for item in items:
+        name, _, weight = item.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8100")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--mix", nargs="+", default=["analyze=1", "agent=1", "chat=2"])
+    args = parser.parse_args()
+
+    samples, elapsed = asyncio.run(
+        run(args.url, args.concurrency, args.duration, _parse_mix(args.mix))
+    )
+    report(samples, elapsed)
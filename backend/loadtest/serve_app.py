@@ -0,0 +1,50 @@
+"""Run the SolarSite API wired to the local stand-ins from loadtest.stubs.
+
+    python -m loadtest.serve_app --port 8100 --workers 2
+
+Upstream URLs are set through the environment before the app is imported.
+fal_client has no host override, so its queue URL is pointed at the
+stand-in here.
+"""
+
+import argparse
+import os
+
+STUB_HOST = os.getenv("LOADTEST_STUB_HOST", "127.0.0.1")
+
+
+def _configure() -> None:
+    from loadtest.stubs import PORTS
+
+    os.environ["PVGIS_URL"] = f"http://{STUB_HOST}:{PORTS['pvgis']}/api/v5_3/"
+    os.environ["NOMINATIM_URL"] = f"http://{STUB_HOST}:{PORTS['nominatim']}"
+    os.environ.setdefault("NOMINATIM_MIN_INTERVAL_S", "0")
+    os.environ["OPENAI_BASE_URL"] = f"http://{STUB_HOST}:{PORTS['openai']}/v1"
+    os.environ["OPENAI_API_KEY"] = "stub"
+    os.environ["FAL_KEY"] = "stub"
+    os.environ["GRADIUM_API_KEY"] = ""
+
+    import fal_client.client
+
+    fal_client.client.QUEUE_URL_FORMAT = f"http://{STUB_HOST}:{PORTS['fal']}/"
+
+
+_configure()
+
+from main import app  # noqa: E402,F401
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    uvicorn.run(
+        "loadtest.serve_app:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level="warning",
+    )
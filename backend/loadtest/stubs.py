@@ -0,0 +1,354 @@
+"""Local stand-ins for PVGIS, Nominatim, OpenAI and fal.
+
+Each stand-in is a small FastAPI app with configurable latency and error
+injection. Start all four with:
+
+    python -m loadtest.stubs --latency-ms 150 --jitter-ms 100 --error-rate 0.01
+
+PVGIS replays recorded responses from ``benchmarks/data`` or serves the
+synthetic series from ``benchmarks.fixtures``. The OpenAI stand-in speaks
+Chat Completions (streaming and tool calls, enough to drive the LangGraph
+agent), Responses and Images.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass
+from functools import lru_cache
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+PORTS = {"pvgis": 9101, "nominatim": 9102, "openai": 9103, "fal": 9104}
+
+# 1x1 transparent PNG
+_TINY_PNG_B64 = (
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+)
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 100.0
+    jitter_ms: float = 50.0
+    error_rate: float = 0.0
+    token_delay_ms: float = 15.0
+    n_tokens: int = 40
+
+
+def _install_faults(app: FastAPI, config: StubConfig, error_body: dict) -> None:
+    """Delay every request and fail a configurable fraction of them."""
+
+    @app.middleware("http")
+    async def inject(request: Request, call_next):
+        delay = config.latency_ms + random.uniform(0, config.jitter_ms)
+        await asyncio.sleep(delay / 1000)
+        if random.random() < config.error_rate:
+            return JSONResponse(error_body, status_code=503)
+        return await call_next(request)
+
+
+# ── PVGIS v5.3 ───────────────────────────────────────────────
+
+
+@lru_cache(maxsize=32)
+def _pvgis_body(lat: float, lon: float, tilt: float, aspect: float) -> bytes:
+    # Imported lazily: fixtures pulls in the services, which read their
+    # upstream URLs from the environment at import time.
+    from benchmarks.fixtures import load_pvgis_json
+
+    src = load_pvgis_json(lat, lon, tilt, aspect + 180)
+    return json.dumps(src).encode("utf-8")
+
+
+def make_pvgis_app(config: StubConfig) -> FastAPI:
+    app = FastAPI(title="PVGIS stand-in")
+    _install_faults(app, config, {"message": "Injected PVGIS failure", "status": 503})
+
+    @app.get("/api/v5_3/seriescalc")
+    def seriescalc(lat: float, lon: float, angle: float = 0, aspect: float = 0):
+        body = _pvgis_body(round(lat, 3), round(lon, 3), angle, aspect)
+        return Response(body, media_type="application/json")
+
+    return app
+
+
+# ── Nominatim ────────────────────────────────────────────────
+
+
+def make_nominatim_app(config: StubConfig) -> FastAPI:
+    app = FastAPI(title="Nominatim stand-in")
+    _install_faults(app, config, {"error": "Injected Nominatim failure"})
+
+    @app.get("/reverse")
+    def reverse(lat: float, lon: float):
+        return {
+            "lat": str(lat),
+            "lon": str(lon),
+            "display_name": "Stub Town, Stubland",
+            "address": {"town": "Stub Town", "country": "Stubland"},
+        }
+
+    return app
+
+
+# ── OpenAI ───────────────────────────────────────────────────
+
+
+def _completion_chunk(model: str, delta: dict, finish_reason=None) -> str:
+    chunk = {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(chunk)}\n\n"
+
+
+def _usage_chunk(model: str, messages: list, completion_tokens: int) -> str:
+    prompt_tokens = len(json.dumps(messages)) // 4
+    chunk = {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": 0},
+        },
+    }
+    return f"data: {json.dumps(chunk)}\n\n"
+
+
+def _next_agent_step(messages: list) -> tuple[str, dict] | None:
+    """Script the ReAct loop: select_zone, then run_solar_analysis, then answer."""
+    called = [
+        call["function"]["name"]
+        for m in messages
+        if m.get("role") == "assistant"
+        for call in m.get("tool_calls") or []
+    ]
+    if "select_zone" not in called:
+        user_text = next(
+            (m["content"] for m in messages if m.get("role") == "user"), ""
+        )
+        coords = re.search(r"\((-?[\d.]+),\s*(-?[\d.]+)\)", str(user_text))
+        area = re.search(r"approximately ([\d.]+) hectares", str(user_text))
+        lat, lon = (float(coords.group(1)), float(coords.group(2))) if coords else (23.7145, -15.9369)
+        return "select_zone", {
+            "latitude": lat,
+            "longitude": lon,
+            "area_hectares": float(area.group(1)) if area else 5.0,
+        }
+    if "run_solar_analysis" not in called:
+        zone = json.loads(
+            next(m["content"] for m in reversed(messages) if m.get("role") == "tool")
+        )
+        center = zone.get("center", {})
+        args = {
+            "latitude": center.get("latitude", 23.7145),
+            "longitude": center.get("longitude", -15.9369),
+            "polygon_coordinates": zone["polygon_geojson"]["coordinates"][0],
+        }
+        if "row_spacing_m" in zone:
+            args["row_spacing_m"] = zone["row_spacing_m"]
+        return "run_solar_analysis", args
+    return None
+
+
+def make_openai_app(config: StubConfig) -> FastAPI:
+    app = FastAPI(title="OpenAI stand-in")
+    _install_faults(
+        app, config, {"error": {"message": "Injected OpenAI failure", "type": "server_error"}}
+    )
+
+    words = ("The site shows strong irradiance and a competitive LCOE. " * 8).split()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "stub")
+        step = _next_agent_step(body["messages"]) if body.get("tools") else None
+        text_tokens = [w + " " for w in words[: config.n_tokens]]
+
+        if not body.get("stream"):
+            message = {"role": "assistant", "content": "".join(text_tokens)}
+            if step:
+                message = {
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [
+                        {
+                            "id": f"call_{uuid.uuid4().hex[:8]}",
+                            "type": "function",
+                            "function": {"name": step[0], "arguments": json.dumps(step[1])},
+                        }
+                    ],
+                }
+            return {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": message,
+                        "finish_reason": "tool_calls" if step else "stop",
+                    }
+                ],
+                "usage": {"prompt_tokens": 100, "completion_tokens": 40, "total_tokens": 140},
+            }
+
+        async def stream():
+            yield _completion_chunk(model, {"role": "assistant", "content": ""})
+            if step:
+                call = {
+                    "index": 0,
+                    "id": f"call_{uuid.uuid4().hex[:8]}",
+                    "type": "function",
+                    "function": {"name": step[0], "arguments": json.dumps(step[1])},
+                }
+                yield _completion_chunk(model, {"tool_calls": [call]})
+                yield _completion_chunk(model, {}, "tool_calls")
+            else:
+                for token in text_tokens:
+                    await asyncio.sleep(config.token_delay_ms / 1000)
+                    yield _completion_chunk(model, {"content": token})
+                yield _completion_chunk(model, {}, "stop")
+            if body.get("stream_options", {}).get("include_usage"):
+                yield _usage_chunk(model, body["messages"], len(text_tokens))
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.post("/v1/responses")
+    async def responses(request: Request):
+        body = await request.json()
+        has_image = "input_image" in json.dumps(body.get("input", []))
+        if has_image:
+            text = json.dumps(
+                {
+                    "terrain_type": "desert",
+                    "slope_estimate_deg": 1.5,
+                    "obstacles": [],
+                    "vegetation_coverage_pct": 2,
+                    "soil_assessment": "compacted sand",
+                    "access_roads_visible": True,
+                    "water_features_visible": False,
+                    "overall_suitability": "high",
+                    "recommendations": "Suitable for ground-mounted PV.",
+                }
+            )
+        else:
+            text = json.dumps(
+                {"spoken_response": "The site looks very promising.", "action": None}
+            )
+        return {
+            "id": f"resp_{uuid.uuid4().hex[:12]}",
+            "object": "response",
+            "created_at": int(time.time()),
+            "model": body.get("model", "stub"),
+            "status": "completed",
+            "output": [
+                {
+                    "type": "message",
+                    "id": f"msg_{uuid.uuid4().hex[:12]}",
+                    "status": "completed",
+                    "role": "assistant",
+                    "content": [{"type": "output_text", "text": text, "annotations": []}],
+                }
+            ],
+            "parallel_tool_calls": True,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": {"input_tokens": 200, "output_tokens": 30, "total_tokens": 230},
+        }
+
+    @app.post("/v1/images/generations")
+    @app.post("/v1/images/edits")
+    async def images():
+        return {"created": int(time.time()), "data": [{"b64_json": _TINY_PNG_B64}]}
+
+    return app
+
+
+# ── fal queue ────────────────────────────────────────────────
+
+
+def make_fal_app(config: StubConfig, base_url: str) -> FastAPI:
+    app = FastAPI(title="fal stand-in")
+    _install_faults(app, config, {"detail": "Injected fal failure"})
+
+    @app.get("/{app_path:path}/requests/{request_id}/status")
+    def status(app_path: str, request_id: str):
+        return {"status": "COMPLETED", "logs": [], "metrics": {"inference_time": 0.1}}
+
+    @app.get("/{app_path:path}/requests/{request_id}")
+    def result(app_path: str, request_id: str):
+        return {
+            "model_glb": {"url": f"{base_url}/files/{request_id}.glb"},
+            "thumbnail": {"url": f"{base_url}/files/{request_id}.png"},
+        }
+
+    @app.post("/{app_path:path}")
+    def submit(app_path: str):
+        request_id = uuid.uuid4().hex
+        requests_url = f"{base_url}/{app_path}/requests/{request_id}"
+        return {
+            "request_id": request_id,
+            "response_url": requests_url,
+            "status_url": f"{requests_url}/status",
+            "cancel_url": f"{requests_url}/cancel",
+        }
+
+    return app
+
+
+async def serve_all(config: StubConfig, host: str = "127.0.0.1") -> None:
+    apps = {
+        "pvgis": make_pvgis_app(config),
+        "nominatim": make_nominatim_app(config),
+        "openai": make_openai_app(config),
+        "fal": make_fal_app(config, f"http://{host}:{PORTS['fal']}"),
+    }
+    servers = [
+        uvicorn.Server(uvicorn.Config(app, host=host, port=PORTS[name], log_level="warning"))
+        for name, app in apps.items()
+    ]
+    for name in apps:
+        print(f"{name:<10} http://{host}:{PORTS[name]}")
+    await asyncio.gather(*(server.serve() for server in servers))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run local stand-ins for external services.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--token-delay-ms", type=float, default=15.0)
+    parser.add_argument("--n-tokens", type=int, default=40)
+    args = parser.parse_args()
+    asyncio.run(
+        serve_all(
+            StubConfig(
+                latency_ms=args.latency_ms,
+                jitter_ms=args.jitter_ms,
+                error_rate=args.error_rate,
+                token_delay_ms=args.token_delay_ms,
+                n_tokens=args.n_tokens,
+            ),
+            host=args.host,
+        )
+    )
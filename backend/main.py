@@ -1,11 +1,27 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routers import analyze, image_analysis, generate_3d, voice, agent, chat
+from routers import analyze, image_analysis, generate_3d, voice, agent, chat, profiling, metrics, quick_estimate
+from services.clients import close_clients
+from services.warmup import preload, warmup_enabled
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Heavy dependencies load on first use; SOLARSITE_WARMUP=1 preloads
+    # them before the worker starts accepting requests.
+    if warmup_enabled():
+        await asyncio.to_thread(preload)
+    yield
+    await close_clients()
+
 
-app = FastAPI(title="SolarSite API", version="0.1.0")
+app = FastAPI(title="SolarSite API", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,11 +32,14 @@ app.add_middleware(
 )
 
 app.include_router(analyze.router)
+app.include_router(quick_estimate.router)
 app.include_router(image_analysis.router)
 app.include_router(generate_3d.router)
 app.include_router(voice.router)
 app.include_router(agent.router)
 app.include_router(chat.router)
+app.include_router(profiling.router)
+app.include_router(metrics.router)
 
 
 @app.get("/api/health")
@@ -25,6 +25,9 @@ class AnalyzeRequest(BaseModel):
     wacc: float = 0.06
     lifetime_years: int = 25
     co2_factor_t_per_mwh: float = 0.47
+    time_step_min: Literal[60, 15, 5] = 60  # 15/5: sub-hourly simulation
+    dc_ac_ratio: Optional[float] = Field(None, gt=0)  # models inverter clipping when set
+    representative_year: bool = False  # yield/heatmaps on a TMY instead of all PVGIS years
 
 
 class SiteInfo(BaseModel):
@@ -82,6 +85,8 @@ class YieldInfo(BaseModel):
     performance_ratio: float
     lcoe_eur_mwh: float
     co2_avoided_tons_yr: float
+    time_step_min: int = 60
+    clipping_loss_pct: float = 0.0
 
 
 class AnalyzeResponse(BaseModel):
@@ -91,6 +96,46 @@ class AnalyzeResponse(BaseModel):
     shadow_analysis: ShadowAnalysis
     heatmaps: Heatmaps
     yield_info: YieldInfo
+    representative_year: Optional[Dict[str, Any]] = None  # TMY months and error bound
+    analysis_id: Optional[str] = None
+
+
+class QuickEstimateRequest(BaseModel):
+    latitude: float
+    longitude: float
+    area_hectares: float = Field(..., gt=0)
+    module_width_m: float = 1.134
+    module_height_m: float = 2.278
+    module_power_wc: float = 550
+    row_spacing_m: float = Field(3.0, gt=0)
+    system_loss_pct: float = 14
+    capex_eur_per_wc: float = 0.6
+    opex_eur_per_kwc_year: float = 10.0
+    wacc: float = 0.06
+    lifetime_years: int = 25
+    co2_factor_t_per_mwh: float = 0.47
+
+
+class QuickEstimateResponse(BaseModel):
+    installed_capacity_kwc: float
+    installed_capacity_mwc: float
+    n_panels: int
+    annual_yield_mwh: float
+    specific_yield_kwh_kwp: float
+    performance_ratio: float
+    lcoe_eur_mwh: float
+    co2_avoided_tons_yr: float
+    capex_total_eur: float
+    tilt_deg: float  # equator-facing atlas tilt the yield is for
+    annual_ghi_kwh_m2: float
+    annual_poa_kwh_m2: float
+    avg_temp_c: float
+    monthly_specific_yield_kwh_kwp: List[float]
+    uncertainty_pct: float  # one standard deviation on yield
+    annual_yield_mwh_range: Tuple[float, float]
+    lcoe_eur_mwh_range: Tuple[float, float]
+    atlas: Dict[str, Any]
+    estimate_ms: float
 
 
 class AnalyzeImageResponse(BaseModel):
@@ -107,8 +152,16 @@ class Generate3DRequest(BaseModel):
     latitude: float
     longitude: float
     n_panels: int
-    render_type: Literal["test", "demo"] = "test"
+    render_type: Literal["test", "demo", "procedural"] = "test"
     map_screenshot: Optional[str] = None  # base64 PNG from MapLibre canvas
+    # Procedural mode: built locally from the zone's computed panel layout.
+    polygon_geojson: Optional[PolygonGeoJSON] = None
+    panel_tilt_deg: float = 25
+    panel_azimuth_deg: float = 180
+    row_spacing_m: float = 3.0
+    module_width_m: float = 1.134
+    module_height_m: float = 2.278
+    shadow_texture: bool = False  # drape the summer irradiance heatmap on the terrain
 
 
 class Generate3DResponse(BaseModel):
@@ -1,8 +1,6 @@
-import json
 from fastapi import APIRouter
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from services.agent_service import SolarAgent
 
 router = APIRouter()
 
@@ -16,19 +14,13 @@ class AgentRunRequest(BaseModel):
 
 @router.post("/api/agent/run")
 async def run_agent(req: AgentRunRequest):
-    agent = SolarAgent(mode=req.mode)
+    from services.agent_service import SolarAgent
+    from services.sse import sse_stream
 
-    async def event_stream():
-        try:
-            async for event in agent.run_stream(
-                req.latitude, req.longitude, req.area_hectares
-            ):
-                yield f"data: {json.dumps(event, default=str)}\n\n"
-        except Exception as e:
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+    agent = SolarAgent(mode=req.mode)
 
     return StreamingResponse(
-        event_stream(),
+        sse_stream(agent.run_stream(req.latitude, req.longitude, req.area_hectares)),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -1,8 +1,6 @@
-import json
 from fastapi import APIRouter
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from services.chat_service import stream_chat_response
 
 router = APIRouter()
 
@@ -15,24 +13,25 @@ class ChatMessage(BaseModel):
 class ChatRequest(BaseModel):
     message: str
     history: list[ChatMessage] = []
+    analysis_id: str | None = None
+    # Deprecated: clients that predate analysis_id send the analysis itself.
     analysis_data: dict | None = None
 
 
 @router.post("/api/chat")
 async def chat(req: ChatRequest):
-    history = [{"role": m.role, "content": m.content} for m in req.history]
+    from services.analysis_store import resolve_context
+    from services.chat_service import stream_chat_response
+    from services.sse import sse_stream
 
-    async def event_stream():
-        try:
-            async for event in stream_chat_response(
-                req.message, history, req.analysis_data
-            ):
-                yield f"data: {json.dumps(event, default=str)}\n\n"
-        except Exception as e:
-            yield f"data: {json.dumps({'type': 'done', 'content': str(e), 'action': None})}\n\n"
+    history = [{"role": m.role, "content": m.content} for m in req.history]
+    context = resolve_context(req.analysis_id, req.analysis_data)
 
     return StreamingResponse(
-        event_stream(),
+        sse_stream(
+            stream_chat_response(req.message, history, context),
+            on_error=lambda e: {"type": "done", "content": str(e), "action": None},
+        ),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
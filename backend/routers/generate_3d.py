@@ -1,56 +1,251 @@
 import asyncio
+import base64
 import logging
 
-from fastapi import APIRouter, HTTPException
+from typing import Literal
+
+from fastapi import APIRouter, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import FileResponse
 from models.schemas import Generate3DRequest, Generate3DResponse
-from services.openai_service import generate_solar_farm_render, generate_contextual_render
-from services.fal_service import generate_3d_test, generate_3d_demo
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+# Response field -> file name inside a cached job's directory.
+ASSET_FILES = {
+    "render_image_url": "render.png",
+    "model_glb_url": "model.glb",
+    "thumbnail_url": "thumbnail.png",
+}
+MEDIA_TYPES = {".png": "image/png", ".glb": "model/gltf-binary"}
+# Request fields that determine a procedural model.
+PROCEDURAL_FIELDS = {
+    "latitude",
+    "longitude",
+    "polygon_geojson",
+    "panel_tilt_deg",
+    "panel_azimuth_deg",
+    "row_spacing_m",
+    "module_width_m",
+    "module_height_m",
+    "shadow_texture",
+}
+
+
 @router.post("/api/generate-3d", response_model=Generate3DResponse)
-async def generate_3d(req: Generate3DRequest):
+async def generate_3d(req: Generate3DRequest, request: Request):
+    screenshot = None
+    # Demo mode is text-to-3D; the screenshot does not change its output.
+    if req.map_screenshot and req.render_type == "test":
+        from services.image_prep import decode_base64_image
+
+        try:
+            data = decode_base64_image(req.map_screenshot)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid map_screenshot: {e}") from e
+        screenshot = await _prepare_screenshot(data)
+    return await _generate_3d(req.model_copy(update={"map_screenshot": None}), request, screenshot)
+
+
+@router.post("/api/generate-3d/upload", response_model=Generate3DResponse)
+async def generate_3d_upload(
+    request: Request,
+    latitude: float = Form(...),
+    longitude: float = Form(...),
+    n_panels: int = Form(...),
+    render_type: Literal["test", "demo"] = Form("test"),
+    screenshot: UploadFile | None = File(None),
+):
+    """Multipart variant of /api/generate-3d taking the screenshot as raw bytes."""
+    req = Generate3DRequest(
+        latitude=latitude, longitude=longitude, n_panels=n_panels, render_type=render_type
+    )
+    prepared = None
+    if screenshot is not None and render_type == "test":
+        prepared = await _prepare_screenshot(await screenshot.read())
+    return await _generate_3d(req, request, prepared)
+
+
+async def _prepare_screenshot(data: bytes):
+    from services.image_prep import prepare_image
+
+    try:
+        return await asyncio.to_thread(prepare_image, data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+async def _generate_3d(req: Generate3DRequest, request: Request, screenshot) -> dict:
+    from services.model_cache import job_key, run_once
+
+    if req.render_type == "procedural":
+        if req.polygon_geojson is None:
+            raise HTTPException(status_code=400, detail="Procedural mode needs polygon_geojson")
+        key = job_key("procedural", req.model_dump_json(include=PROCEDURAL_FIELDS), 0, "")
+        try:
+            manifest = await run_once(key, lambda: _build_procedural(req, key))
+        except Exception as e:
+            logger.error("Procedural 3D build failed: %s", e, exc_info=True)
+            raise HTTPException(status_code=500, detail=str(e)) from e
+        return _asset_urls(request, key, manifest)
+
     prompt = (
         f"3D diorama: square desert terrain plot with a solar farm inside. "
         f"{req.n_panels} dark photovoltaic panels in rows on sandy ground. "
         f"Bare land around, clear sky, realistic miniature style."
     )
+    key = job_key(req.render_type, screenshot and screenshot.content_hash, req.n_panels, prompt)
+
+    try:
+        manifest = await run_once(key, lambda: _generate_and_store(req, prompt, key, screenshot))
+    except Exception as e:
+        logger.error("generate_3d endpoint failed: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+    return _asset_urls(request, key, manifest)
+
+
+def _asset_urls(request: Request, key: str, manifest: dict) -> dict:
+    return {
+        field: (
+            str(request.url_for("get_3d_asset", key=key, name=manifest["files"][field]))
+            if manifest["files"].get(field)
+            else manifest["remote"].get(field, "")
+        )
+        for field in ASSET_FILES
+    }
+
+
+@router.get("/api/generate-3d/assets/{key}/{name}", name="get_3d_asset")
+async def get_3d_asset(key: str, name: str):
+    from services.model_cache import model_store
+
+    try:
+        path = model_store().path(key, name)
+    except ValueError:
+        path = None
+    if path is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    return FileResponse(
+        path,
+        media_type=MEDIA_TYPES.get(path.suffix, "application/octet-stream"),
+        headers={"Cache-Control": "public, max-age=31536000, immutable"},
+    )
+
 
+async def _generate_and_store(req: Generate3DRequest, prompt: str, key: str, screenshot) -> dict:
+    """Run the render and 3D job, then keep its assets in the model store."""
+    from services.model_cache import fetch_bytes, model_store
+
+    remote, fell_back = await _generate(req, prompt, screenshot)
+    if fell_back:
+        # The key names the screenshot but this is the generic render; serve
+        # it uncached so the next request retries the contextual render.
+        return {"files": {}, "remote": remote}
+    files = {}
     try:
-        if req.render_type == "demo":
-            logger.info("3D demo mode — Hunyuan text-to-3D")
-            model = await asyncio.to_thread(generate_3d_demo, prompt)
-            return {
-                "render_image_url": "",
-                "model_glb_url": model["model_glb_url"],
-                "thumbnail_url": model["thumbnail_url"],
-            }
-
-        # Test mode: try contextual render, fallback to generic
-        render_image_url = None
-        if req.map_screenshot:
+        for field, name in ASSET_FILES.items():
+            if remote.get(field):
+                files[name] = await fetch_bytes(remote[field])
+    except Exception as e:
+        # Serve this result from the remote URLs; the next request retries.
+        logger.warning("Could not download 3D assets for caching: %s", e)
+        return {"files": {}, "remote": remote}
+
+    manifest = {
+        "files": {field: name for field, name in ASSET_FILES.items() if name in files},
+        # Data URLs are large and already stored as files.
+        "remote": {k: v for k, v in remote.items() if not v.startswith("data:")},
+    }
+    await asyncio.to_thread(model_store().put, key, manifest, files)
+    return manifest
+
+
+async def _build_procedural(req: Generate3DRequest, key: str) -> dict:
+    """GLB of the computed panel layout, built locally with no remote calls."""
+    from services.model_cache import model_store
+
+    def build() -> tuple[bytes, bool]:
+        from services.gltf_builder import build_layout_glb
+        from services.pipeline import AnalysisParams, run_many
+
+        params = AnalysisParams.from_request(req)
+        results = run_many(params, ("polygon", "layout"))
+        heatmap = None
+        fell_back = False
+        if req.shadow_texture:
             try:
-                logger.info("3D test mode — contextual render from screenshot (%d chars)", len(req.map_screenshot))
-                render_image_url = await generate_contextual_render(req.map_screenshot, req.n_panels)
-                logger.info("Contextual render succeeded")
-            except Exception as ctx_err:
-                logger.warning("Contextual render failed, falling back to generic: %s", ctx_err)
-                render_image_url = None
-
-        if not render_image_url:
-            logger.info("3D test mode — generic render")
-            render_image_url = await generate_solar_farm_render(prompt)
-
-        logger.info("Render image obtained, calling SAM 3D Objects...")
-        model = await asyncio.to_thread(generate_3d_test, render_image_url)
-        logger.info("3D model generated: %s", model.get("model_glb_url", "")[:80])
+                heatmaps = run_many(params, ("heatmaps",))["heatmaps"]
+                heatmap = {**heatmaps["summer"], "bounds": heatmaps["bounds"]}
+            except Exception as e:
+                logger.warning("Heatmap unavailable, building untextured terrain: %s", e)
+                fell_back = True
+        glb = build_layout_glb(
+            results["layout"],
+            results["polygon"].exterior.coords,
+            req.latitude,
+            panel_tilt_deg=req.panel_tilt_deg,
+            panel_azimuth_deg=req.panel_azimuth_deg,
+            module_width_m=req.module_width_m,
+            module_height_m=req.module_height_m,
+            heatmap=heatmap,
+        )
+        return glb, fell_back
+
+    glb, fell_back = await asyncio.to_thread(build)
+    if not fell_back:
+        manifest = {"files": {"model_glb_url": "model.glb"}, "remote": {}}
+        await asyncio.to_thread(model_store().put, key, manifest, {"model.glb": glb})
+        if model_store().path(key, "model.glb") is not None:
+            return manifest
+    # Untextured fallback (the key asks for the texture, so the next request
+    # retries it) or store disabled/unwritable: inline the model instead.
+    data_url = "data:model/gltf-binary;base64," + base64.b64encode(glb).decode("ascii")
+    return {"files": {}, "remote": {"model_glb_url": data_url}}
+
+
+async def _generate(req: Generate3DRequest, prompt: str, screenshot) -> tuple[dict, bool]:
+    """Remote asset URLs, and whether the contextual render fell back to generic."""
+    from services.openai_service import generate_solar_farm_render, generate_contextual_render
+    from services.fal_service import generate_3d_test, generate_3d_demo
+
+    if req.render_type == "demo":
+        logger.info("3D demo mode — Hunyuan text-to-3D")
+        model = await asyncio.to_thread(generate_3d_demo, prompt)
         return {
-            "render_image_url": render_image_url,
+            "render_image_url": "",
             "model_glb_url": model["model_glb_url"],
             "thumbnail_url": model["thumbnail_url"],
-        }
-    except Exception as e:
-        logger.error("generate_3d endpoint failed: %s", e, exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e)) from e
+        }, False
+
+    # Test mode: try contextual render, fallback to generic
+    render_image_url = None
+    fell_back = False
+    if screenshot is not None:
+        try:
+            logger.info(
+                "3D test mode — contextual render from %dx%d screenshot (%d bytes)",
+                screenshot.width, screenshot.height, len(screenshot.data),
+            )
+            render_image_url = await generate_contextual_render(
+                screenshot.data, req.n_panels, screenshot.mime_type
+            )
+            logger.info("Contextual render succeeded")
+        except Exception as ctx_err:
+            logger.warning("Contextual render failed, falling back to generic: %s", ctx_err)
+            render_image_url = None
+            fell_back = True
+
+    if not render_image_url:
+        logger.info("3D test mode — generic render")
+        render_image_url = await generate_solar_farm_render(prompt)
+
+    logger.info("Render image obtained, calling SAM 3D Objects...")
+    model = await asyncio.to_thread(generate_3d_test, render_image_url)
+    logger.info("3D model generated: %s", model.get("model_glb_url", "")[:80])
+    return {
+        "render_image_url": render_image_url,
+        "model_glb_url": model["model_glb_url"],
+        "thumbnail_url": model["thumbnail_url"],
+    }, fell_back
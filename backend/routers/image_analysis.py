@@ -1,5 +1,6 @@
-from fastapi import APIRouter, UploadFile, File, Form
-from services.openai_service import analyze_terrain_image
+import asyncio
+
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 
 router = APIRouter()
 
@@ -10,6 +11,10 @@ async def analyze_image(
     latitude: float = Form(...),
     longitude: float = Form(...),
 ):
-    image_bytes = await image.read()
-    result = await analyze_terrain_image(image_bytes, latitude, longitude)
-    return result
+    from services.image_prep import cached_terrain_analysis, prepare_image
+
+    try:
+        prepared = await asyncio.to_thread(prepare_image, await image.read())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return await cached_terrain_analysis(prepared, latitude, longitude)
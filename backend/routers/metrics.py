@@ -0,0 +1,30 @@
+from fastapi import APIRouter
+from services.analysis_store import store_stats
+from services.chat_context import chat_context_stats
+from services.intent_router import router_stats
+from services.clients import pool_stats
+from services.geo_utils import geo_cache_stats
+from services.image_prep import image_prep_stats
+from services.pipeline import pipeline_stats
+
+router = APIRouter()
+
+
+@router.get("/api/metrics")
+def get_metrics():
+    from services.gradium_service import tts_cache_stats
+    from services.model_cache import model_cache_stats
+
+    return {
+        "pools": pool_stats(),
+        "caches": {
+            **geo_cache_stats(),
+            "tts_phrases": tts_cache_stats(),
+            "generate_3d": model_cache_stats(),
+            **image_prep_stats(),
+        },
+        "pipeline": pipeline_stats(),
+        "analyses": store_stats(),
+        "chat": chat_context_stats(),
+        "intent_router": router_stats(),
+    }
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from services.profiler import PROFILING_ENABLED, list_profiles, profile_path
+
+router = APIRouter()
+
+
+@router.get("/api/profiles")
+def get_profiles():
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    return {"profiles": list_profiles()}
+
+
+@router.get("/api/profiles/{name}")
+def download_profile(name: str):
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    path = profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
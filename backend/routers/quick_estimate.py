@@ -0,0 +1,16 @@
+from fastapi import APIRouter, HTTPException
+from models.schemas import QuickEstimateRequest, QuickEstimateResponse
+
+router = APIRouter()
+
+
+@router.post("/api/quick-estimate", response_model=QuickEstimateResponse)
+def quick_estimate(req: QuickEstimateRequest):
+    from services.atlas import quick_estimate
+
+    try:
+        return quick_estimate(**req.model_dump())
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
@@ -1,72 +1,126 @@
+import asyncio
 import base64
+import json
+import logging
 import os
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from services.gradium_service import transcribe_audio_stream, synthesize_speech
-from services.openai_service import generate_voice_response
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+# Audio messages buffered per connection while the STT stream catches up.
+STT_QUEUE_SIZE = 64
+
+
 @router.websocket("/ws/voice")
 async def voice_ws(ws: WebSocket):
+    from services.analysis_store import resolve_context
+    from services.gradium_service import transcribe_audio_stream
+    from services.voice_pipeline import voice_reply_events
+
     await ws.accept()
     api_key = os.getenv("GRADIUM_API_KEY", "")
-    analysis_data = {}
+    analysis_context = None
     stt_only = False
+    # Clients that opt in get TTS audio as binary frames, announced by an
+    # audio_start control message; others get base64 inside JSON.
+    binary_audio = False
+    # One STT stream per connection (or per utterance when the client sends
+    # audio_end), fed through a queue (None ends it).
+    audio_queue = None
+    stt_task = None
+    stt_tasks = set()
+    # Replies to transcripts and typed commands run one at a time on their
+    # own task, so their audio never interleaves and mic frames keep flowing.
+    replies = asyncio.Queue()
+
+    async def respond(user_text: str):
+        async for event in voice_reply_events(api_key, user_text, analysis_context):
+            if event["type"] != "audio_chunk":
+                await ws.send_json(event)
+            elif binary_audio:
+                if event["seq"] == 0:
+                    await ws.send_json(
+                        {"type": "audio_start", "format": "pcm_s16le", "sample_rate": event["sample_rate"]}
+                    )
+                await ws.send_bytes(event["pcm"])
+            else:
+                pcm = event.pop("pcm")
+                await ws.send_json({**event, "data": base64.b64encode(pcm).decode("ascii")})
+
+    async def reply_worker():
+        while True:
+            user_text = await replies.get()
+            try:
+                await respond(user_text)
+            except Exception as e:
+                logger.error(f"Voice reply failed: {e}")
 
+    async def feed_audio(chunk: str):
+        nonlocal audio_queue, stt_task
+        if stt_task is None or stt_task.done():
+            audio_queue = asyncio.Queue(maxsize=STT_QUEUE_SIZE)
+            stt_task = asyncio.create_task(run_stt(audio_queue))
+            stt_tasks.add(stt_task)
+            stt_task.add_done_callback(stt_tasks.discard)
+        await audio_queue.put(chunk)
+
+    async def queued_audio(queue: asyncio.Queue):
+        while (chunk := await queue.get()) is not None:
+            yield chunk
+
+    async def run_stt(queue: asyncio.Queue):
+        try:
+            async for text in transcribe_audio_stream(api_key, queued_audio(queue)):
+                await ws.send_json({"type": "transcript", "text": text})
+                if not stt_only:
+                    replies.put_nowait(text)
+        except Exception as e:
+            logger.error(f"Voice STT session ended: {e}")
+
+    reply_task = asyncio.create_task(reply_worker())
     try:
         while True:
-            msg = await ws.receive_json()
+            message = await ws.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes") is not None:
+                # Binary frames are raw microphone audio; Gradium takes base64.
+                if api_key and message["bytes"]:
+                    await feed_audio(base64.b64encode(message["bytes"]).decode("ascii"))
+                continue
+            msg = json.loads(message["text"])
 
             if msg.get("type") == "set_mode":
-                stt_only = msg.get("stt_only", False)
+                stt_only = msg.get("stt_only", stt_only)
+                binary_audio = msg.get("binary_audio", binary_audio)
                 continue
 
             if msg.get("type") == "set_context":
-                analysis_data = msg.get("data", {})
+                analysis_context = resolve_context(
+                    msg.get("analysis_id"), msg.get("data")
+                )
                 continue
 
             if msg.get("type") == "command":
-                user_text = msg.get("text", "")
-                result = await generate_voice_response(user_text, analysis_data)
-                await ws.send_json({"type": "response", **result})
-
-                if api_key:
-                    audio = await synthesize_speech(
-                        api_key, result.get("spoken_response", "")
-                    )
-                    await ws.send_json(
-                        {
-                            "type": "audio",
-                            "data": base64.b64encode(audio).decode("utf-8"),
-                        }
-                    )
+                replies.put_nowait(msg.get("text", ""))
 
             elif msg.get("type") == "audio":
                 chunk = msg.get("data", "")
                 if api_key and chunk:
+                    await feed_audio(chunk)
 
-                    async def single_chunk():
-                        yield chunk
-
-                    async for text in transcribe_audio_stream(
-                        api_key, single_chunk()
-                    ):
-                        await ws.send_json({"type": "transcript", "text": text})
-                        if not stt_only:
-                            result = await generate_voice_response(
-                                text, analysis_data
-                            )
-                            await ws.send_json({"type": "response", **result})
-                            audio = await synthesize_speech(
-                                api_key, result.get("spoken_response", "")
-                            )
-                            await ws.send_json(
-                                {
-                                    "type": "audio",
-                                    "data": base64.b64encode(audio).decode("utf-8"),
-                                }
-                            )
+            elif msg.get("type") == "audio_end":
+                # Flush the current utterance; the next audio opens a new stream.
+                if stt_task is not None and not stt_task.done():
+                    await audio_queue.put(None)
+                    stt_task = None
 
     except WebSocketDisconnect:
         pass
+    finally:
+        reply_task.cancel()
+        for task in stt_tasks:
+            task.cancel()
@@ -1,43 +1,64 @@
+import asyncio
 import json
+import os
+import time
 import uuid
 import logging
+from functools import lru_cache
 import numpy as np
 from typing import AsyncGenerator
 
 from langchain_openai import ChatOpenAI
+from langchain_core.callbacks.manager import adispatch_custom_event
 from langchain_core.tools import tool
-from langchain_core.messages import HumanMessage  # noqa: F401
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph.prebuilt import create_react_agent
 
-from shapely.geometry import Polygon, box
+from shapely.geometry import box
 
 logger = logging.getLogger(__name__)
 
-from services.solar_engine import (
-    get_solar_positions,
-    get_pvgis_hourly,
-    get_tilted_irradiance,
-)
-from services.panel_layout import generate_panel_layout
-from services.shadow_calc import calculate_shadow_matrix
-from services.yield_calc import calculate_yield
-from services.heatmap_gen import generate_seasonal_heatmaps
-from services.geo_utils import lookup_timezone, classify_terrain, reverse_geocode
-from services.shadow_calc import compute_seasonal_shadow_losses
+from services import geo_utils
+from services.pipeline import AnalysisParams, arun_many as run_pipeline, prefetch
+from services.sse import analysis_events
 
+PREFETCH_ENABLED = os.getenv("SOLARSITE_AGENT_PREFETCH", "1").lower() in ("1", "true", "yes")
 
-def _build_system_prompt(latitude: float, longitude: float) -> str:
+# Site-level stages that only depend on the run's coordinates (tilted
+# irradiance uses the tool's default tilt/azimuth, which the LLM keeps).
+PREFETCH_STAGES = ("pvgis", "tilted_irradiance", "solar_positions")
+
+# Coordinates the LLM passes back within this many degrees of the run's
+# own are treated as the same site, so prefetched results are reused.
+SITE_SNAP_DEG = 1e-3
+
+# Progress lines streamed while run_solar_analysis waits on pipeline stages.
+STAGE_PROGRESS = {
+    "pvgis": "Irradiance data fetched",
+    "solar_positions": "Solar positions computed",
+    "tilted_irradiance": "Plane-of-array irradiance fetched",
+    "location": "Location resolved",
+    "layout": "Panel layout done",
+    "shadow_matrix": "Shading computed",
+    "heatmaps": "Heatmaps generated",
+    "yield": "Yield and economics computed",
+    "report": "Report assembled",
+}
+
+
+def _build_system_prompt(latitude: float, longitude: float, location_name: str) -> str:
     """Generate a dynamic system prompt based on coordinates."""
     lat_dir = "N" if latitude >= 0 else "S"
     lon_dir = "E" if longitude >= 0 else "W"
     hemisphere = "northern" if latitude >= 0 else "southern"
-    location_name = reverse_geocode(latitude, longitude)
     return (
         "You are SolarSite AI, an autonomous solar farm site assessment agent.\n"
         "Your mission: perform a complete solar farm assessment for the given location.\n\n"
         "Execute these steps IN ORDER:\n"
         "1. Use select_zone to define an optimal rectangular zone at the coordinates.\n"
-        "2. Use run_solar_analysis with the polygon_coordinates from step 1.\n"
+        "2. Use run_solar_analysis with the polygon_coordinates (and row_spacing_m, "
+        "if given) from step 1.\n"
         "3. Provide a brief expert summary with key findings and recommendations.\n\n"
         f"Location context: {location_name} — "
         f"{abs(latitude):.4f}\u00b0{lat_dir}, {abs(longitude):.4f}\u00b0{lon_dir} "
@@ -46,272 +67,255 @@ def _build_system_prompt(latitude: float, longitude: float) -> str:
     )
 
 
-class SolarAgent:
-    """Per-request LangGraph agent with shared result storage."""
+def _run_state(config: RunnableConfig) -> "SolarAgent":
+    return config["configurable"]["run"]
 
-    def __init__(self, mode: str = "test"):
-        self.mode = mode  # "test" (SAM $0.02) or "demo" (Hunyuan $0.225)
-        self.polygon_data = None
-        self.analysis_data = None
 
-    def _make_tools(self):
-        agent_ref = self
-
-        @tool
-        def select_zone(
-            latitude: float,
-            longitude: float,
-            area_hectares: float = 5.0,
-        ) -> str:
-            """Select an optimal rectangular zone for solar farm placement.
-
-            Args:
-                latitude: Center latitude of the zone.
-                longitude: Center longitude of the zone.
-                area_hectares: Desired area in hectares (default 5.0).
-
-            Returns:
-                JSON with polygon_geojson and zone metadata.
-            """
-            try:
-                area_m2 = area_hectares * 10000
-                side_m = np.sqrt(area_m2)
+def _square_zone(latitude: float, longitude: float, area_hectares: float) -> dict:
+    area_m2 = area_hectares * 10000
+    side_m = np.sqrt(area_m2)
 
-                lat_scale = 111320
-                lon_scale = 111320 * np.cos(np.radians(latitude))
+    lat_scale = 111320
+    lon_scale = 111320 * np.cos(np.radians(latitude))
 
-                half_lat = (side_m / 2) / lat_scale
-                half_lon = (side_m / 2) / lon_scale
+    half_lat = (side_m / 2) / lat_scale
+    half_lon = (side_m / 2) / lon_scale
 
-                rect = box(
-                    longitude - half_lon,
-                    latitude - half_lat,
-                    longitude + half_lon,
-                    latitude + half_lat,
-                )
-                coords = list(rect.exterior.coords)
-
-                polygon_geojson = {
-                    "type": "Polygon",
-                    "coordinates": [coords],
-                }
-
-                agent_ref.polygon_data = polygon_geojson
-
-                return json.dumps(
-                    {
-                        "polygon_geojson": polygon_geojson,
-                        "area_hectares": area_hectares,
-                        "area_m2": area_m2,
-                        "center": {"latitude": latitude, "longitude": longitude},
-                        "dimensions_m": {
-                            "width": round(side_m, 1),
-                            "height": round(side_m, 1),
-                        },
-                    }
-                )
-            except Exception as e:
-                logger.error(f"select_zone failed: {e}")
-                return json.dumps({"error": str(e)})
-
-        @tool
-        def run_solar_analysis(
-            latitude: float,
-            longitude: float,
-            polygon_coordinates: list,
-            panel_tilt_deg: float = 25.0,
-            panel_azimuth_deg: float = 180.0,
-            row_spacing_m: float = 3.0,
-            module_width_m: float = 1.134,
-            module_height_m: float = 2.278,
-            module_power_wc: float = 550.0,
-            system_loss_pct: float = 14.0,
-        ) -> str:
-            """Run comprehensive solar analysis on the selected zone.
-
-            Performs: PVGIS irradiance retrieval, panel layout generation,
-            shadow analysis, yield calculation, and heatmap generation.
-
-            Args:
-                latitude: Site latitude.
-                longitude: Site longitude.
-                polygon_coordinates: List of [lon, lat] coordinate pairs.
-                panel_tilt_deg: Panel tilt angle in degrees.
-                panel_azimuth_deg: Panel azimuth (180 = south).
-                row_spacing_m: Row spacing in meters.
-                module_width_m: Module width in meters.
-                module_height_m: Module height in meters.
-                module_power_wc: Module power in Wc.
-                system_loss_pct: System loss percentage.
-
-            Returns:
-                JSON with key performance indicators.
-            """
+    rect = box(
+        longitude - half_lon,
+        latitude - half_lat,
+        longitude + half_lon,
+        latitude + half_lat,
+    )
+    return {
+        "polygon_geojson": {
+            "type": "Polygon",
+            "coordinates": [list(rect.exterior.coords)],
+        },
+        "area_hectares": area_hectares,
+        "area_m2": area_m2,
+        "center": {"latitude": latitude, "longitude": longitude},
+        "dimensions_m": {
+            "width": round(side_m, 1),
+            "height": round(side_m, 1),
+        },
+    }
+
+
+async def _optimized_zone(latitude: float, longitude: float, area_hectares: float) -> dict:
+    """Best-scoring zone from the batched search, on the site's cached data."""
+    from services.zone_search import search_zones
+
+    site = await run_pipeline(
+        AnalysisParams(latitude=latitude, longitude=longitude, polygon=()),
+        ("solar_positions", "tilted_irradiance"),
+    )
+    started = time.perf_counter()
+    result = await asyncio.to_thread(
+        search_zones,
+        latitude,
+        longitude,
+        area_hectares,
+        site["solar_positions"],
+        site["tilted_irradiance"],
+    )
+    best = result["zones"][0]
+    return {
+        "polygon_geojson": {"type": "Polygon", "coordinates": [best["coordinates"]]},
+        "area_hectares": area_hectares,
+        "area_m2": area_hectares * 10000,
+        "center": {"latitude": latitude, "longitude": longitude},
+        "dimensions_m": {"width": best["width_m"], "height": best["height_m"]},
+        "rotation_deg": best["rotation_deg"],
+        "row_spacing_m": best["row_spacing_m"],
+        "estimated_n_panels": best["n_panels"],
+        "estimated_annual_yield_mwh": best["estimated_annual_yield_mwh"],
+        "gain_vs_square_pct": result["gain_vs_square_pct"],
+        "candidates_evaluated": result["candidates_evaluated"],
+        "search_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+@tool
+async def select_zone(
+    latitude: float,
+    longitude: float,
+    area_hectares: float = 5.0,
+    optimize: bool = True,
+    config: RunnableConfig = None,
+) -> str:
+    """Select an optimal rectangular zone for solar farm placement.
+
+    With optimize=True, hundreds of candidate rectangles (aspect ratio,
+    orientation, row spacing) are scored on cached irradiance and shading
+    and the best one is returned; otherwise a centered square is used.
+
+    Args:
+        latitude: Center latitude of the zone.
+        longitude: Center longitude of the zone.
+        area_hectares: Desired area in hectares (default 5.0).
+        optimize: Search for the highest-yield zone (default True).
+
+    Returns:
+        JSON with polygon_geojson, zone metadata and, when optimized,
+        the recommended row_spacing_m.
+    """
+    run = _run_state(config)
+    try:
+        zone = None
+        if optimize:
+            lat, lon = run.snap_to_site(latitude, longitude)
             try:
-                polygon = Polygon(polygon_coordinates)
+                zone = await _optimized_zone(lat, lon, area_hectares)
+            except Exception as e:
+                logger.warning(f"Zone search failed, using a square zone: {e}")
+        if zone is None:
+            zone = _square_zone(latitude, longitude, area_hectares)
+
+        run.polygon_data = zone["polygon_geojson"]
+        return json.dumps(zone)
+    except Exception as e:
+        logger.error(f"select_zone failed: {e}")
+        return json.dumps({"error": str(e)})
+
+
+@tool
+async def run_solar_analysis(
+    latitude: float,
+    longitude: float,
+    polygon_coordinates: list,
+    panel_tilt_deg: float = 25.0,
+    panel_azimuth_deg: float = 180.0,
+    row_spacing_m: float = 3.0,
+    module_width_m: float = 1.134,
+    module_height_m: float = 2.278,
+    module_power_wc: float = 550.0,
+    system_loss_pct: float = 14.0,
+    config: RunnableConfig = None,
+) -> str:
+    """Run comprehensive solar analysis on the selected zone.
+
+    Performs: PVGIS irradiance retrieval, panel layout generation,
+    shadow analysis, yield calculation, and heatmap generation.
+
+    Args:
+        latitude: Site latitude.
+        longitude: Site longitude.
+        polygon_coordinates: List of [lon, lat] coordinate pairs.
+        panel_tilt_deg: Panel tilt angle in degrees.
+        panel_azimuth_deg: Panel azimuth (180 = south).
+        row_spacing_m: Row spacing in meters.
+        module_width_m: Module width in meters.
+        module_height_m: Module height in meters.
+        module_power_wc: Module power in Wc.
+        system_loss_pct: System loss percentage.
+
+    Returns:
+        JSON with key performance indicators.
+    """
+    try:
+        run = _run_state(config)
+        latitude, longitude = run.snap_to_site(latitude, longitude)
+        params = AnalysisParams.from_coordinates(
+            polygon_coordinates,
+            latitude=latitude,
+            longitude=longitude,
+            panel_tilt_deg=panel_tilt_deg,
+            panel_azimuth_deg=panel_azimuth_deg,
+            row_spacing_m=row_spacing_m,
+            module_width_m=module_width_m,
+            module_height_m=module_height_m,
+            module_power_wc=module_power_wc,
+            system_loss_pct=system_loss_pct,
+        )
+        await adispatch_custom_event(
+            "progress",
+            {"stage": "start", "message": "Fetching irradiance and solar positions"},
+        )
 
-                solpos = get_solar_positions(latitude, longitude)
-                pvgis_data, meta = get_pvgis_hourly(latitude, longitude)
-                tilted_data, _ = get_tilted_irradiance(
-                    latitude, longitude, panel_tilt_deg, panel_azimuth_deg
+        async def on_stage(name):
+            if name in STAGE_PROGRESS:
+                await adispatch_custom_event(
+                    "progress", {"stage": name, "message": STAGE_PROGRESS[name]}
                 )
 
-                layout = generate_panel_layout(
-                    zone_polygon=polygon,
-                    module_width_m=module_width_m,
-                    module_height_m=module_height_m,
-                    row_spacing_m=row_spacing_m,
-                    panel_azimuth_deg=panel_azimuth_deg,
-                    latitude=latitude,
-                    longitude=longitude,
-                )
+        results = await run_pipeline(params, ("report", "yield", "analysis_id"), on_stage)
+        report, yield_info = results["report"], results["yield"]
+
+        # The SSE payload skips the raw shadow matrix; the UI only
+        # needs it for /api/analyze-driven views.
+        run.analysis_data = {
+            **report,
+            "analysis_id": results["analysis_id"],
+            "shadow_analysis": {
+                **report["shadow_analysis"],
+                "shadow_matrix": "",
+                "shadow_timestamps": [],
+            },
+        }
+
+        return json.dumps(
+            {
+                "n_panels": report["layout"]["n_panels"],
+                "n_rows": report["layout"]["n_rows"],
+                "installed_capacity_kwc": yield_info[
+                    "installed_capacity_kwc"
+                ],
+                "installed_capacity_mwc": yield_info[
+                    "installed_capacity_mwc"
+                ],
+                "annual_yield_mwh": yield_info.get("annual_yield_mwh", 0),
+                "specific_yield_kwh_kwp": yield_info[
+                    "specific_yield_kwh_kwp"
+                ],
+                "performance_ratio": yield_info["performance_ratio"],
+                "lcoe_eur_mwh": yield_info["lcoe_eur_mwh"],
+                "shadow_loss_pct": yield_info["shadow_loss_pct"],
+                "co2_avoided_tons_yr": yield_info["co2_avoided_tons_yr"],
+                "annual_ghi_kwh_m2": report["solar_data"]["annual_ghi_kwh_m2"],
+            }
+        )
+    except Exception as e:
+        logger.error(f"run_solar_analysis failed: {e}")
+        return json.dumps({"error": str(e)})
 
-                n_rows = layout["properties"]["n_rows"]
-                shadow_matrix = calculate_shadow_matrix(
-                    solpos=solpos,
-                    panel_height_m=module_height_m,
-                    panel_tilt_deg=panel_tilt_deg,
-                    row_spacing_m=row_spacing_m,
-                    n_rows=max(n_rows, 1),
-                    panel_azimuth_deg=panel_azimuth_deg,
-                )
 
-                heatmaps = generate_seasonal_heatmaps(
-                    pvgis_data=pvgis_data,
-                    shadow_matrix=shadow_matrix,
-                    zone_polygon=polygon,
-                    resolution_m=2.0,
-                    latitude=latitude,
-                )
+TOOLS = [select_zone, run_solar_analysis]
 
-                yield_info = calculate_yield(
-                    pvgis_data=tilted_data,
-                    shadow_matrix=shadow_matrix,
-                    n_panels=layout["properties"]["n_panels"],
-                    module_power_wc=module_power_wc,
-                    system_loss_pct=system_loss_pct,
-                )
 
-                elevation = 0
-                if isinstance(meta, dict):
-                    location = meta.get("location", meta.get("inputs", {}))
-                    if isinstance(location, dict):
-                        elevation = location.get("elevation", 0)
-
-                n_years = len(pvgis_data.index.year.unique())
-
-                seasonal = compute_seasonal_shadow_losses(shadow_matrix, latitude)
-
-                full_result = {
-                    "site_info": {
-                        "latitude": latitude,
-                        "longitude": longitude,
-                        "altitude_m": float(elevation),
-                        "timezone": lookup_timezone(latitude, longitude),
-                        "polygon_area_m2": round(
-                            polygon.area
-                            * 111320
-                            * 111320
-                            * np.cos(np.radians(latitude)),
-                            1,
-                        ),
-                        "terrain_classification": classify_terrain(float(elevation)),
-                        "location_name": reverse_geocode(latitude, longitude),
-                    },
-                    "layout": {
-                        "panels_geojson": layout,
-                        "n_panels": layout["properties"]["n_panels"],
-                        "n_rows": layout["properties"]["n_rows"],
-                        "row_spacing_m": row_spacing_m,
-                        "total_module_area_m2": round(
-                            layout["properties"]["total_area_m2"], 1
-                        ),
-                        "ground_coverage_ratio": round(
-                            layout["properties"]["ground_coverage_ratio"], 3
-                        ),
-                    },
-                    "solar_data": {
-                        "annual_ghi_kwh_m2": round(
-                            pvgis_data["ghi"].sum() / n_years / 1000, 1
-                        ),
-                        "annual_dni_kwh_m2": round(
-                            pvgis_data["dni"].sum() / n_years / 1000, 1
-                        ),
-                        "optimal_tilt_deg": panel_tilt_deg,
-                        "avg_temp_c": round(float(pvgis_data["temp_air"].mean()), 1),
-                        "avg_wind_speed_ms": round(
-                            float(pvgis_data["wind_speed"].mean()), 1
-                        ),
-                    },
-                    "shadow_analysis": {
-                        "annual_shadow_loss_pct": float(
-                            yield_info["shadow_loss_pct"]
-                        ),
-                        "winter_solstice_shadow_loss_pct": seasonal["winter_shadow_loss_pct"],
-                        "summer_solstice_shadow_loss_pct": seasonal["summer_shadow_loss_pct"],
-                        "shadow_matrix": "",
-                        "optimal_spacing_m": row_spacing_m,
-                        "shadow_timestamps": [],
-                    },
-                    "heatmaps": {
-                        "summer": {
-                            "grid": heatmaps["summer"]["grid"],
-                            "bounds": heatmaps["bounds"],
-                            "resolution_m": 2,
-                        },
-                        "winter": {
-                            "grid": heatmaps["winter"]["grid"],
-                            "bounds": heatmaps["bounds"],
-                            "resolution_m": 2,
-                        },
-                    },
-                    "yield_info": {
-                        "installed_capacity_kwc": yield_info[
-                            "installed_capacity_kwc"
-                        ],
-                        "installed_capacity_mwc": yield_info[
-                            "installed_capacity_mwc"
-                        ],
-                        "annual_yield_kwh": yield_info["annual_yield_kwh"],
-                        "specific_yield_kwh_kwp": yield_info[
-                            "specific_yield_kwh_kwp"
-                        ],
-                        "performance_ratio": yield_info["performance_ratio"],
-                        "lcoe_eur_mwh": yield_info["lcoe_eur_mwh"],
-                        "co2_avoided_tons_yr": yield_info["co2_avoided_tons_yr"],
-                    },
-                }
-
-                agent_ref.analysis_data = full_result
-
-                return json.dumps(
-                    {
-                        "n_panels": layout["properties"]["n_panels"],
-                        "n_rows": layout["properties"]["n_rows"],
-                        "installed_capacity_kwc": yield_info[
-                            "installed_capacity_kwc"
-                        ],
-                        "installed_capacity_mwc": yield_info[
-                            "installed_capacity_mwc"
-                        ],
-                        "annual_yield_mwh": yield_info.get("annual_yield_mwh", 0),
-                        "specific_yield_kwh_kwp": yield_info[
-                            "specific_yield_kwh_kwp"
-                        ],
-                        "performance_ratio": yield_info["performance_ratio"],
-                        "lcoe_eur_mwh": yield_info["lcoe_eur_mwh"],
-                        "shadow_loss_pct": yield_info["shadow_loss_pct"],
-                        "co2_avoided_tons_yr": yield_info["co2_avoided_tons_yr"],
-                        "annual_ghi_kwh_m2": round(
-                            pvgis_data["ghi"].sum() / n_years / 1000, 1
-                        ),
-                    }
-                )
-            except Exception as e:
-                logger.error(f"run_solar_analysis failed: {e}")
-                return json.dumps({"error": str(e)})
+def build_agent_graph(llm=None):
+    """Compile the ReAct graph; the system prompt is sent with each run's messages."""
+    if llm is None:
+        llm = ChatOpenAI(model="gpt-5-mini")
+    return create_react_agent(llm, TOOLS)
+
+
+@lru_cache(maxsize=1)
+def get_agent_graph():
+    """Process-wide compiled graph, built on first use."""
+    return build_agent_graph()
+
+
+class SolarAgent:
+    """Per-run state for one agent invocation.
+
+    The compiled graph and LLM client are shared by every run; this object
+    travels to the tools through `config["configurable"]["run"]`.
+    """
+
+    def __init__(self, mode: str = "test", graph=None):
+        self.mode = mode  # "test" (SAM $0.02) or "demo" (Hunyuan $0.225)
+        self.graph = graph
+        self.polygon_data = None
+        self.analysis_data = None
+        self.site = None
 
-        return [select_zone, run_solar_analysis]
+    def snap_to_site(self, latitude: float, longitude: float) -> tuple[float, float]:
+        if self.site is not None:
+            lat, lon = self.site
+            if abs(latitude - lat) < SITE_SNAP_DEG and abs(longitude - lon) < SITE_SNAP_DEG:
+                return lat, lon
+        return latitude, longitude
 
     async def run_stream(
         self,
@@ -324,14 +328,19 @@ class SolarAgent:
         Mode is set at __init__: "test" uses SAM 3D ($0.02),
         "demo" uses Hunyuan text-to-3D ($0.225).
         """
-        """Run the agent and yield SSE-compatible event dicts."""
-        tools = self._make_tools()
+        self.site = (latitude, longitude)
 
-        llm = ChatOpenAI(model="gpt-5-mini")
-        agent = create_react_agent(
-            llm, tools, prompt=_build_system_prompt(latitude, longitude),
-            recursion_limit=12,
-        )
+        # Coordinates are known now; start the slow downloads while the LLM
+        # is still choosing a zone.
+        site_params = AnalysisParams(latitude=latitude, longitude=longitude, polygon=())
+        if PREFETCH_ENABLED:
+            prefetch(site_params, PREFETCH_STAGES)
+
+        location_name = await geo_utils.reverse_geocode_async(latitude, longitude)
+        if PREFETCH_ENABLED:
+            # The geocode cache is warm now, so this stage costs no request.
+            prefetch(site_params, ("location",))
+        agent = self.graph or get_agent_graph()
 
         user_message = (
             f"Perform a complete solar farm site assessment at coordinates "
@@ -340,10 +349,20 @@ class SolarAgent:
             f"then run the full solar analysis."
         )
 
-        config = {"configurable": {"thread_id": f"solar-{uuid.uuid4().hex[:12]}"}}
+        config = {
+            "recursion_limit": 12,
+            "configurable": {
+                "thread_id": f"solar-{uuid.uuid4().hex[:12]}",
+                "run": self,
+            },
+        }
+        messages = [
+            SystemMessage(_build_system_prompt(latitude, longitude, location_name)),
+            HumanMessage(user_message),
+        ]
 
         async for event in agent.astream_events(
-            {"messages": [{"role": "user", "content": user_message}]},
+            {"messages": messages},
             config=config,
             version="v2",
         ):
@@ -354,6 +373,9 @@ class SolarAgent:
                 if hasattr(chunk, "content") and chunk.content:
                     yield {"type": "thinking", "content": chunk.content}
 
+            elif kind == "on_custom_event" and event["name"] == "progress":
+                yield {"type": "progress", "tool": "run_solar_analysis", **event["data"]}
+
             elif kind == "on_tool_start":
                 yield {"type": "tool_start", "tool": event["name"]}
 
@@ -367,7 +389,9 @@ class SolarAgent:
                         yield {"type": "error", "message": "Zone selection failed — no polygon generated"}
                 elif tool_name == "run_solar_analysis":
                     if self.analysis_data:
-                        yield {"type": "analysis", "data": self.analysis_data}
+                        # KPIs first, then layout and heatmap chunks.
+                        for chunk in analysis_events(self.analysis_data):
+                            yield chunk
                     else:
                         yield {"type": "error", "message": "Solar analysis failed — no results generated"}
 
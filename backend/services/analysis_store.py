@@ -0,0 +1,84 @@
+"""Server-side store of analysis contexts, referenced by `analysis_id`.
+
+Chat and voice used to receive the whole analysis with every message and
+re-serialize it into the prompt each turn. Each finished analysis now gets
+an id, and its compact LLM context (KPIs only, no panels, grids or shadow
+matrix) is serialized once and kept in a memory LRU backed by the SQLite
+cache (see services.cache), so clients only send the id.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from functools import lru_cache
+
+from services.cache import TieredCache
+
+logger = logging.getLogger(__name__)
+
+STORE_SIZE = int(os.getenv("SOLARSITE_ANALYSIS_STORE_SIZE", "256"))
+STORE_TTL_S = 7 * 24 * 3600
+
+# Bulky fields that add nothing to an LLM's understanding of the results.
+_DROP_TOP_LEVEL = ("heatmaps", "heatmap_summer", "heatmap_winter", "panels_geojson")
+_DROP_NESTED = ("panels_geojson", "shadow_matrix", "shadow_timestamps", "grid")
+
+
+@lru_cache(maxsize=1)
+def _store() -> TieredCache:
+    return TieredCache("analyses", maxsize=STORE_SIZE, ttl_s=STORE_TTL_S)
+
+
+def compact_analysis(data: dict | None) -> dict:
+    """Strip panels, heatmap grids and the shadow matrix to fit a prompt."""
+    if not data:
+        return {}
+    compact = {}
+    for key, val in data.items():
+        if key in _DROP_TOP_LEVEL:
+            continue
+        if isinstance(val, dict):
+            compact[key] = {k: v for k, v in val.items() if k not in _DROP_NESTED}
+        else:
+            compact[key] = val
+    return compact
+
+
+def context_json(data: dict | None) -> str:
+    """Serialized compact context, as embedded in chat and voice prompts."""
+    return json.dumps(compact_analysis(data), default=str, separators=(",", ":"))
+
+
+def analysis_id_for(key) -> str:
+    """Stable id for an analysis identified by a hashable key (e.g. pipeline inputs)."""
+    return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:16]
+
+
+def save_analysis(analysis: dict, key) -> str:
+    """Store the compact context of `analysis` and return its id."""
+    analysis_id = analysis_id_for(key)
+    _store().set(analysis_id, context_json(analysis))
+    return analysis_id
+
+
+def get_context(analysis_id: str | None) -> str | None:
+    """Compact context JSON for an id, or None when unknown or expired."""
+    if not analysis_id:
+        return None
+    context = _store().get(analysis_id)
+    if context is None:
+        logger.info(f"Unknown analysis_id {analysis_id}")
+    return context
+
+
+def resolve_context(analysis_id: str | None, analysis_data: dict | None) -> str | None:
+    """Context from the store, falling back to analysis data sent by older clients."""
+    context = get_context(analysis_id)
+    if context is None and analysis_data:
+        context = context_json(analysis_data)
+    return context
+
+
+def store_stats() -> dict:
+    return _store().stats()
@@ -0,0 +1,305 @@
+"""Gridded irradiance atlas for quick estimates without a PVGIS call.
+
+A full analysis downloads four years of PVGIS data before it can say
+anything. The atlas answers "roughly how much?" in milliseconds from a
+lat/lon grid built ahead of time from PVGIS pulls. Each grid node holds:
+
+- monthly GHI, plane-of-array irradiation and mean air temperature;
+- monthly specific yield (kWh/kWp) before system losses, computed with
+  calculate_yield's temperature model on the unshaded plane;
+- the tilt the plane was pulled at, and the spread of the yield between
+  years.
+
+All planes face the equator at `optimal_tilt(latitude)`. Each quantity is
+a float32 .npy file, memory-mapped on first use. A lookup only reads the
+four nodes around a site and interpolates them bilinearly. Nodes without
+data (sea, failed pulls) are left out of the weights.
+
+Build the atlas offline:
+
+    python -m services.atlas build --lat 20 30 --lon -20 -10 --step 0.5
+    python -m services.atlas build --lat 20 30 --lon -20 -10 --source fixtures
+
+`--source pvgis` pulls each node through solar_engine. `--source fixtures`
+replays responses recorded with `python -m benchmarks.fixtures record`,
+and uses synthetic records where there are none, which is only useful for
+development.
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from services.cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+ATLAS_DIR = Path(os.getenv("SOLARSITE_ATLAS_DIR", str(CACHE_DIR / "atlas")))
+# Satellite irradiance error plus what a quick estimate leaves out
+# (row shading, the actual layout), as one standard deviation.
+ATLAS_BASE_UNCERTAINTY_PCT = float(os.getenv("SOLARSITE_ATLAS_BASE_UNCERTAINTY_PCT", "5"))
+MONTHLY_FIELDS = ("ghi", "poa", "temp_air", "specific_yield")
+NODE_FIELDS = ("tilt_deg", "interannual_cv_pct")
+
+
+def optimal_tilt(latitude: float) -> float:
+    """Annual-optimum fixed tilt, 0.76 * |latitude| + 3.1 (Jacobson & Jadhav, 2018)."""
+    return round(min(0.76 * abs(latitude) + 3.1, 60.0), 1)
+
+
+def equator_azimuth(latitude: float) -> float:
+    return 180.0 if latitude >= 0 else 0.0
+
+
+def node_summary(horizontal, tilted, temp_coefficient: float = -0.0035) -> dict:
+    """Monthly and per-node atlas values from a site's horizontal and tilted PVGIS records."""
+    from services.yield_calc import temperature_factor
+
+    poa = tilted["poa_global"]
+    temp = tilted["temp_air"] if "temp_air" in tilted else None
+    hourly_yield = poa / 1000
+    if temp is not None:
+        hourly_yield = hourly_yield * temperature_factor(temp, poa, temp_coefficient)
+
+    index = poa.index
+    n_years = len(index.year.unique())
+    month = index.month
+
+    def monthly(series):
+        return series.groupby(month).sum().reindex(range(1, 13), fill_value=0).to_numpy() / n_years
+
+    per_year = hourly_yield.groupby(index.year).sum()
+    return {
+        "ghi": monthly(horizontal["ghi"]) / 1000,
+        "poa": monthly(poa) / 1000,
+        "temp_air": (
+            temp.groupby(month).mean().reindex(range(1, 13)).to_numpy()
+            if temp is not None
+            else np.full(12, np.nan)
+        ),
+        "specific_yield": monthly(hourly_yield),
+        "interannual_cv_pct": float(per_year.std() / per_year.mean() * 100) if len(per_year) > 1 else 0.0,
+    }
+
+
+def _fetch_pvgis(lat: float, lon: float, tilt: float, azimuth: float):
+    from services import solar_engine
+
+    horizontal, _ = solar_engine.get_pvgis_hourly(lat, lon)
+    tilted, _ = solar_engine.get_tilted_irradiance(lat, lon, tilt, azimuth)
+    return horizontal, tilted
+
+
+def _fetch_fixtures(lat: float, lon: float, tilt: float, azimuth: float):
+    from benchmarks.fixtures import pvgis_frame
+
+    return pvgis_frame(lat, lon)[0], pvgis_frame(lat, lon, tilt, azimuth)[0]
+
+
+SOURCES = {"pvgis": _fetch_pvgis, "fixtures": _fetch_fixtures}
+
+
+def build_atlas(
+    lat_range: tuple[float, float],
+    lon_range: tuple[float, float],
+    step_deg: float,
+    out_dir: Path = ATLAS_DIR,
+    source: str = "pvgis",
+    workers: int = 4,
+) -> dict:
+    """Pull every grid node from `source` and write the atlas to `out_dir`."""
+    fetch = SOURCES[source]
+    lats = np.round(np.arange(lat_range[0], lat_range[1] + step_deg / 2, step_deg), 6)
+    lons = np.round(np.arange(lon_range[0], lon_range[1] + step_deg / 2, step_deg), 6)
+    shape = (len(lats), len(lons))
+    monthly = {f: np.full((*shape, 12), np.nan, dtype=np.float32) for f in MONTHLY_FIELDS}
+    nodes = {f: np.full(shape, np.nan, dtype=np.float32) for f in NODE_FIELDS}
+
+    def pull(ij):
+        i, j = ij
+        lat, lon = float(lats[i]), float(lons[j])
+        tilt = optimal_tilt(lat)
+        try:
+            return ij, tilt, node_summary(*fetch(lat, lon, tilt, equator_azimuth(lat)))
+        except Exception as e:
+            logger.warning(f"Atlas node {lat:.3f},{lon:.3f} skipped: {e}")
+            return ij, tilt, None
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for (i, j), tilt, summary in pool.map(pull, np.ndindex(*shape)):
+            if summary is None:
+                continue
+            for f in MONTHLY_FIELDS:
+                monthly[f][i, j] = summary[f]
+            nodes["tilt_deg"][i, j] = tilt
+            nodes["interannual_cv_pct"][i, j] = summary["interannual_cv_pct"]
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for name, values in {**monthly, **nodes}.items():
+        np.save(out_dir / f"{name}.npy", values)
+    meta = {
+        "lat0": float(lats[0]),
+        "lon0": float(lons[0]),
+        "step_deg": step_deg,
+        "shape": list(shape),
+        "nodes_with_data": int(np.isfinite(nodes["tilt_deg"]).sum()),
+        "source": source,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "build_s": round(time.perf_counter() - started, 1),
+    }
+    # Written last: an atlas without meta.json is treated as missing.
+    (out_dir / "meta.json").write_text(json.dumps(meta, indent=2))
+    load_atlas.cache_clear()
+    return meta
+
+
+@dataclass(frozen=True)
+class Atlas:
+    meta: dict
+    arrays: dict
+
+    def interpolate(self, latitude: float, longitude: float) -> dict:
+        """Bilinear values at a point, plus the spread of the nodes around it."""
+        n_lat, n_lon = self.meta["shape"]
+        step = self.meta["step_deg"]
+        y = (latitude - self.meta["lat0"]) / step
+        x = (longitude - self.meta["lon0"]) / step
+        if not (-0.5 <= y <= n_lat - 0.5 and -0.5 <= x <= n_lon - 0.5):
+            raise ValueError(f"({latitude}, {longitude}) is outside the atlas")
+
+        i0 = min(max(math.floor(y), 0), n_lat - 1)
+        j0 = min(max(math.floor(x), 0), n_lon - 1)
+        i1, j1 = min(i0 + 1, n_lat - 1), min(j0 + 1, n_lon - 1)
+        fy, fx = min(max(y - i0, 0.0), 1.0), min(max(x - j0, 0.0), 1.0)
+        weights = np.array([[(1 - fy) * (1 - fx), (1 - fy) * fx], [fy * (1 - fx), fy * fx]])
+        if i1 == i0:
+            weights = weights.sum(axis=0, keepdims=True)
+        if j1 == j0:
+            weights = weights.sum(axis=1, keepdims=True)
+
+        window = (slice(i0, i1 + 1), slice(j0, j1 + 1))
+        annual = np.asarray(self.arrays["specific_yield"][window], dtype=np.float64).sum(axis=-1)
+        weights = np.where(np.isfinite(annual), weights, 0.0)
+        if weights.sum() == 0:
+            raise ValueError(f"No atlas data near ({latitude}, {longitude})")
+        weights /= weights.sum()
+
+        out = {}
+        for name, array in self.arrays.items():
+            values = np.nan_to_num(np.asarray(array[window], dtype=np.float64))
+            out[name] = np.tensordot(weights, values, axes=([0, 1], [0, 1]))
+        estimate = float(out["specific_yield"].sum())
+        spread = math.sqrt(float((weights * (np.nan_to_num(annual) - estimate) ** 2).sum()))
+        out["interpolation_spread_pct"] = spread / estimate * 100 if estimate > 0 else 0.0
+        return out
+
+
+@lru_cache(maxsize=1)
+def load_atlas(path: Path = ATLAS_DIR) -> Atlas:
+    meta_path = path / "meta.json"
+    if not meta_path.is_file():
+        raise FileNotFoundError(f"No irradiance atlas in {path}; build one with `python -m services.atlas build`")
+    meta = json.loads(meta_path.read_text())
+    arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in MONTHLY_FIELDS + NODE_FIELDS}
+    logger.info(f"Loaded irradiance atlas {meta['shape']} from {path}")
+    return Atlas(meta, arrays)
+
+
+def quick_estimate(
+    latitude: float,
+    longitude: float,
+    area_hectares: float,
+    module_width_m: float = 1.134,
+    module_height_m: float = 2.278,
+    module_power_wc: float = 550.0,
+    row_spacing_m: float = 3.0,
+    system_loss_pct: float = 14.0,
+    capex_eur_per_wc: float = 0.6,
+    opex_eur_per_kwc_year: float = 10.0,
+    wacc: float = 0.06,
+    lifetime_years: int = 25,
+    co2_factor_t_per_mwh: float = 0.47,
+) -> dict:
+    """Capacity, yield and LCOE for a square zone of `area_hectares`, from the atlas.
+
+    Capacity comes from packing the square like select_zone does. The
+    yield is the atlas's unshaded specific yield after system losses.
+    `uncertainty_pct` is one standard deviation and combines the base
+    allowance, the interannual spread and the interpolation spread.
+    """
+    from services.yield_calc import summarize_yield
+    from services.zone_search import pack_rectangles
+
+    started = time.perf_counter()
+    atlas = load_atlas()
+    values = atlas.interpolate(latitude, longitude)
+
+    side_m = math.sqrt(area_hectares * 10000)
+    _, n_panels = pack_rectangles(
+        np.array([side_m]), np.array([side_m]), np.array([0.0]), np.array([row_spacing_m]),
+        module_width_m, module_height_m,
+    )
+    n_panels = int(n_panels[0])
+    specific_yield = float(values["specific_yield"].sum()) * (1 - system_loss_pct / 100)
+    result = summarize_yield(
+        installed_capacity_wc=n_panels * module_power_wc,
+        annual_specific_yield=specific_yield,
+        annual_ghi_kwh_m2=float(values["poa"].sum()),
+        capex_eur_per_wc=capex_eur_per_wc,
+        opex_eur_per_kwc_year=opex_eur_per_kwc_year,
+        wacc=wacc,
+        lifetime_years=lifetime_years,
+        co2_factor_t_per_mwh=co2_factor_t_per_mwh,
+    )
+    del result["shadow_loss_pct"]  # not modelled here
+
+    uncertainty = math.sqrt(
+        ATLAS_BASE_UNCERTAINTY_PCT**2
+        + float(values["interannual_cv_pct"]) ** 2
+        + values["interpolation_spread_pct"] ** 2
+    )
+    low, high = 1 - uncertainty / 100, 1 + uncertainty / 100
+    return {
+        **result,
+        "n_panels": n_panels,
+        "tilt_deg": round(float(values["tilt_deg"]), 1),
+        "annual_ghi_kwh_m2": round(float(values["ghi"].sum()), 1),
+        "annual_poa_kwh_m2": round(float(values["poa"].sum()), 1),
+        "avg_temp_c": round(float(values["temp_air"].mean()), 1),
+        "monthly_specific_yield_kwh_kwp": [
+            round(float(v) * (1 - system_loss_pct / 100), 1) for v in values["specific_yield"]
+        ],
+        "uncertainty_pct": round(uncertainty, 1),
+        "annual_yield_mwh_range": [
+            round(result["annual_yield_mwh"] * low, 1),
+            round(result["annual_yield_mwh"] * high, 1),
+        ],
+        "lcoe_eur_mwh_range": [round(result["lcoe_eur_mwh"] / high, 1), round(result["lcoe_eur_mwh"] / low, 1)],
+        "atlas": {"source": atlas.meta["source"], "step_deg": atlas.meta["step_deg"]},
+        "estimate_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the irradiance atlas for quick estimates.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build")
+    build.add_argument("--lat", type=float, nargs=2, required=True, metavar=("MIN", "MAX"))
+    build.add_argument("--lon", type=float, nargs=2, required=True, metavar=("MIN", "MAX"))
+    build.add_argument("--step", type=float, default=0.5)
+    build.add_argument("--source", choices=sorted(SOURCES), default="pvgis")
+    build.add_argument("--out", type=Path, default=ATLAS_DIR)
+    build.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(build_atlas(tuple(args.lat), tuple(args.lon), args.step, args.out, args.source, args.workers), indent=2))
@@ -0,0 +1,321 @@
+"""In-memory LRU and SQLite-backed key/value stores shared by the services."""
+
+import asyncio
+import logging
+import os
+import json
+import pickle
+import shutil
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(
+    os.getenv("SOLARSITE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "solarsite"))
+)
+PERSIST_ENABLED = os.getenv("SOLARSITE_PERSISTENT_CACHE", "1").lower() in ("1", "true", "yes")
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe LRU bounded by entry count and, optionally, total bytes.
+
+    `sizeof` maps a value to its size in bytes; it is required when
+    `max_bytes` is set.
+    """
+
+    def __init__(self, maxsize: int = 1024, max_bytes: int | None = None, sizeof=None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda value: 0)
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value) -> None:
+        size = self._sizeof(value)
+        with self._lock:
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            if key in self._data:
+                self._bytes -= self._sizeof(self._data.pop(key))
+            self._data[key] = value
+            self._bytes += size
+            while len(self._data) > self.maxsize or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= self._sizeof(evicted)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            value = self._data.pop(key, _MISSING)
+            if value is _MISSING:
+                return default
+            self._bytes -= self._sizeof(value)
+            return value
+
+    def discard(self, key, value) -> bool:
+        """Remove `key` only while it still maps to `value` (by identity)."""
+        with self._lock:
+            if self._data.get(key, _MISSING) is not value:
+                return False
+            del self._data[key]
+            self._bytes -= self._sizeof(value)
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+class SQLiteStore:
+    """Persistent pickle-valued key/value table with optional TTL.
+
+    Falls back to a no-op store when the database cannot be opened, so a
+    read-only filesystem only costs the persistence, never the request.
+    """
+
+    def __init__(self, name: str, ttl_s: float | None = None, path: Path | None = None):
+        self.name = name
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._conn = None
+        path = path or CACHE_DIR / "solarsite.sqlite3"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {name} "
+                "(key TEXT PRIMARY KEY, value BLOB, created_at REAL)"
+            )
+            self._conn.commit()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Persistent cache '{name}' disabled: {e}")
+            self._conn = None
+
+    def get(self, key: str, default=None):
+        if self._conn is None:
+            return default
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, created_at FROM {self.name} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return default
+        value, created_at = row
+        if self.ttl_s is not None and time.time() - created_at > self.ttl_s:
+            self.delete(key)
+            return default
+        return pickle.loads(value)
+
+    def set(self, key: str, value) -> None:
+        if self._conn is None:
+            return
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.name} (key, value, created_at) VALUES (?, ?, ?)",
+                (key, blob, time.time()),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        if self._conn is None:
+            return
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.name} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        if self._conn is None:
+            return 0
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+
+
+class TieredCache:
+    """Memory LRU in front of a SQLiteStore; memory misses fall through to disk."""
+
+    def __init__(self, name: str, maxsize: int = 4096, ttl_s: float | None = None, persist: bool | None = None):
+        self.memory = LRUCache(maxsize=maxsize)
+        persist = PERSIST_ENABLED if persist is None else persist
+        self.store = SQLiteStore(name, ttl_s=ttl_s) if persist else None
+
+    def get(self, key: str, default=None):
+        value = self.memory.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.store is not None:
+            value = self.store.get(key, _MISSING)
+            if value is not _MISSING:
+                self.memory.set(key, value)
+                return value
+        return default
+
+    def set(self, key: str, value) -> None:
+        self.memory.set(key, value)
+        if self.store is not None:
+            self.store.set(key, value)
+
+    async def aget(self, key: str, default=None):
+        """get() for the event loop: memory inline, SQLite in a worker thread."""
+        value = self.memory.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.store is not None:
+            value = await asyncio.to_thread(self.store.get, key, _MISSING)
+            if value is not _MISSING:
+                self.memory.set(key, value)
+                return value
+        return default
+
+    async def aset(self, key: str, value) -> None:
+        self.memory.set(key, value)
+        if self.store is not None:
+            await asyncio.to_thread(self.store.set, key, value)
+
+    def stats(self) -> dict:
+        return {
+            **self.memory.stats(),
+            "persisted_entries": len(self.store) if self.store is not None else 0,
+        }
+
+
+class AssetStore:
+    """Directory-per-key file cache bounded by total bytes, evicted LRU.
+
+    Each entry is a directory holding its files and a `manifest.json`; the
+    manifest's mtime is the entry's last use. SOLARSITE_PERSISTENT_CACHE=0
+    disables it like the SQLite tier, and so does an unwritable directory,
+    instead of failing requests.
+    """
+
+    def __init__(self, name: str, max_bytes: int, root: Path | None = None, persist: bool | None = None):
+        self.root = root or CACHE_DIR / name
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if not (PERSIST_ENABLED if persist is None else persist):
+            self.enabled = False
+            return
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            self.enabled = True
+        except OSError as e:
+            logger.warning(f"Asset store '{name}' disabled: {e}")
+            self.enabled = False
+
+    def _entry(self, key: str) -> Path:
+        if not key.isalnum():
+            raise ValueError(f"Invalid asset key: {key!r}")
+        return self.root / key
+
+    def get(self, key: str) -> dict | None:
+        """The entry's manifest, marking it as recently used, or None."""
+        manifest = self._entry(key) / "manifest.json" if self.enabled else None
+        try:
+            data = json.loads(manifest.read_text()) if manifest else None
+            if data is not None:
+                os.utime(manifest)
+        except (OSError, ValueError):
+            data = None
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return data
+
+    def path(self, key: str, name: str) -> Path | None:
+        """Path of one file of an entry, if it exists."""
+        if not self.enabled or "/" in name or name.startswith("."):
+            return None
+        path = self._entry(key) / name
+        return path if path.is_file() else None
+
+    def put(self, key: str, manifest: dict, files: dict[str, bytes]) -> None:
+        """Write an entry atomically, then evict old entries over max_bytes."""
+        if not self.enabled:
+            return
+        entry = self._entry(key)
+        tmp = self.root / f".{key}.{os.getpid()}.{threading.get_ident()}"
+        try:
+            tmp.mkdir(parents=True, exist_ok=True)
+            for name, data in files.items():
+                (tmp / name).write_bytes(data)
+            (tmp / "manifest.json").write_text(json.dumps(manifest))
+            with self._lock:
+                shutil.rmtree(entry, ignore_errors=True)
+                tmp.rename(entry)
+                self._evict()
+        except OSError as e:
+            logger.warning(f"Asset store write failed for {key}: {e}")
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for entry in self.root.iterdir():
+            manifest = entry / "manifest.json"
+            if entry.name.startswith(".") or not manifest.is_file():
+                continue
+            size = sum(f.stat().st_size for f in entry.iterdir())
+            entries.append((manifest.stat().st_mtime, size, entry))
+        return entries
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def stats(self) -> dict:
+        entries = self._entries() if self.enabled else []
+        total = self.hits + self.misses
+        return {
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
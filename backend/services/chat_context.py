@@ -0,0 +1,197 @@
+"""Prompt assembly for /api/chat: stable prefix, token budget, rolling summary.
+
+Messages are ordered for provider-side prompt caching, which reuses the
+longest identical prefix of the previous request:
+
+1. the fixed system prompt;
+2. the analysis context, fixed for a whole conversation about one analysis;
+3. a summary of older turns, which only changes every SUMMARY_BLOCK messages;
+4. the recent turns, which only grow, then the new message.
+
+When the history exceeds HISTORY_TOKEN_BUDGET, the oldest whole blocks of
+SUMMARY_BLOCK messages are folded into the summary. Summaries are cached by
+the turns they cover, so each block is summarized once and the prefix stays
+byte-identical between rolls.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from functools import lru_cache
+
+from services.cache import TieredCache
+
+logger = logging.getLogger(__name__)
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("SOLARSITE_CHAT_HISTORY_TOKENS", "3000"))
+SUMMARY_BLOCK = 8
+# Latest messages always kept verbatim, even over budget.
+MIN_RECENT_MESSAGES = 2
+SUMMARY_MODEL = os.getenv("SOLARSITE_CHAT_SUMMARY_MODEL", "gpt-5-mini")
+ENCODING = "o200k_base"
+# Role and separator tokens the API adds around each message.
+MESSAGE_OVERHEAD_TOKENS = 4
+# Fallback when the tokenizer is unavailable; JSON-heavy text is ~3 chars/token.
+CHARS_PER_TOKEN = 3
+
+SUMMARY_PROMPT = (
+    "Summarize this conversation between a user and a solar site assessment "
+    "assistant in at most 120 words. Keep figures, decisions and open questions; "
+    "drop pleasantries. If a previous summary is given, merge it in."
+)
+
+_stats_lock = threading.Lock()
+_stats = {"turns": 0, "prompt_tokens": 0, "cached_tokens": 0, "summaries": 0}
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """tiktoken encoding, or None (token counts then use a character estimate)."""
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(ENCODING)
+    except Exception as e:
+        logger.warning(f"tiktoken unavailable, estimating token counts: {e}")
+        return None
+
+
+@lru_cache(maxsize=1)
+def _summaries() -> TieredCache:
+    return TieredCache("chat_summaries", maxsize=512, ttl_s=24 * 3600)
+
+
+def count_tokens(text: str) -> int:
+    enc = _encoding()
+    if enc is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages: list[dict]) -> int:
+    return sum(count_tokens(m.get("content") or "") + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def _history_key(turns: list[dict]) -> str:
+    payload = json.dumps(
+        [(t.get("role"), t.get("content")) for t in turns], separators=(",", ":")
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _summary_cut(token_counts: list[int], budget: int) -> int:
+    """Number of leading messages to summarize: whole blocks, as few as fit the budget."""
+    remaining = sum(token_counts)
+    if remaining <= budget:
+        return 0
+    cut = 0
+    limit = len(token_counts) - MIN_RECENT_MESSAGES
+    while cut + SUMMARY_BLOCK <= limit and remaining > budget:
+        remaining -= sum(token_counts[cut : cut + SUMMARY_BLOCK])
+        cut += SUMMARY_BLOCK
+    return cut
+
+
+async def summarize_turns(previous: str | None, turns: list[dict]) -> str:
+    """Fold `turns` into `previous` with one short LLM call."""
+    from services.clients import get_openai_client
+
+    transcript = "\n".join(f"{t.get('role', 'user')}: {t.get('content', '')}" for t in turns)
+    if previous:
+        transcript = f"Previous summary: {previous}\n\n{transcript}"
+    response = await get_openai_client().chat.completions.create(
+        model=SUMMARY_MODEL,
+        messages=[
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": transcript},
+        ],
+    )
+    return (response.choices[0].message.content or "").strip()
+
+
+async def _summary_for(turns: list[dict], summarize) -> str | None:
+    """Summary of `turns`, extending the longest cached summary of a prefix."""
+    store = _summaries()
+    key = _history_key(turns)
+    summary = store.get(key)
+    if summary is not None:
+        return summary
+
+    previous, start = None, 0
+    for end in range(len(turns) - SUMMARY_BLOCK, 0, -SUMMARY_BLOCK):
+        previous = store.get(_history_key(turns[:end]))
+        if previous is not None:
+            start = end
+            break
+    try:
+        summary = await summarize(previous, turns[start:])
+    except Exception as e:
+        logger.error(f"Chat summary failed, dropping {len(turns)} old messages: {e}")
+        return previous
+    store.set(key, summary)
+    with _stats_lock:
+        _stats["summaries"] += 1
+    return summary
+
+
+async def build_messages(
+    system_prompt: str,
+    message: str,
+    history: list[dict],
+    analysis_context: str | None = None,
+    budget: int = HISTORY_TOKEN_BUDGET,
+    summarize=summarize_turns,
+) -> tuple[list[dict], dict]:
+    """Chat Completions messages within the token budget, plus prompt stats."""
+    history = [
+        {"role": h.get("role", "user"), "content": h.get("content", "")} for h in history
+    ]
+    cut = _summary_cut([count_message_tokens([h]) for h in history], budget)
+
+    messages = [{"role": "system", "content": system_prompt}]
+    if analysis_context:
+        messages.append(
+            {"role": "system", "content": f"Current analysis data:\n{analysis_context}"}
+        )
+    if cut:
+        summary = await _summary_for(history[:cut], summarize)
+        if summary:
+            messages.append(
+                {"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"}
+            )
+    messages.extend(history[cut:])
+    messages.append({"role": "user", "content": message})
+
+    stats = {
+        "prompt_tokens_est": count_message_tokens(messages),
+        "history_messages": len(history) - cut,
+        "summarized_messages": cut,
+    }
+    return messages, stats
+
+
+def record_usage(usage) -> dict:
+    """Prompt and cached token counts from a Chat Completions `usage` object."""
+    if usage is None:
+        return {}
+    details = getattr(usage, "prompt_tokens_details", None)
+    counts = {
+        "prompt_tokens": usage.prompt_tokens,
+        "cached_tokens": (getattr(details, "cached_tokens", None) or 0) if details else 0,
+    }
+    with _stats_lock:
+        _stats["turns"] += 1
+        _stats["prompt_tokens"] += counts["prompt_tokens"]
+        _stats["cached_tokens"] += counts["cached_tokens"]
+    return counts
+
+
+def chat_context_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["cached_ratio"] = (
+        round(stats["cached_tokens"] / stats["prompt_tokens"], 3) if stats["prompt_tokens"] else 0.0
+    )
+    return stats
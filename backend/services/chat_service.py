@@ -1,6 +1,8 @@
 import json
 import logging
-from openai import AsyncOpenAI
+from services.chat_context import build_messages, record_usage
+from services.clients import get_openai_client
+from services.intent_router import route
 
 logger = logging.getLogger(__name__)
 
@@ -20,47 +22,7 @@ SYSTEM_PROMPT = (
 )
 
 
-def _compact_analysis(data: dict) -> dict:
-    """Strip large fields (heatmaps, panels_geojson) to fit context."""
-    if not data:
-        return {}
-    compact = {}
-    for key, val in data.items():
-        if key in ("heatmap_summer", "heatmap_winter", "panels_geojson"):
-            continue
-        if isinstance(val, dict):
-            compact[key] = {
-                k: v
-                for k, v in val.items()
-                if k not in ("heatmap_summer", "heatmap_winter", "panels_geojson")
-            }
-        else:
-            compact[key] = val
-    return compact
-
-
-def _build_messages(
-    message: str, history: list, analysis_data: dict | None
-) -> list:
-    """Build Chat Completions API messages."""
-    system_text = SYSTEM_PROMPT
-    if analysis_data:
-        compact = _compact_analysis(analysis_data)
-        system_text += f"\nCurrent analysis data:\n{json.dumps(compact, default=str)}"
-
-    messages = [{"role": "system", "content": system_text}]
-
-    for entry in history:
-        role = entry.get("role", "user")
-        content = entry.get("content", "")
-        messages.append({"role": role, "content": content})
-
-    messages.append({"role": "user", "content": message})
-
-    return messages
-
-
-def _parse_action(full_text: str) -> tuple[str, dict | None]:
+def parse_action(full_text: str) -> tuple[str, dict | None]:
     """Extract ACTION: JSON from the end of the response."""
     lines = full_text.strip().split("\n")
     action = None
@@ -80,11 +42,27 @@ def _parse_action(full_text: str) -> tuple[str, dict | None]:
 
 
 async def stream_chat_response(
-    message: str, history: list, analysis_data: dict | None = None
+    message: str, history: list, analysis_context: str | None = None
 ):
-    """Async generator yielding SSE-ready dicts: token, done."""
-    client = AsyncOpenAI()
-    messages = _build_messages(message, history, analysis_data)
+    """Async generator yielding SSE-ready dicts: token, done.
+
+    `done` carries `usage`: estimated and billed prompt tokens, cached
+    prompt tokens and how much of the history was summarized, or `routed`
+    when services.intent_router answered without the LLM.
+    """
+    hit = route(message, analysis_context)
+    if hit:
+        yield {"type": "token", "content": hit["text"]}
+        yield {
+            "type": "done",
+            "content": hit["text"],
+            "action": hit["action"],
+            "usage": {"routed": hit["intent"]},
+        }
+        return
+
+    client = get_openai_client()
+    messages, usage = await build_messages(SYSTEM_PROMPT, message, history, analysis_context)
 
     full_text = ""
 
@@ -93,6 +71,7 @@ async def stream_chat_response(
             model=MODEL,
             messages=messages,
             stream=True,
+            stream_options={"include_usage": True},
         )
 
         async for chunk in stream:
@@ -100,9 +79,12 @@ async def stream_chat_response(
             if delta:
                 full_text += delta
                 yield {"type": "token", "content": delta}
+            if chunk.usage:
+                usage.update(record_usage(chunk.usage))
 
-        display_text, action = _parse_action(full_text)
-        yield {"type": "done", "content": display_text, "action": action}
+        logger.info(f"Chat turn usage: {usage}")
+        display_text, action = parse_action(full_text)
+        yield {"type": "done", "content": display_text, "action": action, "usage": usage}
 
     except Exception as e:
         logger.error(f"Chat stream error: {e}")
@@ -113,9 +95,10 @@ async def stream_chat_response(
                 messages=messages,
             )
             text = response.choices[0].message.content or ""
-            display_text, action = _parse_action(text)
+            usage.update(record_usage(response.usage))
+            display_text, action = parse_action(text)
             yield {"type": "token", "content": display_text}
-            yield {"type": "done", "content": display_text, "action": action}
+            yield {"type": "done", "content": display_text, "action": action, "usage": usage}
         except Exception as e2:
             logger.error(f"Chat fallback error: {e2}")
             yield {
@@ -0,0 +1,162 @@
+"""Process-wide HTTP, OpenAI and Gradium clients.
+
+Clients are created on first use (so importing this module stays cheap)
+and closed by the app lifespan through `close_clients()`. Services fetch
+them through the getters below instead of opening their own connections.
+"""
+
+import logging
+import os
+import threading
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("SOLARSITE_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("SOLARSITE_HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY_S = 30.0
+
+_lock = threading.Lock()
+_http_client = None
+_sync_http_client = None
+_openai_client = None
+_gradium_sessions = None
+_request_counts = Counter()
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _limits():
+    import httpx
+
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_S,
+    )
+
+
+def _count_request(name: str):
+    def hook(request):
+        _request_counts[name] += 1
+
+    async def ahook(request):
+        _request_counts[name] += 1
+
+    return hook, ahook
+
+
+def get_http_client():
+    """Shared httpx.AsyncClient with keep-alive (and HTTP/2 when h2 is installed)."""
+    global _http_client
+    if _http_client is None:
+        import httpx
+
+        _, ahook = _count_request("http")
+        _http_client = httpx.AsyncClient(
+            http2=_http2_available(),
+            limits=_limits(),
+            timeout=httpx.Timeout(10.0, connect=5.0),
+            headers={"User-Agent": "SolarSite/1.0"},
+            event_hooks={"request": [ahook]},
+        )
+    return _http_client
+
+
+def get_sync_http_client():
+    """Shared keep-alive httpx.Client for call sites that run in worker threads."""
+    global _sync_http_client
+    if _sync_http_client is None:
+        with _lock:
+            if _sync_http_client is None:
+                import httpx
+
+                hook, _ = _count_request("http_sync")
+                _sync_http_client = httpx.Client(
+                    http2=_http2_available(),
+                    limits=_limits(),
+                    timeout=httpx.Timeout(10.0, connect=5.0),
+                    headers={"User-Agent": "SolarSite/1.0"},
+                    event_hooks={"request": [hook]},
+                )
+    return _sync_http_client
+
+
+def get_openai_client():
+    """Shared AsyncOpenAI client backed by its own pooled HTTP/2 transport."""
+    global _openai_client
+    if _openai_client is None:
+        import httpx
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+        _, ahook = _count_request("openai")
+        _openai_client = AsyncOpenAI(
+            http_client=DefaultAsyncHttpxClient(
+                http2=_http2_available(),
+                limits=_limits(),
+                timeout=httpx.Timeout(600.0, connect=5.0),
+                event_hooks={"request": [ahook]},
+            )
+        )
+    return _openai_client
+
+
+def get_gradium_sessions():
+    """Shared Gradium WebSocket session manager."""
+    global _gradium_sessions
+    if _gradium_sessions is None:
+        from services.gradium_service import GradiumSessions
+
+        _gradium_sessions = GradiumSessions()
+    return _gradium_sessions
+
+
+async def close_clients() -> None:
+    """Close every client that was opened; called on app shutdown."""
+    global _http_client, _sync_http_client, _openai_client, _gradium_sessions
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    if _sync_http_client is not None:
+        _sync_http_client.close()
+        _sync_http_client = None
+    if _openai_client is not None:
+        await _openai_client.close()
+        _openai_client = None
+    if _gradium_sessions is not None:
+        await _gradium_sessions.close()
+        _gradium_sessions = None
+
+
+def _httpx_pool_stats(client) -> dict | None:
+    if client is None:
+        return None
+    # httpcore does not expose pool metrics publicly; read the connection
+    # list defensively so a library upgrade degrades to counts only.
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []) or [])
+    return {
+        "http2": getattr(pool, "_http2", None),
+        "connections": len(connections),
+        "idle_connections": sum(1 for c in connections if c.is_idle()),
+        "max_connections": HTTP_MAX_CONNECTIONS,
+        "max_keepalive_connections": HTTP_MAX_KEEPALIVE,
+    }
+
+
+def pool_stats() -> dict:
+    """Connection-pool metrics for /api/metrics."""
+    openai_http = getattr(_openai_client, "_client", None)
+    return {
+        "http": _httpx_pool_stats(_http_client),
+        "http_sync": _httpx_pool_stats(_sync_http_client),
+        "openai": _httpx_pool_stats(openai_http),
+        "gradium": _gradium_sessions.stats() if _gradium_sessions is not None else None,
+        "requests": dict(_request_counts),
+    }
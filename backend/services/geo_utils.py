@@ -1,18 +1,87 @@
+import asyncio
 import logging
-import httpx
-from timezonefinder import TimezoneFinder
+import os
+import threading
+import time
+from functools import lru_cache
+
+from services.cache import TieredCache
+from services.clients import get_sync_http_client
 
 logger = logging.getLogger(__name__)
 
-_tf = TimezoneFinder()
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org")
+# Nominatim usage policy: at most one request per second.
+NOMINATIM_MIN_INTERVAL_S = float(os.getenv("NOMINATIM_MIN_INTERVAL_S", "1.0"))
+
+# Two decimals is ~1.1 km, well below the city-level zoom we request.
+GEOCODE_PRECISION = 2
+TIMEZONE_PRECISION = 2
+GEOCODE_TTL_S = 30 * 24 * 3600
+
+
+class _RateLimiter:
+    """Spaces calls at least `min_interval_s` apart across threads and tasks."""
+
+    def __init__(self, min_interval_s: float):
+        self.min_interval_s = min_interval_s
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval_s
+            return slot - now
+
+    def wait(self) -> None:
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self) -> None:
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_nominatim_limiter = _RateLimiter(NOMINATIM_MIN_INTERVAL_S)
+
+
+def _quantize(lat: float, lon: float, precision: int) -> str:
+    return f"{lat:.{precision}f},{lon:.{precision}f}"
+
+
+@lru_cache(maxsize=1)
+def _geocode_cache() -> TieredCache:
+    return TieredCache("geocode", ttl_s=GEOCODE_TTL_S)
+
+
+@lru_cache(maxsize=1)
+def _timezone_cache() -> TieredCache:
+    return TieredCache("timezone")
+
+
+@lru_cache(maxsize=1)
+def _timezone_finder():
+    """Build the TimezoneFinder on first use; it loads its polygon index eagerly."""
+    from timezonefinder import TimezoneFinder
+
+    return TimezoneFinder()
 
 
 def lookup_timezone(lat: float, lon: float) -> str:
     """Return IANA timezone string for given coordinates."""
-    tz = _tf.timezone_at(lat=lat, lng=lon)
+    key = _quantize(lat, lon, TIMEZONE_PRECISION)
+    tz = _timezone_cache().get(key)
+    if tz:
+        return tz
+    tz = _timezone_finder().timezone_at(lat=lat, lng=lon)
     if tz is None:
         offset = round(lon / 15)
         tz = f"Etc/GMT{-offset:+d}" if offset != 0 else "UTC"
+    _timezone_cache().set(key, tz)
     return tz
 
 
@@ -28,43 +97,96 @@ def classify_terrain(elevation_m: float) -> str:
         return "highland"
 
 
+def _format_address(data: dict) -> str:
+    addr = data.get("address", {})
+    city = (
+        addr.get("city")
+        or addr.get("town")
+        or addr.get("village")
+        or addr.get("county")
+        or addr.get("state")
+        or ""
+    )
+    country = addr.get("country", "")
+    if city and country:
+        return f"{city}, {country}".upper()
+    if country:
+        return country.upper()
+    return ""
+
+
+def _coordinate_label(lat: float, lon: float) -> str:
+    lat_dir = "N" if lat >= 0 else "S"
+    lon_dir = "E" if lon >= 0 else "W"
+    return f"{abs(lat):.2f}\u00b0{lat_dir} {abs(lon):.2f}\u00b0{lon_dir}"
+
+
+def _nominatim_params(lat: float, lon: float) -> dict:
+    return {
+        "lat": lat,
+        "lon": lon,
+        "format": "json",
+        "zoom": 10,
+        "accept-language": "en",
+    }
+
+
 def reverse_geocode(lat: float, lon: float) -> str:
     """Return 'CITY, COUNTRY' from coordinates via Nominatim.
 
-    Falls back to coordinate-based label on any failure.
+    Results are cached by quantized coordinates. Falls back to a
+    coordinate-based label on any failure.
     """
+    key = _quantize(lat, lon, GEOCODE_PRECISION)
+    cached = _geocode_cache().get(key)
+    if cached:
+        return cached
     try:
-        resp = httpx.get(
-            "https://nominatim.openstreetmap.org/reverse",
-            params={
-                "lat": lat,
-                "lon": lon,
-                "format": "json",
-                "zoom": 10,
-                "accept-language": "en",
-            },
+        _nominatim_limiter.wait()
+        resp = get_sync_http_client().get(
+            f"{NOMINATIM_URL}/reverse",
+            params=_nominatim_params(lat, lon),
             headers={"User-Agent": "SolarSite/1.0"},
             timeout=5,
         )
         resp.raise_for_status()
-        data = resp.json()
-        addr = data.get("address", {})
-        city = (
-            addr.get("city")
-            or addr.get("town")
-            or addr.get("village")
-            or addr.get("county")
-            or addr.get("state")
-            or ""
-        )
-        country = addr.get("country", "")
-        if city and country:
-            return f"{city}, {country}".upper()
-        if country:
-            return country.upper()
+        label = _format_address(resp.json())
+        if label:
+            _geocode_cache().set(key, label)
+            return label
     except Exception as e:
         logger.debug(f"reverse_geocode failed: {e}")
-    # Fallback
-    lat_dir = "N" if lat >= 0 else "S"
-    lon_dir = "E" if lon >= 0 else "W"
-    return f"{abs(lat):.2f}\u00b0{lat_dir} {abs(lon):.2f}\u00b0{lon_dir}"
+    return _coordinate_label(lat, lon)
+
+
+async def reverse_geocode_async(lat: float, lon: float) -> str:
+    """Non-blocking reverse_geocode sharing the same cache and rate limit."""
+    from services.clients import get_http_client
+
+    key = _quantize(lat, lon, GEOCODE_PRECISION)
+    cached = await _geocode_cache().aget(key)
+    if cached:
+        return cached
+    try:
+        await _nominatim_limiter.wait_async()
+        resp = await get_http_client().get(
+            f"{NOMINATIM_URL}/reverse",
+            params=_nominatim_params(lat, lon),
+            headers={"User-Agent": "SolarSite/1.0"},
+            timeout=5,
+        )
+        resp.raise_for_status()
+        label = _format_address(resp.json())
+        if label:
+            await _geocode_cache().aset(key, label)
+            return label
+    except Exception as e:
+        logger.debug(f"reverse_geocode_async failed: {e}")
+    return _coordinate_label(lat, lon)
+
+
+def geo_cache_stats() -> dict:
+    return {
+        "geocode": _geocode_cache().stats(),
+        "timezone": _timezone_cache().stats(),
+    }
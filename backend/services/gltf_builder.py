@@ -0,0 +1,334 @@
+"""Procedural GLB of a computed panel layout, built locally in milliseconds.
+
+The scene uses local metres centred on the zone centroid (the frame
+generate_panel_layout works in), mapped to glTF's Y-up axes: +X east,
++Y up, -Z north. It holds:
+
+- one module mesh drawn once per panel through EXT_mesh_gpu_instancing
+  (a translation and a tilt/azimuth rotation per instance);
+- a terrain mesh triangulated from the zone polygon, optionally textured
+  with a seasonal irradiance heatmap.
+
+Viewers without the instancing extension show a single module, so the
+extension is listed as used rather than required.
+"""
+
+import json
+import struct
+import zlib
+
+import numpy as np
+
+# Frameless module: glass-and-cell slab thickness.
+MODULE_THICKNESS_M = 0.04
+# Height of the lower module edge above the ground.
+GROUND_CLEARANCE_M = 0.5
+
+_FLOAT, _UINT16, _UINT32 = 5126, 5123, 5125
+_ARRAY_BUFFER, _ELEMENT_ARRAY_BUFFER = 34962, 34963
+_TYPES = {1: "SCALAR", 2: "VEC2", 3: "VEC3", 4: "VEC4"}
+
+
+class _GLBWriter:
+    """Accumulates binary data, buffer views and accessors for one GLB."""
+
+    def __init__(self):
+        self.gltf = {
+            "asset": {"version": "2.0", "generator": "SolarSite procedural layout"},
+            "buffers": [],
+            "bufferViews": [],
+            "accessors": [],
+        }
+        self._blob = bytearray()
+
+    def _view(self, data: bytes, target: int | None = None) -> int:
+        self._blob += b"\0" * (-len(self._blob) % 4)
+        view = {"buffer": 0, "byteOffset": len(self._blob), "byteLength": len(data)}
+        if target is not None:
+            view["target"] = target
+        self._blob += data
+        self.gltf["bufferViews"].append(view)
+        return len(self.gltf["bufferViews"]) - 1
+
+    def accessor(self, array: np.ndarray, target: int | None = None, bounds: bool = False) -> int:
+        array = np.ascontiguousarray(array)
+        component = {np.float32: _FLOAT, np.uint16: _UINT16, np.uint32: _UINT32}[array.dtype.type]
+        width = array.shape[1] if array.ndim == 2 else 1
+        accessor = {
+            "bufferView": self._view(array.tobytes(), target),
+            "componentType": component,
+            "count": len(array),
+            "type": _TYPES[width],
+        }
+        if bounds:
+            accessor["min"] = array.min(axis=0).tolist()
+            accessor["max"] = array.max(axis=0).tolist()
+        self.gltf["accessors"].append(accessor)
+        return len(self.gltf["accessors"]) - 1
+
+    def image(self, png: bytes) -> int:
+        self.gltf.setdefault("images", []).append(
+            {"bufferView": self._view(png), "mimeType": "image/png"}
+        )
+        return len(self.gltf["images"]) - 1
+
+    def add(self, kind: str, item: dict) -> int:
+        self.gltf.setdefault(kind, []).append(item)
+        return len(self.gltf[kind]) - 1
+
+    def to_bytes(self) -> bytes:
+        self._blob += b"\0" * (-len(self._blob) % 4)
+        self.gltf["buffers"] = [{"byteLength": len(self._blob)}]
+        payload = json.dumps(self.gltf, separators=(",", ":")).encode("utf-8")
+        payload += b" " * (-len(payload) % 4)
+        total = 12 + 8 + len(payload) + 8 + len(self._blob)
+        return b"".join(
+            [
+                struct.pack("<4sII", b"glTF", 2, total),
+                struct.pack("<I4s", len(payload), b"JSON"),
+                payload,
+                struct.pack("<I4s", len(self._blob), b"BIN\0"),
+                bytes(self._blob),
+            ]
+        )
+
+
+def _box(width: float, height: float, depth: float):
+    """Positions, normals and indices of an axis-aligned box centred on the origin."""
+    half = np.array([width, height, depth], dtype=np.float32) / 2
+    positions, normals, indices = [], [], []
+    for axis in range(3):
+        for sign in (1.0, -1.0):
+            normal = np.zeros(3, dtype=np.float32)
+            normal[axis] = sign
+            u, v = [a for a in range(3) if a != axis]
+            base = len(positions)
+            for du, dv in ((-1, -1), (1, -1), (1, 1), (-1, 1)):
+                corner = np.zeros(3, dtype=np.float32)
+                corner[axis] = sign * half[axis]
+                corner[u] = du * half[u]
+                corner[v] = dv * half[v]
+                positions.append(corner)
+                normals.append(normal)
+            # Counter-clockwise seen from outside the face.
+            quad = [0, 1, 2, 0, 2, 3] if (sign > 0) == ((axis + 1) % 3 == u) else [0, 2, 1, 0, 3, 2]
+            indices += [base + i for i in quad]
+    return (
+        np.array(positions, dtype=np.float32),
+        np.array(normals, dtype=np.float32),
+        np.array(indices, dtype=np.uint16),
+    )
+
+
+def _quaternion(axis, angle_rad: float) -> np.ndarray:
+    axis = np.asarray(axis, dtype=np.float64)
+    return np.array([*(axis * np.sin(angle_rad / 2)), np.cos(angle_rad / 2)])
+
+
+def _quat_multiply(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    ax, ay, az, aw = a
+    bx, by, bz, bw = b
+    return np.array(
+        [
+            aw * bx + ax * bw + ay * bz - az * by,
+            aw * by - ax * bz + ay * bw + az * bx,
+            aw * bz + ax * by - ay * bx + az * bw,
+            aw * bw - ax * bx - ay * by - az * bz,
+        ]
+    )
+
+
+def _png(rgba: np.ndarray) -> bytes:
+    """Minimal RGBA8 PNG encoder."""
+    height, width, _ = rgba.shape
+    raw = b"".join(b"\0" + rgba[row].tobytes() for row in range(height))
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return b"".join(
+        [b"\x89PNG\r\n\x1a\n", chunk(b"IHDR", header), chunk(b"IDAT", zlib.compress(raw, 6)), chunk(b"IEND", b"")]
+    )
+
+
+def heatmap_png(grid) -> bytes:
+    """Blue-to-red colour map of a heatmap grid (rows south to north); NaN is transparent."""
+    values = np.asarray(grid, dtype=np.float64)[::-1]  # image rows run north to south
+    valid = np.isfinite(values)
+    lo, hi = (np.nanmin(values), np.nanmax(values)) if valid.any() else (0.0, 1.0)
+    t = np.where(valid, (values - lo) / (hi - lo) if hi > lo else 0.5, 0.0)
+    stops = np.array([[49, 54, 149], [116, 173, 209], [254, 224, 144], [244, 109, 67], [165, 0, 38]])
+    position = t * (len(stops) - 1)
+    low = np.clip(np.floor(position).astype(int), 0, len(stops) - 2)
+    frac = (position - low)[..., None]
+    rgb = stops[low] * (1 - frac) + stops[low + 1] * frac
+    alpha = np.where(valid, 255, 0)[..., None]
+    return _png(np.concatenate([rgb, alpha], axis=-1).astype(np.uint8))
+
+
+def _terrain(polygon_m):
+    """Triangles of the zone polygon (Delaunay, kept where they fall inside it)."""
+    from shapely.ops import triangulate
+
+    triangles = [t for t in triangulate(polygon_m) if polygon_m.contains(t.representative_point())]
+    coords = np.array([t.exterior.coords[:3] for t in triangles], dtype=np.float64).reshape(-1, 2)
+    # Keep counter-clockwise winding seen from above (+Y) after mapping north to -Z.
+    tri = coords.reshape(-1, 3, 2)
+    cross = (tri[:, 1, 0] - tri[:, 0, 0]) * (tri[:, 2, 1] - tri[:, 0, 1]) - (
+        tri[:, 1, 1] - tri[:, 0, 1]
+    ) * (tri[:, 2, 0] - tri[:, 0, 0])
+    tri[cross < 0] = tri[cross < 0][:, ::-1]
+    return tri.reshape(-1, 2)
+
+
+def build_layout_glb(
+    layout: dict,
+    zone_coordinates,
+    latitude: float,
+    panel_tilt_deg: float = 25.0,
+    panel_azimuth_deg: float = 180.0,
+    module_width_m: float = 1.134,
+    module_height_m: float = 2.278,
+    heatmap: dict | None = None,
+) -> bytes:
+    """GLB bytes for a generate_panel_layout result on its zone.
+
+    `heatmap` is one season of generate_seasonal_heatmaps output (with the
+    shared `bounds`) and becomes the terrain texture.
+    """
+    from shapely.geometry import Polygon
+
+    lat_scale = 111320
+    lon_scale = 111320 * np.cos(np.radians(latitude))
+    zone = Polygon(zone_coordinates)
+    cx, cy = zone.centroid.x, zone.centroid.y
+
+    def to_local(lon, lat):
+        return (np.asarray(lon) - cx) * lon_scale, (np.asarray(lat) - cy) * lat_scale
+
+    glb = _GLBWriter()
+    nodes = []
+
+    # Terrain.
+    ring_x, ring_y = to_local(*np.array(zone.exterior.coords).T)
+    terrain_xy = _terrain(Polygon(np.column_stack([ring_x, ring_y])))
+    terrain_pos = np.column_stack(
+        [terrain_xy[:, 0], np.zeros(len(terrain_xy)), -terrain_xy[:, 1]]
+    ).astype(np.float32)
+    terrain_normals = np.tile(np.array([0, 1, 0], dtype=np.float32), (len(terrain_pos), 1))
+    terrain_attrs = {
+        "POSITION": glb.accessor(terrain_pos, _ARRAY_BUFFER, bounds=True),
+        "NORMAL": glb.accessor(terrain_normals, _ARRAY_BUFFER),
+    }
+    terrain_material = {
+        "name": "terrain",
+        "pbrMetallicRoughness": {
+            "baseColorFactor": [0.76, 0.66, 0.48, 1.0],
+            "metallicFactor": 0.0,
+            "roughnessFactor": 1.0,
+        },
+        "doubleSided": True,
+    }
+    if heatmap is not None:
+        b = heatmap["bounds"]
+        west, south = to_local(b["west"], b["south"])
+        east, north = to_local(b["east"], b["north"])
+        uv = np.column_stack(
+            [
+                (terrain_xy[:, 0] - west) / max(east - west, 1e-9),
+                (north - terrain_xy[:, 1]) / max(north - south, 1e-9),
+            ]
+        ).astype(np.float32)
+        terrain_attrs["TEXCOORD_0"] = glb.accessor(uv, _ARRAY_BUFFER)
+        image = glb.image(heatmap_png(heatmap["grid"]))
+        sampler = glb.add("samplers", {"magFilter": 9728, "minFilter": 9728, "wrapS": 33071, "wrapT": 33071})
+        texture = glb.add("textures", {"source": image, "sampler": sampler})
+        terrain_material["pbrMetallicRoughness"]["baseColorTexture"] = {"index": texture}
+        terrain_material["pbrMetallicRoughness"]["baseColorFactor"] = [1.0, 1.0, 1.0, 1.0]
+        terrain_material["alphaMode"] = "MASK"
+    terrain_mesh = glb.add(
+        "meshes",
+        {
+            "name": "terrain",
+            "primitives": [
+                {
+                    "attributes": terrain_attrs,
+                    "indices": glb.accessor(
+                        np.arange(len(terrain_pos), dtype=np.uint32), _ELEMENT_ARRAY_BUFFER
+                    ),
+                    "material": glb.add("materials", terrain_material),
+                }
+            ],
+        },
+    )
+    nodes.append(glb.add("nodes", {"name": "terrain", "mesh": terrain_mesh}))
+
+    # Panels: one module mesh, one instance per panel.
+    features = layout.get("features", [])
+    if features:
+        # Modules are rectangles, so the centre is the midpoint of a diagonal.
+        rings = [f["geometry"]["coordinates"][0] for f in features]
+        corner_a = np.array([ring[0] for ring in rings], dtype=np.float64)
+        corner_c = np.array([ring[2] for ring in rings], dtype=np.float64)
+        px, py = to_local(*((corner_a + corner_c) / 2).T)
+        tilt = np.radians(panel_tilt_deg)
+        lift = GROUND_CLEARANCE_M + module_height_m / 2 * np.sin(tilt)
+        translations = np.column_stack([px, np.full(len(px), lift), -py]).astype(np.float32)
+
+        # Tilt about east-west (raising the north edge), then turn by the azimuth.
+        rotation = _quat_multiply(
+            _quaternion([0, 1, 0], np.radians(180 - panel_azimuth_deg)),
+            _quaternion([1, 0, 0], tilt),
+        ).astype(np.float32)
+        rotations = np.tile(rotation, (len(px), 1))
+
+        positions, normals, indices = _box(module_width_m, MODULE_THICKNESS_M, module_height_m)
+        module_mesh = glb.add(
+            "meshes",
+            {
+                "name": "pv_module",
+                "primitives": [
+                    {
+                        "attributes": {
+                            "POSITION": glb.accessor(positions, _ARRAY_BUFFER, bounds=True),
+                            "NORMAL": glb.accessor(normals, _ARRAY_BUFFER),
+                        },
+                        "indices": glb.accessor(indices, _ELEMENT_ARRAY_BUFFER),
+                        "material": glb.add(
+                            "materials",
+                            {
+                                "name": "pv_glass",
+                                "pbrMetallicRoughness": {
+                                    "baseColorFactor": [0.05, 0.09, 0.2, 1.0],
+                                    "metallicFactor": 0.4,
+                                    "roughnessFactor": 0.25,
+                                },
+                            },
+                        ),
+                    }
+                ],
+            },
+        )
+        nodes.append(
+            glb.add(
+                "nodes",
+                {
+                    "name": "panels",
+                    "mesh": module_mesh,
+                    "extensions": {
+                        "EXT_mesh_gpu_instancing": {
+                            "attributes": {
+                                "TRANSLATION": glb.accessor(translations),
+                                "ROTATION": glb.accessor(rotations),
+                            }
+                        }
+                    },
+                },
+            )
+        )
+        glb.gltf["extensionsUsed"] = ["EXT_mesh_gpu_instancing"]
+
+    glb.gltf["scenes"] = [{"nodes": nodes}]
+    glb.gltf["scene"] = 0
+    return glb.to_bytes()
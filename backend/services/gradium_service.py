@@ -1,61 +1,181 @@
 import asyncio
 import base64
 import json
+import logging
+import os
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
 import websockets
 
+from services.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
 GRADIUM_STT_ENDPOINT = "wss://eu.api.gradium.ai/api/speech/asr"
 GRADIUM_TTS_ENDPOINT = "wss://eu.api.gradium.ai/api/speech/tts"
 
+# How long to wait for trailing transcripts after the last audio chunk.
+STT_DRAIN_TIMEOUT_S = 2.0
+# Gradium's "pcm" output: 16-bit little-endian mono at this rate.
+TTS_SAMPLE_RATE = 48000
+# Synthesized phrases kept in memory, bounded by total audio bytes. Only
+# short texts (confirmations, acknowledgements) are worth caching.
+TTS_CACHE_BYTES = int(float(os.getenv("SOLARSITE_TTS_CACHE_MB", "16")) * 1024 * 1024)
+TTS_CACHE_MAX_CHARS = 200
+
+
+class GradiumSessions:
+    """Opens Gradium WebSocket sessions and closes whatever is open on shutdown.
+
+    Each session is its own connection: Gradium does not document serving
+    more than one STT stream or TTS request per socket, so none are reused.
+    """
+
+    def __init__(self):
+        self._active = set()
+        self._opened = 0
+
+    @asynccontextmanager
+    async def session(self, endpoint: str, api_key: str, setup: dict):
+        """Yield a websocket with the setup message already sent."""
+        ws = await websockets.connect(endpoint, extra_headers={"x-api-key": api_key})
+        self._opened += 1
+        self._active.add(ws)
+        try:
+            await ws.send(json.dumps(setup))
+            yield ws
+        finally:
+            self._active.discard(ws)
+            await ws.close()
+
+    async def close(self) -> None:
+        for ws in list(self._active):
+            await ws.close()
+        self._active.clear()
+
+    def stats(self) -> dict:
+        return {"opened": self._opened, "active": len(self._active)}
+
 
 async def transcribe_audio_stream(api_key: str, audio_chunks):
-    async with websockets.connect(
-        GRADIUM_STT_ENDPOINT,
-        extra_headers={"x-api-key": api_key},
-    ) as ws:
-        setup = json.dumps(
-            {
-                "type": "setup",
-                "model_name": "default",
-                "input_format": "pcm",
-            }
-        )
-        await ws.send(setup)
-
-        async for chunk in audio_chunks:
-            await ws.send(json.dumps({"type": "audio", "audio": chunk}))
-            try:
-                response = await asyncio.wait_for(ws.recv(), timeout=0.05)
-                msg = json.loads(response)
+    """Yield transcripts from one STT stream fed by `audio_chunks`.
+
+    Audio is sent from a separate task, so transcripts are yielded as soon
+    as the server produces them rather than only between chunks. When
+    `audio_chunks` ends, the stream is closed with end_of_stream and the
+    remaining transcripts are drained for up to STT_DRAIN_TIMEOUT_S.
+    """
+    from services.clients import get_gradium_sessions
+
+    setup = {
+        "type": "setup",
+        "model_name": "default",
+        "input_format": "pcm",
+    }
+    async with get_gradium_sessions().session(GRADIUM_STT_ENDPOINT, api_key, setup) as ws:
+
+        async def send_audio():
+            async for chunk in audio_chunks:
+                await ws.send(json.dumps({"type": "audio", "audio": chunk}))
+            await ws.send(json.dumps({"type": "end_of_stream"}))
+
+        sender = asyncio.create_task(send_audio())
+        recv = None
+        try:
+            while True:
+                recv = asyncio.ensure_future(ws.recv())
+                done, _ = await asyncio.wait(
+                    {recv, sender}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if recv not in done:
+                    sender.result()  # surface send errors
+                    try:
+                        await asyncio.wait_for(asyncio.shield(recv), STT_DRAIN_TIMEOUT_S)
+                    except asyncio.TimeoutError:
+                        break
+                try:
+                    msg = json.loads(recv.result())
+                except websockets.ConnectionClosedOK:
+                    break
                 if msg.get("type") == "text":
                     yield msg["text"]
-            except asyncio.TimeoutError:
-                continue
-
-
-async def synthesize_speech(
-    api_key: str, text: str, voice_id: str = None
-) -> bytes:
-    audio_chunks = []
-    async with websockets.connect(
-        GRADIUM_TTS_ENDPOINT,
-        extra_headers={"x-api-key": api_key},
-    ) as ws:
-        setup = {
-            "type": "setup",
-            "model_name": "default",
-            "output_format": "wav",
-        }
-        if voice_id:
-            setup["voice_id"] = voice_id
-        await ws.send(json.dumps(setup))
-
-        await ws.send(json.dumps({"type": "text", "text": text}))
-
-        async for message in ws:
-            msg = json.loads(message)
-            if msg.get("type") == "audio":
-                audio_chunks.append(base64.b64decode(msg["audio"]))
-            if msg.get("type") == "done":
-                break
-
-    return b"".join(audio_chunks)
+                elif msg.get("type") == "end_of_stream":
+                    break
+                elif msg.get("type") == "error":
+                    logger.error(f"Gradium STT error: {msg}")
+                    break
+        finally:
+            for task in (sender, recv):
+                if task is not None and not task.done():
+                    task.cancel()
+
+
+@lru_cache(maxsize=1)
+def _phrase_cache() -> LRUCache:
+    return LRUCache(
+        maxsize=4096,
+        max_bytes=TTS_CACHE_BYTES,
+        sizeof=lambda chunks: sum(len(c) for c in chunks),
+    )
+
+
+def tts_cache_stats() -> dict:
+    return _phrase_cache().stats()
+
+
+def _tts_setup(output_format: str, voice_id: str = None) -> dict:
+    setup = {
+        "type": "setup",
+        "model_name": "default",
+        "output_format": output_format,
+    }
+    if voice_id:
+        setup["voice_id"] = voice_id
+    return setup
+
+
+async def _stream_on(ws, text: str):
+    """Yield decoded audio chunks for `text` as the server sends them."""
+    await ws.send(json.dumps({"type": "text", "text": text}))
+
+    while True:
+        msg = json.loads(await ws.recv())
+        if msg.get("type") == "audio":
+            yield base64.b64decode(msg["audio"])
+        if msg.get("type") == "done":
+            return
+
+
+async def synthesize_speech_stream(api_key: str, text: str, voice_id: str = None):
+    """Yield raw PCM chunks (16-bit mono, TTS_SAMPLE_RATE Hz) as they are synthesized."""
+    async for chunk in _synthesize_cached(api_key, text, voice_id, "pcm"):
+        yield chunk
+
+
+async def _synthesize_cached(api_key: str, text: str, voice_id: str, output_format: str):
+    """Serve short phrases from the phrase cache, else synthesize and remember them."""
+    cacheable = len(text) <= TTS_CACHE_MAX_CHARS
+    key = (text, voice_id, output_format)
+    cached = _phrase_cache().get(key) if cacheable else None
+    if cached is not None:
+        for chunk in cached:
+            yield chunk
+        return
+
+    chunks = []
+    async for chunk in _synthesize(api_key, text, voice_id, output_format):
+        chunks.append(chunk)
+        yield chunk
+    if cacheable and chunks:
+        _phrase_cache().set(key, tuple(chunks))
+
+
+async def _synthesize(api_key: str, text: str, voice_id: str, output_format: str):
+    """Stream one synthesis over its own connection."""
+    from services.clients import get_gradium_sessions
+
+    setup = _tts_setup(output_format, voice_id)
+    async with get_gradium_sessions().session(GRADIUM_TTS_ENDPOINT, api_key, setup) as ws:
+        async for chunk in _stream_on(ws, text):
+            yield chunk
@@ -25,11 +25,12 @@ def generate_seasonal_heatmaps(
     else:
         summer_months, winter_months = [12, 1, 2], [6, 7, 8]
 
-    pvgis_summer = pvgis_data[pvgis_data.index.month.isin(summer_months)]
-    pvgis_winter = pvgis_data[pvgis_data.index.month.isin(winter_months)]
+    ghi = pvgis_data["ghi"]
+    ghi_summer = ghi[ghi.index.month.isin(summer_months)]
+    ghi_winter = ghi[ghi.index.month.isin(winter_months)]
 
-    summer_avg_ghi = pvgis_summer["ghi"].mean() if len(pvgis_summer) > 0 else 0
-    winter_avg_ghi = pvgis_winter["ghi"].mean() if len(pvgis_winter) > 0 else 0
+    summer_avg_ghi = ghi_summer.mean() if len(ghi_summer) > 0 else 0
+    winter_avg_ghi = ghi_winter.mean() if len(ghi_winter) > 0 else 0
 
     summer_grid = np.full((ny, nx), summer_avg_ghi)
     winter_grid = np.full((ny, nx), winter_avg_ghi)
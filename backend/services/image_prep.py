@@ -0,0 +1,180 @@
+"""Image preprocessing for the vision and image-edit endpoints.
+
+Uploads (map screenshots, terrain photos) are decoded once, downscaled to
+the resolution the models actually use and re-encoded as JPEG or WebP under
+a byte target, so requests carry and bill for a fraction of the pixels.
+Terrain analyses are cached by a perceptual hash of the image plus the
+site coordinates, so a re-encoded or resized copy of the same view at the
+same place reuses the earlier answer.
+"""
+
+import base64
+import hashlib
+import io
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+
+from services.cache import TieredCache
+
+logger = logging.getLogger(__name__)
+
+# OpenAI vision fits images to 768 px on the short side and the edit
+# endpoint renders at 1024x1024, so larger inputs only cost upload and tokens.
+IMAGE_MAX_PX = int(os.getenv("SOLARSITE_IMAGE_MAX_PX", "1024"))
+IMAGE_FORMAT = os.getenv("SOLARSITE_IMAGE_FORMAT", "JPEG").upper()
+IMAGE_TARGET_BYTES = int(os.getenv("SOLARSITE_IMAGE_TARGET_KB", "200")) * 1024
+# Tried in order until the encoded image fits the target.
+_QUALITIES = (85, 75, 65, 55)
+_MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+
+TERRAIN_CACHE_SIZE = int(os.getenv("SOLARSITE_TERRAIN_CACHE_SIZE", "512"))
+TERRAIN_CACHE_TTL_S = 30 * 24 * 3600
+
+_stats_lock = threading.Lock()
+_stats = {"images": 0, "bytes_in": 0, "bytes_out": 0}
+
+
+@dataclass(frozen=True)
+class PreparedImage:
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+    content_hash: str  # of the downscaled pixels, stable across re-encodes
+    phash: str  # 64-bit difference hash, tolerant of resizing and compression
+
+    def b64(self) -> str:
+        return base64.b64encode(self.data).decode("ascii")
+
+    def data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{self.b64()}"
+
+
+@lru_cache(maxsize=1)
+def _pil():
+    try:
+        from PIL import Image
+
+        return Image
+    except ImportError:
+        logger.warning("Pillow not installed, images are forwarded without downscaling")
+        return None
+
+
+def decode_base64_image(value: str) -> bytes:
+    """Bytes of a base64 image, with or without a data: URL prefix."""
+    if value.startswith("data:"):
+        value = value.split(",", 1)[1]
+    return base64.b64decode(value)
+
+
+def _sniff_mime(data: bytes) -> str:
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/jpeg"
+
+
+def _difference_hash(img) -> str:
+    """dHash: sign of horizontal gradients on a 9x8 grayscale thumbnail."""
+    Image = _pil()
+    small = img.convert("L").resize((9, 8), Image.Resampling.BILINEAR)
+    px = small.tobytes()
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (px[row * 9 + col] > px[row * 9 + col + 1])
+    return f"{bits:016x}"
+
+
+def _record(bytes_in: int, bytes_out: int) -> None:
+    with _stats_lock:
+        _stats["images"] += 1
+        _stats["bytes_in"] += bytes_in
+        _stats["bytes_out"] += bytes_out
+
+
+def prepare_image(
+    data: bytes,
+    max_px: int = IMAGE_MAX_PX,
+    fmt: str = IMAGE_FORMAT,
+    target_bytes: int = IMAGE_TARGET_BYTES,
+) -> PreparedImage:
+    """Downscale `data` to fit `max_px` and re-encode it under `target_bytes`.
+
+    Raises ValueError if the bytes are not a decodable image.
+    """
+    Image = _pil()
+    if Image is None:
+        digest = hashlib.sha256(data).hexdigest()[:32]
+        _record(len(data), len(data))
+        return PreparedImage(data, _sniff_mime(data), 0, 0, digest, digest)
+
+    try:
+        img = Image.open(io.BytesIO(data))
+        # JPEG sources decode straight at a reduced scale.
+        img.draft("RGB", (max_px, max_px))
+        img.load()
+    except Exception as e:
+        raise ValueError(f"Unreadable image: {e}") from e
+    # Re-encoding drops the EXIF orientation tag, so apply it to the pixels
+    # (phone photos are often stored sideways with orientation=6).
+    from PIL import ImageOps
+
+    img = ImageOps.exif_transpose(img)
+
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel("A"))
+        img = background
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+    img.thumbnail((max_px, max_px), Image.Resampling.LANCZOS)
+
+    encoded = b""
+    for quality in _QUALITIES:
+        buf = io.BytesIO()
+        img.save(buf, format=fmt, quality=quality)
+        encoded = buf.getvalue()
+        if len(encoded) <= target_bytes:
+            break
+
+    _record(len(data), len(encoded))
+    return PreparedImage(
+        data=encoded,
+        mime_type=_MIME_TYPES.get(fmt, "application/octet-stream"),
+        width=img.width,
+        height=img.height,
+        content_hash=hashlib.sha256(img.tobytes()).hexdigest()[:32],
+        phash=_difference_hash(img),
+    )
+
+
+@lru_cache(maxsize=1)
+def _terrain_cache() -> TieredCache:
+    return TieredCache("terrain_analysis", maxsize=TERRAIN_CACHE_SIZE, ttl_s=TERRAIN_CACHE_TTL_S)
+
+
+async def cached_terrain_analysis(image: PreparedImage, lat: float, lon: float) -> dict:
+    """analyze_terrain_image for `image`, reusing the result for the same view and site."""
+    from services.openai_service import analyze_terrain_image
+
+    key = f"{image.phash}:{lat:.5f}:{lon:.5f}"
+    cached = _terrain_cache().get(key)
+    if cached is not None:
+        return cached
+    result = await analyze_terrain_image(image.data, lat, lon, image.mime_type)
+    _terrain_cache().set(key, result)
+    return result
+
+
+def image_prep_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["reduction"] = round(1 - stats["bytes_out"] / stats["bytes_in"], 3) if stats["bytes_in"] else 0.0
+    return {"images": stats, "terrain_analysis": _terrain_cache().stats()}
@@ -0,0 +1,246 @@
+"""Deterministic fast path for simple chat and voice requests.
+
+Lookups such as "what's the LCOE?" or "how many panels?" and UI commands
+such as "show the heatmap" are answered from templates over the analysis
+context, without an LLM round-trip. Anything open-ended (why/how/compare,
+several KPIs at once, long questions) returns None and goes to the LLM.
+
+A KPI template only answers when the whole question is a plain lookup of
+that KPI. Qualified questions ("yield in July", "yield per panel",
+"capacity factor", "what does PR mean") ask for something the templates
+do not hold, and they go to the LLM too. Commands likewise only run when
+the whole message is a short imperative, and only if the caller's client
+can carry the action out (CHAT_ACTIONS, VOICE_ACTIONS).
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+ROUTER_ENABLED = os.getenv("SOLARSITE_INTENT_ROUTER", "1").lower() in ("1", "true", "yes")
+# Longer messages are rarely plain lookups.
+MAX_WORDS = 14
+
+_OPEN_ENDED = re.compile(
+    r"\b(why|explain|compare|compared|versus|vs|should|could|would|improve|increase|"
+    r"reduce|optimi[sz]e|better|worse|good|bad|enough|what if|how can|how do|how does|"
+    r"recommend|suggest|instead|change)\b"
+)
+
+# Qualifiers that turn a KPI lookup into a different question. Only checked
+# on the KPI path, since commands legitimately say "set the time at 14:00".
+_QUALIFIED = re.compile(
+    r"\b(january|february|march|april|may|june|july|august|september|october|november|"
+    r"december|jan|feb|mar|apr|jun|jul|aug|sept?|oct|nov|dec|summer|winter|spring|autumn|"
+    r"fall|season(al|s)?|month(ly|s)?|daily|day|hourly|hour|weekly|week|per|peak|max(imum)?|"
+    r"min(imum)?|factor|mean|means|meaning|define|definition|map|chart|graph)\b"
+    r"|\bat \d|\d{1,2}(:\d{2})? ?(am|pm|h)\b"
+)
+
+# A KPI question is "<lead> <kpi> <tail>" and nothing else.
+_LEAD = (
+    r"(?:(?:so|and|ok|okay|hey|please)\s+)*"
+    r"(?:(?:what(?:'s| is| are| was)?|tell me|give me|show me|remind me of)\s+)?"
+    r"(?:(?:the|our|my|its|this)\s+)?"
+)
+_TAIL = (
+    r"(?:\s+(?:is|are|is there|are there|do we have|does it have|"
+    r"of (?:the|this|my|our) (?:site|plant|project|system|installation|layout|zone)))?"
+    r"(?:\s+(?:please|again|now))?\s*[.]*"
+)
+
+# Commands are "<lead> <imperative> <tail>" and nothing else, so negations
+# ("don't show the heatmap"), questions and extra parameters ("rerun the
+# analysis with 4 m spacing") go to the LLM.
+_CMD_LEAD = r"(?:(?:so|and|ok|okay|hey|now|please)\s+)*"
+_CMD_TAIL = r"(?:\s+(?:please|now|again))?"
+_ZOOM_TARGETS = {"panel": "panels"}
+_TIME_TARGET = r"(?:\s+the\s+(?:time|sun|clock|hour))?\s+(?:to|at)\s+"
+
+# (intent, pattern, action builder)
+_ACTIONS = (
+    (
+        "toggle_heatmap",
+        r"(?:show|hide|toggle|display|open|close|turn on|turn off|switch on|switch off)"
+        r"(?:\s+the)?(?:\s+(?:shading|shadow))?\s+heat ?maps?"
+        r"|(?:turn|switch)(?:\s+the)?(?:\s+(?:shading|shadow))?\s+heat ?maps?\s+(?:on|off)",
+        lambda m: {"action": "toggle_heatmap"},
+    ),
+    (
+        "show_report",
+        r"(?:show|open|display|view)(?:\s+me)?(?:\s+the)?(?:\s+(?:full|pdf|site))?\s+report",
+        lambda m: {"action": "show_report"},
+    ),
+    (
+        "run_analysis",
+        r"(?:run|start|launch|redo|rerun|re-run)(?:\s+(?:the|an|a))?(?:\s+(?:solar|new|site))?"
+        r"\s+analys(?:is|e)",
+        lambda m: {"action": "run_analysis"},
+    ),
+    (
+        "set_time",
+        r"(?:set|move|change|jump|go)" + _TIME_TARGET
+        + r"(?P<hour>\d{1,2})(?::(?P<minute>\d{2}))?\s*(?P<ampm>am|pm|h|o'?clock)?",
+        lambda m: _time_action(m),
+    ),
+    (
+        "set_time",
+        r"(?:set|move|change|jump|go)" + _TIME_TARGET + r"(?P<word>noon|midday|midnight)",
+        lambda m: {"action": "set_time", "hour": 0 if m["word"] == "midnight" else 12, "minute": 0},
+    ),
+    (
+        "zoom_to",
+        r"zoom(?:\s+(?:in|out))?\s+(?:to|on|onto)(?:\s+the)?\s+(?P<target>site|panels?|zone|area|map)",
+        lambda m: {"action": "zoom_to", "target": _ZOOM_TARGETS.get(m["target"], m["target"])},
+    ),
+)
+_ACTION_PATTERNS = tuple(
+    (intent, re.compile(_CMD_LEAD + f"(?:{p})" + _CMD_TAIL), build) for intent, p, build in _ACTIONS
+)
+# Actions each client can carry out, matching what its LLM prompt offers.
+CHAT_ACTIONS = frozenset({"run_analysis", "toggle_heatmap", "show_report"})
+VOICE_ACTIONS = frozenset({"set_time", "zoom_to", "toggle_heatmap", "show_report"})
+
+_ACTION_REPLIES = {
+    "toggle_heatmap": "Toggling the shading heatmap.",
+    "show_report": "Opening the report.",
+    "run_analysis": "Starting the solar analysis.",
+    "set_time": "Moving the sun to {hour:02d}:{minute:02d}.",
+    "zoom_to": "Zooming to the {target}.",
+}
+
+# (intent, pattern, path into the compact analysis, template), most specific first.
+_KPIS = (
+    ("lcoe", r"\blcoe\b|levell?i[sz]ed cost|cost of (energy|electricity)",
+     ("yield_info", "lcoe_eur_mwh"), "The LCOE is {value:,.1f} €/MWh."),
+    ("n_panels", r"\bhow many (panels|modules)\b|\b(number of|count of) (panels|modules)\b|\bpanel count\b",
+     ("layout", "n_panels"), "The layout has {value:,} panels."),
+    ("n_rows", r"\bhow many rows\b|\bnumber of rows\b",
+     ("layout", "n_rows"), "The layout has {value:,} rows."),
+    ("row_spacing", r"\brow (spacing|pitch)\b|\bspacing between rows\b",
+     ("layout", "row_spacing_m"), "Rows are spaced {value:.1f} m apart."),
+    ("specific_yield", r"\bspecific yield\b|\bkwh ?/ ?kwp\b",
+     ("yield_info", "specific_yield_kwh_kwp"), "The specific yield is {value:,.0f} kWh/kWp."),
+    ("performance_ratio", r"\bperformance ratio\b|\bpr\b",
+     ("yield_info", "performance_ratio"), "The performance ratio is {value:.0%}."),
+    ("capacity", r"\b(installed|total)? ?capacity\b|\b(kwc|mwc|kwp|mwp)\b|\bhow (big|large) is the (plant|system|installation)\b",
+     ("yield_info", "installed_capacity_mwc"), "The installed capacity is {value:,.2f} MWc."),
+    ("co2", r"\bco2\b|\bcarbon\b|\bemissions?\b",
+     ("yield_info", "co2_avoided_tons_yr"), "The plant avoids about {value:,.0f} t of CO2 per year."),
+    ("annual_yield", r"\b(annual|yearly|total)? ?(yield|production|generation|output)\b|\bhow much (energy|electricity|power)\b",
+     ("yield_info", "annual_yield_kwh"), "Annual production is {value_mwh:,.0f} MWh."),
+    ("shadow_loss", r"\bshad(ow|ing|e) loss(es)?\b|\bhow much shad(ow|ing|e)\b",
+     ("shadow_analysis", "annual_shadow_loss_pct"), "Annual shading losses are {value:.1f}%."),
+    ("ghi", r"\bghi\b|\b(solar )?(irradiance|irradiation|resource)\b",
+     ("solar_data", "annual_ghi_kwh_m2"), "Annual GHI is {value:,.0f} kWh/m²."),
+    ("area", r"\b(site|plot|land|polygon) (area|size|surface)\b|\bhow (big|large) is the (site|plot|land|area)\b",
+     ("site_info", "polygon_area_m2"), "The site covers {value_ha:,.2f} ha."),
+)
+_KPI_PATTERNS = tuple(
+    (name, re.compile(_LEAD + f"(?:{p})" + _TAIL), path, t) for name, p, path, t in _KPIS
+)
+
+_NO_ANALYSIS = "There is no analysis yet. Ask me to run one first."
+
+_stats_lock = threading.Lock()
+_stats = {"routed": 0, "fallback": 0, "by_intent": {}}
+
+
+def _time_action(m) -> dict | None:
+    hour, minute = int(m["hour"]), int(m["minute"] or 0)
+    if m["ampm"] == "pm" and hour < 12:
+        hour += 12
+    elif m["ampm"] == "am" and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return None
+    return {"action": "set_time", "hour": hour, "minute": minute}
+
+
+def _normalize(text: str) -> str:
+    text = text.lower().replace("’", "'")
+    return re.sub(r"[^\w\s:'/%.?!-]", " ", text).strip()
+
+
+@lru_cache(maxsize=64)
+def _parse_context(analysis_context: str) -> dict:
+    try:
+        return json.loads(analysis_context)
+    except ValueError:
+        return {}
+
+
+def _lookup(analysis: dict, path: tuple[str, str]):
+    section = analysis.get(path[0])
+    return section.get(path[1]) if isinstance(section, dict) else None
+
+
+def _record(intent: str | None) -> None:
+    with _stats_lock:
+        if intent is None:
+            _stats["fallback"] += 1
+        else:
+            _stats["routed"] += 1
+            _stats["by_intent"][intent] = _stats["by_intent"].get(intent, 0) + 1
+
+
+def _match(text: str, analysis: dict, actions: frozenset) -> dict | None:
+    if len(text.split()) > MAX_WORDS or _OPEN_ENDED.search(text):
+        return None
+
+    command = " ".join(text.split()).rstrip("!. ")
+    for intent, pattern, build in _ACTION_PATTERNS:
+        m = pattern.fullmatch(command)
+        if m:
+            action = build(m)
+            if action is None or intent not in actions:
+                return None
+            reply = _ACTION_REPLIES[intent].format(**{k: v for k, v in action.items() if k != "action"})
+            return {"intent": intent, "text": reply, "action": action}
+
+    if _QUALIFIED.search(text):
+        return None
+    # Each pattern must cover the whole question, so "lcoe and capacity" or
+    # "yield of the east rows" match nothing and go to the LLM.
+    text = " ".join(text.split()).rstrip("?!. ")
+    kpi = next((k for k in _KPI_PATTERNS if k[1].fullmatch(text)), None)
+    if kpi is None:
+        return None
+    intent, _, path, template = kpi
+    if not analysis:
+        return {"intent": intent, "text": _NO_ANALYSIS, "action": None}
+    value = _lookup(analysis, path)
+    if not isinstance(value, (int, float)):
+        return None
+    reply = template.format(value=value, value_mwh=value / 1000, value_ha=value / 10000)
+    return {"intent": intent, "text": reply, "action": None}
+
+
+def route(text: str, analysis_context: str | None, actions: frozenset = CHAT_ACTIONS) -> dict | None:
+    """Template answer `{intent, text, action}` for a simple request, else None.
+
+    `analysis_context` is the compact JSON from services.analysis_store.
+    Commands outside `actions` go to the LLM like any other request.
+    """
+    if not ROUTER_ENABLED or not text:
+        return None
+    analysis = _parse_context(analysis_context) if analysis_context else {}
+    hit = _match(_normalize(text), analysis, actions)
+    _record(hit["intent"] if hit else None)
+    return hit
+
+
+def router_stats() -> dict:
+    with _stats_lock:
+        total = _stats["routed"] + _stats["fallback"]
+        return {
+            "routed": _stats["routed"],
+            "fallback": _stats["fallback"],
+            "hit_rate": round(_stats["routed"] / total, 3) if total else 0.0,
+            "by_intent": dict(_stats["by_intent"]),
+        }
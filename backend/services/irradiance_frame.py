@@ -0,0 +1,154 @@
+"""Compact container for PVGIS hourly records.
+
+A PVGIS pull is four years of hourly rows (about 35k). As a DataFrame,
+each row holds ten float64 columns and a nanosecond index. The derived
+columns from solar_engine are among them, and `ghi` and `poa_global` are
+the same sum stored twice. The pipeline memoizes the horizontal and
+tilted records per site, so all of that stays in memory.
+
+IrradianceFrame keeps only the fields the analysis reads:
+
+- Each field is a float32 array.
+- Timestamps are int32 seconds since the epoch, good until 2038.
+- `ghi` and `poa_global` are derived from the stored fields on access
+  when they are not stored themselves.
+- Arrays are read-only, since the pipeline shares one frame across
+  requests.
+- The DatetimeIndex is rebuilt on access.
+
+Indexing by column name returns a float64 pandas Series on that index,
+so consumers written against the PVGIS DataFrame (calculate_yield, the
+heatmaps, the report) keep working unchanged. Results are the same as
+with the DataFrame up to float32 rounding of the inputs. PVGIS reports
+two decimals, so that rounding is below its own precision.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Fields each record keeps; everything else the analysis reads is derived.
+HORIZONTAL_FIELDS = ("ghi", "dni", "temp_air", "wind_speed")
+TILTED_FIELDS = ("poa_direct", "poa_sky_diffuse", "poa_ground_diffuse", "temp_air")
+_COMPONENTS = ("poa_direct", "poa_sky_diffuse", "poa_ground_diffuse")
+_ALIASES = {"ghi": "poa_global", "poa_global": "ghi"}
+
+
+def _read_only(values: np.ndarray) -> np.ndarray:
+    # A view, so an array passed in by the caller stays writable for them.
+    view = values.view()
+    view.flags.writeable = False
+    return view
+
+
+def _epoch_seconds(index: pd.DatetimeIndex) -> np.ndarray:
+    if index.tz is None:
+        raise ValueError("PVGIS records need a timezone-aware index")
+    seconds = index.as_unit("s").asi8
+    limits = np.iinfo(np.int32)
+    if len(seconds) and (seconds.min() < limits.min or seconds.max() > limits.max):
+        raise ValueError("Timestamps out of int32 epoch range")
+    return seconds.astype(np.int32)
+
+
+class _RowIndexer:
+    def __init__(self, frame: "IrradianceFrame"):
+        self._frame = frame
+
+    def __getitem__(self, rows) -> "IrradianceFrame":
+        return self._frame.take(rows)
+
+
+class IrradianceFrame:
+    """Read-only float32 hourly record with a DataFrame-like read interface."""
+
+    def __init__(self, columns: dict[str, np.ndarray], epoch: np.ndarray, tz: str = "UTC"):
+        self._columns = {
+            name: _read_only(np.asarray(values, dtype=np.float32)) for name, values in columns.items()
+        }
+        self._epoch = _read_only(np.asarray(epoch, dtype=np.int32))
+        self._tz = tz
+        for name, values in self._columns.items():
+            if len(values) != len(self._epoch):
+                raise ValueError(f"Column '{name}' has {len(values)} rows, index has {len(self._epoch)}")
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame, fields=HORIZONTAL_FIELDS) -> "IrradianceFrame":
+        """Keep `fields` of a PVGIS DataFrame (missing ones are skipped)."""
+        columns = {name: data[name].to_numpy(dtype=np.float32) for name in fields if name in data.columns}
+        return cls(columns, _epoch_seconds(data.index), str(data.index.tz))
+
+    # --- DataFrame-like reads ------------------------------------------------
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        index = pd.DatetimeIndex(self._epoch.astype("datetime64[s]"), name="time").as_unit("ns")
+        return index.tz_localize("UTC").tz_convert(self._tz)
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        names = list(self._columns)
+        names += [n for n in ("ghi", "poa_global") if n not in self._columns and self._derivable(n)]
+        return tuple(names)
+
+    @property
+    def iloc(self) -> _RowIndexer:
+        return _RowIndexer(self)
+
+    @property
+    def nbytes(self) -> int:
+        return self._epoch.nbytes + sum(v.nbytes for v in self._columns.values())
+
+    def __len__(self) -> int:
+        return len(self._epoch)
+
+    def __contains__(self, name) -> bool:
+        return name in self._columns or self._derivable(name)
+
+    def __getitem__(self, key):
+        """frame["ghi"] is a float64 Series; anything else selects rows (see take)."""
+        if isinstance(key, str):
+            return pd.Series(self.values(key, np.float64), index=self.index, name=key)
+        return self.take(key)
+
+    def __repr__(self) -> str:
+        return f"IrradianceFrame({len(self)} rows, {', '.join(self.columns)}, {self.nbytes / 1e6:.2f} MB)"
+
+    def values(self, name: str, dtype=np.float32) -> np.ndarray:
+        """Column `name` as an array, derived from the stored fields if needed."""
+        if name in self._columns:
+            return self._columns[name].astype(dtype, copy=False)
+        alias = _ALIASES.get(name)
+        if alias in self._columns:
+            return self._columns[alias].astype(dtype, copy=False)
+        if name in _ALIASES and all(c in self._columns for c in _COMPONENTS):
+            total = np.zeros(len(self), dtype=dtype)
+            for component in _COMPONENTS:
+                total += self._columns[component]
+            return total
+        raise KeyError(name)
+
+    def _derivable(self, name: str) -> bool:
+        stored = self._columns.keys()
+        return name in _ALIASES and (_ALIASES[name] in stored or all(c in stored for c in _COMPONENTS))
+
+    # --- Row selection ---------------------------------------------------------
+
+    def take(self, rows) -> "IrradianceFrame":
+        """Rows by slice, integer positions or boolean mask, as a new frame."""
+        if isinstance(rows, (pd.Series, pd.Index)):
+            rows = rows.to_numpy()
+        return IrradianceFrame(
+            {name: values[rows] for name, values in self._columns.items()}, self._epoch[rows], self._tz
+        )
+
+    def set_axis(self, index: pd.DatetimeIndex) -> "IrradianceFrame":
+        """Same rows on new timestamps."""
+        if len(index) != len(self):
+            raise ValueError(f"Index has {len(index)} rows, frame has {len(self)}")
+        return IrradianceFrame(self._columns, _epoch_seconds(index), str(index.tz))
+
+    def sort_index(self) -> "IrradianceFrame":
+        return self.take(np.argsort(self._epoch, kind="stable"))
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({name: self[name] for name in self.columns})
@@ -0,0 +1,71 @@
+"""Content-addressed cache and in-flight job sharing for /api/generate-3d.
+
+A 3D job (render image, then a fal SAM 3D or Hunyuan model) takes tens of
+seconds and is billed per call, yet the same screenshot and panel count
+always produce an equivalent model. Jobs are keyed by a hash of their
+inputs; finished jobs keep their render, GLB and thumbnail on disk in a
+byte-bounded AssetStore, and concurrent requests for the same key await a
+single running job.
+"""
+
+import asyncio
+import base64
+import hashlib
+import logging
+import os
+from functools import lru_cache
+
+from services.cache import AssetStore
+
+logger = logging.getLogger(__name__)
+
+MODEL_CACHE_BYTES = int(float(os.getenv("SOLARSITE_3D_CACHE_MB", "512")) * 1024 * 1024)
+
+_jobs: dict[str, asyncio.Task] = {}
+
+
+@lru_cache(maxsize=1)
+def model_store() -> AssetStore:
+    return AssetStore("generate_3d", max_bytes=MODEL_CACHE_BYTES)
+
+
+def job_key(render_type: str, screenshot: str | None, n_panels: int, prompt: str) -> str:
+    digest = hashlib.sha256()
+    for part in (render_type, screenshot or "", str(n_panels), prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:32]
+
+
+async def fetch_bytes(url: str) -> bytes:
+    """Bytes behind an http(s) or base64 data URL."""
+    if url.startswith("data:"):
+        return base64.b64decode(url.split(",", 1)[1])
+    from services.clients import get_http_client
+
+    response = await get_http_client().get(url, timeout=60.0, follow_redirects=True)
+    response.raise_for_status()
+    return response.content
+
+
+async def run_once(key: str, job) -> dict:
+    """Cached manifest for `key`, else the result of the (shared) `job()` coroutine.
+
+    The job runs as its own task, so a client that disconnects does not
+    cancel it for the others waiting on the same key.
+    """
+    cached = model_store().get(key)
+    if cached is not None:
+        return cached
+    task = _jobs.get(key)
+    if task is None:
+        task = asyncio.create_task(job())
+        _jobs[key] = task
+        task.add_done_callback(lambda _: _jobs.pop(key, None))
+    else:
+        logger.info(f"Joining in-flight 3D job {key}")
+    return await asyncio.shield(task)
+
+
+def model_cache_stats() -> dict:
+    return {**model_store().stats(), "in_flight": len(_jobs)}
@@ -1,7 +1,7 @@
 import base64
 import json
 import logging
-from openai import AsyncOpenAI
+from services.clients import get_openai_client
 
 logger = logging.getLogger(__name__)
 
@@ -9,8 +9,10 @@ MODEL_VISION = "gpt-5-mini"
 MODEL_VOICE = "gpt-5-nano"
 
 
-async def analyze_terrain_image(image_bytes: bytes, lat: float, lon: float) -> dict:
-    client = AsyncOpenAI()
+async def analyze_terrain_image(
+    image_bytes: bytes, lat: float, lon: float, mime_type: str = "image/jpeg"
+) -> dict:
+    client = get_openai_client()
     b64 = base64.b64encode(image_bytes).decode("utf-8")
 
     response = await client.responses.create(
@@ -42,7 +44,7 @@ async def analyze_terrain_image(image_bytes: bytes, lat: float, lon: float) -> d
                     },
                     {
                         "type": "input_image",
-                        "image_url": f"data:image/jpeg;base64,{b64}",
+                        "image_url": f"data:{mime_type};base64,{b64}",
                     },
                 ],
             },
@@ -57,7 +59,7 @@ async def analyze_terrain_image(image_bytes: bytes, lat: float, lon: float) -> d
 async def generate_solar_farm_render(prompt: str) -> str:
     """Generate a solar farm render image. Returns a data URI (base64)."""
     try:
-        client = AsyncOpenAI()
+        client = get_openai_client()
         result = await client.images.generate(
             model="gpt-image-1.5",
             prompt=prompt,
@@ -76,15 +78,16 @@ async def generate_solar_farm_render(prompt: str) -> str:
         raise RuntimeError(f"Image generation failed: {e}") from e
 
 
-async def generate_contextual_render(map_screenshot_b64: str, n_panels: int) -> str:
+async def generate_contextual_render(
+    image_bytes: bytes, n_panels: int, mime_type: str = "image/png"
+) -> str:
     """Edit the satellite screenshot to add solar panels. Returns data URI."""
     import io
 
     try:
-        client = AsyncOpenAI()
-        img_bytes = base64.b64decode(map_screenshot_b64)
-        img_file = io.BytesIO(img_bytes)
-        img_file.name = "screenshot.png"
+        client = get_openai_client()
+        img_file = io.BytesIO(image_bytes)
+        img_file.name = "screenshot." + mime_type.split("/")[-1].replace("jpeg", "jpg")
 
         prompt = (
             f"Transform this satellite aerial view into a photorealistic render of a solar farm. "
@@ -109,32 +112,32 @@ async def generate_contextual_render(map_screenshot_b64: str, n_panels: int) ->
         raise
 
 
-async def generate_voice_response(user_text: str, analysis_data: dict) -> dict:
-    client = AsyncOpenAI()
-    response = await client.responses.create(
+VOICE_SYSTEM_PROMPT = (
+    "You are SolarSite's voice assistant. Answer in one to three short spoken "
+    "sentences, without markdown or lists. If the user asks for a map action, "
+    "end with a line ACTION: followed by a JSON object, e.g. "
+    '{"action":"set_time","hour":15,"minute":0} or {"action":"zoom_to","target":"site"}. '
+    "Actions: set_time, zoom_to, toggle_heatmap, show_report.\n"
+)
+
+
+async def stream_voice_response(user_text: str, analysis_context: str | None):
+    """Yield the spoken reply as text deltas, with a trailing ACTION: line if any.
+
+    `analysis_context` is the compact JSON from services.analysis_store.
+    """
+    client = get_openai_client()
+    stream = await client.chat.completions.create(
         model=MODEL_VOICE,
-        reasoning={"effort": "low"},
-        input=[
-            {
-                "role": "system",
-                "content": [
-                    {
-                        "type": "input_text",
-                        "text": (
-                            "You are SolarSite's voice assistant. "
-                            "Respond with JSON {spoken_response, action}. "
-                            "Actions: set_time, zoom_to, toggle_heatmap, show_report, or null. "
-                            f"Analysis data: {json.dumps(analysis_data)}"
-                        ),
-                    }
-                ],
-            },
-            {
-                "role": "user",
-                "content": [{"type": "input_text", "text": user_text}],
-            },
+        reasoning_effort="low",
+        messages=[
+            {"role": "system", "content": VOICE_SYSTEM_PROMPT},
+            {"role": "system", "content": f"Analysis data: {analysis_context or '{}'}"},
+            {"role": "user", "content": user_text},
         ],
+        stream=True,
     )
-    text = response.output_text
-    text = text.replace("```json", "").replace("```", "").strip()
-    return json.loads(text)
+    async for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            yield delta
@@ -0,0 +1,627 @@
+"""Site analysis pipeline shared by /api/analyze and the agent.
+
+The analysis is a DAG of stages. Each stage declares the parameters it
+reads and the stages it depends on, and its result is memoized on exactly
+those inputs (transitively), so the PVGIS download is reused across
+layouts and a repeated request with the same arguments is served from
+memory. Concurrent requests for the same stage share one in-flight
+computation. Independent stages (solar positions, PVGIS, tilted
+irradiance, geocoding) run concurrently on bounded thread pools: network
+stages on an I/O pool, so slow downloads and the rate-limited geocoder
+never hold the workers that compute layouts, shading and yield.
+
+Results are shared between callers; treat them as read-only.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from typing import Callable
+
+from services.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_WORKERS = int(os.getenv("SOLARSITE_PIPELINE_WORKERS", "4"))
+# Network stages mostly wait (PVGIS timeouts, Nominatim's 1 req/s limit).
+PIPELINE_IO_WORKERS = int(os.getenv("SOLARSITE_PIPELINE_IO_WORKERS", "16"))
+STAGE_CACHE_SIZE = int(os.getenv("SOLARSITE_PIPELINE_CACHE_SIZE", "32"))
+
+
+@dataclass(frozen=True)
+class AnalysisParams:
+    """Inputs of a site analysis; hashable so stages can be keyed on them."""
+
+    latitude: float
+    longitude: float
+    polygon: tuple[tuple[float, float], ...]
+    panel_tilt_deg: float = 25.0
+    panel_azimuth_deg: float = 180.0
+    row_spacing_m: float = 3.0
+    module_width_m: float = 1.134
+    module_height_m: float = 2.278
+    module_power_wc: float = 550.0
+    system_loss_pct: float = 14.0
+    capex_eur_per_wc: float = 0.6
+    opex_eur_per_kwc_year: float = 10.0
+    wacc: float = 0.06
+    lifetime_years: int = 25
+    co2_factor_t_per_mwh: float = 0.47
+    # Below 60, yield runs at this step in services.subhourly.
+    time_step_min: int = 60
+    dc_ac_ratio: float | None = None
+    # Run yield and heatmaps on a typical year (8,760 rows) instead of the full record.
+    representative_year: bool = False
+
+    @classmethod
+    def from_request(cls, req) -> "AnalysisParams":
+        """Build params from an AnalyzeRequest (extra request fields are ignored)."""
+        values = {
+            f.name: getattr(req, f.name)
+            for f in fields(cls)
+            if f.name != "polygon" and hasattr(req, f.name)
+        }
+        return cls(polygon=_as_ring(req.polygon_geojson.coordinates[0]), **values)
+
+    @classmethod
+    def from_coordinates(cls, polygon_coordinates, **kwargs) -> "AnalysisParams":
+        return cls(polygon=_as_ring(polygon_coordinates), **kwargs)
+
+
+def _as_ring(coords) -> tuple[tuple[float, float], ...]:
+    return tuple((float(x), float(y)) for x, y in coords)
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    fn: Callable
+    deps: tuple[str, ...]
+    params: tuple[str, ...]
+    io: bool = False
+
+
+STAGES: dict[str, Stage] = {}
+_memo: dict[str, LRUCache] = {}
+_stats = defaultdict(lambda: {"runs": 0, "errors": 0, "total_s": 0.0})
+_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_executors: dict[bool, ThreadPoolExecutor] = {}
+
+
+def stage(name: str, deps: tuple[str, ...] = (), params: tuple[str, ...] = (), io: bool = False):
+    """Register `fn(params, **dep_results)` as a pipeline stage.
+
+    `io` stages wait on the network and run on the I/O pool.
+    """
+
+    def decorator(fn):
+        unknown = [d for d in deps if d not in STAGES]
+        if unknown:
+            raise ValueError(f"Stage '{name}' depends on unregistered stages: {unknown}")
+        STAGES[name] = Stage(name, fn, tuple(deps), tuple(params), io)
+        _memo[name] = LRUCache(maxsize=STAGE_CACHE_SIZE)
+        return fn
+
+    return decorator
+
+
+@lru_cache(maxsize=None)
+def _key_fields(name: str) -> tuple[str, ...]:
+    s = STAGES[name]
+    names = set(s.params)
+    for dep in s.deps:
+        names.update(_key_fields(dep))
+    return tuple(sorted(names))
+
+
+def _stage_key(name: str, p: AnalysisParams) -> tuple:
+    return tuple(getattr(p, f) for f in _key_fields(name))
+
+
+def _get_executor(io: bool = False) -> ThreadPoolExecutor:
+    executor = _executors.get(io)
+    if executor is None:
+        with _lock:
+            executor = _executors.get(io)
+            if executor is None:
+                executor = _executors[io] = ThreadPoolExecutor(
+                    max_workers=PIPELINE_IO_WORKERS if io else PIPELINE_WORKERS,
+                    thread_name_prefix="pipeline-io" if io else "pipeline",
+                )
+    return executor
+
+
+def _execute(s: Stage, p: AnalysisParams, deps: dict[str, Future], fut: Future, key) -> None:
+    try:
+        inputs = {name: f.result() for name, f in deps.items()}
+        started = time.perf_counter()
+        result = s.fn(p, **inputs)
+        elapsed = time.perf_counter() - started
+    except Exception as e:
+        # The failed Future may already be evicted and replaced by a newer
+        # request's; only forget it if it is still the one stored.
+        _memo[s.name].discard(key, fut)
+        with _stats_lock:
+            _stats[s.name]["errors"] += 1
+        fut.set_exception(e)
+        return
+    with _stats_lock:
+        _stats[s.name]["runs"] += 1
+        _stats[s.name]["total_s"] += elapsed
+    logger.debug(f"Stage {s.name} took {elapsed * 1000:.0f} ms")
+    fut.set_result(result)
+
+
+def _schedule(s: Stage, p: AnalysisParams, deps: dict[str, Future], fut: Future, key) -> None:
+    """Submit the stage once all its dependencies have settled.
+
+    Workers never block on other stages, so the pools cannot deadlock
+    however many analyses share them.
+    """
+    pending = [f for f in deps.values() if not f.done()]
+    if not pending:
+        _get_executor(s.io).submit(_execute, s, p, deps, fut, key)
+        return
+
+    remaining = [len(pending)]
+    count_lock = threading.Lock()
+
+    def on_done(_):
+        with count_lock:
+            remaining[0] -= 1
+            ready = remaining[0] == 0
+        if ready:
+            _get_executor(s.io).submit(_execute, s, p, deps, fut, key)
+
+    for f in pending:
+        f.add_done_callback(on_done)
+
+
+def _submit(name: str, p: AnalysisParams, inline: bool, collect: dict) -> Future:
+    """Return the stage's Future, scheduling it and its dependencies if needed.
+
+    `collect` gathers every Future touched by one call, so stages shared
+    by several dependents are looked up (and counted) once.
+    """
+    if name in collect:
+        return collect[name]
+    s = STAGES[name]
+    key = _stage_key(name, p)
+    with _lock:
+        fut = _memo[name].get(key)
+        hit = fut is not None
+        if not hit:
+            fut = Future()
+            _memo[name].set(key, fut)
+    collect[name] = fut
+    if hit:
+        return fut
+
+    deps = {dep: _submit(dep, p, inline, collect) for dep in s.deps}
+    if inline:
+        _execute(s, p, deps, fut, key)
+    else:
+        _schedule(s, p, deps, fut, key)
+    return fut
+
+
+def run_many(p: AnalysisParams, targets, inline: bool | None = None, timeout: float | None = None) -> dict:
+    """Compute the given stages and return {stage name: result}.
+
+    With `inline` (the default while profiling) every stage runs in the
+    calling thread, so cProfile sees the work.
+    """
+    if inline is None:
+        from services.profiler import is_profiling
+
+        inline = is_profiling()
+    futures = {}
+    for name in targets:
+        _submit(name, p, inline, futures)
+    return {name: futures[name].result(timeout) for name in targets}
+
+
+def prefetch(p: AnalysisParams, stages) -> None:
+    """Start computing `stages` in the background and return immediately.
+
+    A later run with matching inputs picks up the in-flight or finished
+    results. Failures are not cached, so a failed prefetch is retried.
+    """
+    futures = {}
+    for name in stages:
+        _submit(name, p, inline=False, collect=futures)
+
+
+async def arun_many(p: AnalysisParams, targets, on_stage=None) -> dict:
+    """Async counterpart of run_many that never blocks the event loop.
+
+    Stages run on the pipeline pool. `on_stage(name)` is awaited as each
+    stage that had to be computed or awaited for this call completes, so
+    callers can report progress; memoized stages finish immediately.
+    """
+    import asyncio
+
+    futures = {}
+    for name in targets:
+        _submit(name, p, inline=False, collect=futures)
+
+    pending = {asyncio.wrap_future(f): name for name, f in futures.items()}
+    while pending:
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for aw in done:
+            name = pending.pop(aw)
+            # Let failures propagate through the target futures below.
+            if aw.exception() is None and on_stage is not None:
+                await on_stage(name)
+    return {name: futures[name].result() for name in targets}
+
+
+def run(p: AnalysisParams, target: str = "report", **kwargs):
+    """Compute one stage (the full API response by default)."""
+    return run_many(p, (target,), **kwargs)[target]
+
+
+def clear_cache() -> None:
+    """Drop every memoized stage result (benchmarks use this between runs)."""
+    for memo in _memo.values():
+        memo.clear()
+
+
+def pipeline_stats() -> dict:
+    """Per-stage memo hit rates and compute time for /api/metrics."""
+    out = {}
+    for name, memo in _memo.items():
+        cache = memo.stats()
+        timing = _stats[name]
+        out[name] = {
+            "hits": cache["hits"],
+            "misses": cache["misses"],
+            "hit_rate": cache["hit_rate"],
+            "cached": cache["entries"],
+            "runs": timing["runs"],
+            "errors": timing["errors"],
+            "avg_ms": round(timing["total_s"] / timing["runs"] * 1000, 1) if timing["runs"] else 0.0,
+        }
+    return out
+
+
+# --- Stages ---------------------------------------------------------------
+# Services are looked up on their modules at call time so that tests and
+# benchmarks can patch them (see benchmarks.fixtures.offline_services).
+
+
+@stage("solar_positions", params=("latitude", "longitude"))
+def _solar_positions(p):
+    from services import solar_engine
+
+    return solar_engine.get_solar_positions(p.latitude, p.longitude)
+
+
+@stage("pvgis", params=("latitude", "longitude"), io=True)
+def _pvgis(p):
+    from services import solar_engine
+    from services.irradiance_frame import HORIZONTAL_FIELDS, IrradianceFrame
+
+    data, meta = solar_engine.get_pvgis_hourly(p.latitude, p.longitude)
+    return IrradianceFrame.from_frame(data, HORIZONTAL_FIELDS), meta
+
+
+@stage("tilted_irradiance", params=("latitude", "longitude", "panel_tilt_deg", "panel_azimuth_deg"), io=True)
+def _tilted_irradiance(p):
+    from services import solar_engine
+    from services.irradiance_frame import TILTED_FIELDS, IrradianceFrame
+
+    data, _ = solar_engine.get_tilted_irradiance(
+        p.latitude, p.longitude, p.panel_tilt_deg, p.panel_azimuth_deg
+    )
+    return IrradianceFrame.from_frame(data, TILTED_FIELDS)
+
+
+@stage("pvgis_series", deps=("pvgis",), params=("representative_year",))
+def _pvgis_series(p, pvgis):
+    """Horizontal irradiance the compute stages run on: full record or TMY."""
+    data, _ = pvgis
+    if not p.representative_year:
+        return data
+    from services import tmy
+
+    return tmy.representative_year(data, tmy.months_for_site(p.latitude, p.longitude, data))
+
+
+@stage("tilted_series", deps=("pvgis", "tilted_irradiance"), params=("representative_year",))
+def _tilted_series(p, pvgis, tilted_irradiance):
+    """Plane-of-array irradiance for yield, with the same TMY months as pvgis_series."""
+    if not p.representative_year:
+        return tilted_irradiance
+    from services import tmy
+
+    months = tmy.months_for_site(p.latitude, p.longitude, pvgis[0])
+    return tmy.representative_year(tilted_irradiance, months)
+
+
+@stage("representative_year", deps=("pvgis", "tilted_irradiance", "tilted_series"), params=("representative_year",))
+def _representative_year(p, pvgis, tilted_irradiance, tilted_series):
+    """TMY months and error bound against the full record, or None."""
+    if not p.representative_year:
+        return None
+    from services import tmy
+
+    return {
+        "months": tmy.months_for_site(p.latitude, p.longitude, pvgis[0]),
+        **tmy.error_bound(tilted_irradiance, tilted_series),
+    }
+
+
+@stage("location", params=("latitude", "longitude"), io=True)
+def _location(p):
+    from services import geo_utils
+
+    return {
+        "timezone": geo_utils.lookup_timezone(p.latitude, p.longitude),
+        "location_name": geo_utils.reverse_geocode(p.latitude, p.longitude),
+    }
+
+
+@stage("polygon", params=("polygon",))
+def _polygon(p):
+    from shapely.geometry import Polygon
+
+    return Polygon(p.polygon)
+
+
+@stage(
+    "layout",
+    deps=("polygon",),
+    params=(
+        "module_width_m",
+        "module_height_m",
+        "row_spacing_m",
+        "panel_azimuth_deg",
+        "latitude",
+        "longitude",
+    ),
+)
+def _layout(p, polygon):
+    from services.panel_layout import generate_panel_layout
+
+    return generate_panel_layout(
+        zone_polygon=polygon,
+        module_width_m=p.module_width_m,
+        module_height_m=p.module_height_m,
+        row_spacing_m=p.row_spacing_m,
+        panel_azimuth_deg=p.panel_azimuth_deg,
+        latitude=p.latitude,
+        longitude=p.longitude,
+    )
+
+
+@stage(
+    "shadow_matrix",
+    deps=("solar_positions", "layout"),
+    params=("module_height_m", "panel_tilt_deg", "row_spacing_m", "panel_azimuth_deg"),
+)
+def _shadow_matrix(p, solar_positions, layout):
+    from services.shadow_calc import calculate_shadow_matrix
+
+    return calculate_shadow_matrix(
+        solpos=solar_positions,
+        panel_height_m=p.module_height_m,
+        panel_tilt_deg=p.panel_tilt_deg,
+        row_spacing_m=p.row_spacing_m,
+        n_rows=max(layout["properties"]["n_rows"], 1),
+        panel_azimuth_deg=p.panel_azimuth_deg,
+    )
+
+
+@stage("seasonal_shadow", deps=("shadow_matrix",), params=("latitude",))
+def _seasonal_shadow(p, shadow_matrix):
+    from services.shadow_calc import compute_seasonal_shadow_losses
+
+    return compute_seasonal_shadow_losses(shadow_matrix, p.latitude)
+
+
+@stage("heatmaps", deps=("pvgis_series", "shadow_matrix", "polygon"), params=("latitude",))
+def _heatmaps(p, pvgis_series, shadow_matrix, polygon):
+    from services.heatmap_gen import generate_seasonal_heatmaps
+
+    return generate_seasonal_heatmaps(
+        pvgis_data=pvgis_series,
+        shadow_matrix=shadow_matrix,
+        zone_polygon=polygon,
+        resolution_m=2.0,
+        latitude=p.latitude,
+    )
+
+
+@stage(
+    "yield",
+    deps=("tilted_series", "shadow_matrix", "layout"),
+    params=(
+        "module_power_wc",
+        "system_loss_pct",
+        "capex_eur_per_wc",
+        "opex_eur_per_kwc_year",
+        "wacc",
+        "lifetime_years",
+        "co2_factor_t_per_mwh",
+        "time_step_min",
+        "dc_ac_ratio",
+    ),
+)
+def _yield(p, tilted_series, shadow_matrix, layout):
+    from services.yield_calc import calculate_yield
+
+    if p.time_step_min != 60:
+        # Sub-hourly shading needs its own time-resolved pass.
+        from services.subhourly import simulate_yield
+
+        return simulate_yield(
+            tilted_data=tilted_series,
+            latitude=p.latitude,
+            longitude=p.longitude,
+            n_panels=layout["properties"]["n_panels"],
+            n_rows=layout["properties"]["n_rows"],
+            module_power_wc=p.module_power_wc,
+            module_height_m=p.module_height_m,
+            panel_tilt_deg=p.panel_tilt_deg,
+            row_spacing_m=p.row_spacing_m,
+            panel_azimuth_deg=p.panel_azimuth_deg,
+            time_step_min=p.time_step_min,
+            dc_ac_ratio=p.dc_ac_ratio,
+            system_loss_pct=p.system_loss_pct,
+            capex_eur_per_wc=p.capex_eur_per_wc,
+            opex_eur_per_kwc_year=p.opex_eur_per_kwc_year,
+            wacc=p.wacc,
+            lifetime_years=p.lifetime_years,
+            co2_factor_t_per_mwh=p.co2_factor_t_per_mwh,
+        )
+
+    return calculate_yield(
+        pvgis_data=tilted_series,
+        shadow_matrix=shadow_matrix,
+        n_panels=layout["properties"]["n_panels"],
+        module_power_wc=p.module_power_wc,
+        system_loss_pct=p.system_loss_pct,
+        capex_eur_per_wc=p.capex_eur_per_wc,
+        opex_eur_per_kwc_year=p.opex_eur_per_kwc_year,
+        wacc=p.wacc,
+        lifetime_years=p.lifetime_years,
+        co2_factor_t_per_mwh=p.co2_factor_t_per_mwh,
+        dc_ac_ratio=p.dc_ac_ratio,
+    )
+
+
+def sanitize(obj):
+    """Replace NaN/Inf floats with 0 so JSON serialization never fails."""
+    import numpy as np
+
+    if isinstance(obj, float):
+        return 0.0 if (math.isnan(obj) or math.isinf(obj)) else obj
+    if isinstance(obj, dict):
+        return {k: sanitize(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [sanitize(v) for v in obj]
+    if isinstance(obj, np.floating):
+        v = float(obj)
+        return 0.0 if (math.isnan(v) or math.isinf(v)) else v
+    if isinstance(obj, np.integer):
+        return int(obj)
+    return obj
+
+
+@stage(
+    "report",
+    deps=(
+        "pvgis",
+        "location",
+        "polygon",
+        "layout",
+        "shadow_matrix",
+        "seasonal_shadow",
+        "heatmaps",
+        "yield",
+        "representative_year",
+    ),
+    params=("panel_tilt_deg", "row_spacing_m"),
+)
+def _report(p, pvgis, location, polygon, layout, shadow_matrix, seasonal_shadow, heatmaps, **deps):
+    import base64
+
+    import numpy as np
+
+    from services.geo_utils import classify_terrain
+
+    pvgis_data, meta = pvgis
+    yield_info = deps["yield"]
+
+    shadow_np = shadow_matrix.to_numpy().astype(np.float32)
+    shadow_b64 = base64.b64encode(shadow_np.tobytes()).decode("utf-8")
+
+    # Extract metadata safely
+    elevation = 0
+    if isinstance(meta, dict):
+        loc = meta.get("location", meta.get("inputs", {}))
+        if isinstance(loc, dict):
+            elevation = loc.get("elevation", 0)
+
+    n_years = len(pvgis_data.index.year.unique())
+
+    response = {
+        "site_info": {
+            "latitude": p.latitude,
+            "longitude": p.longitude,
+            "altitude_m": float(elevation),
+            "timezone": location["timezone"],
+            "polygon_area_m2": round(
+                polygon.area * 111320 * 111320 * np.cos(np.radians(p.latitude)), 1
+            ),
+            "terrain_classification": classify_terrain(float(elevation)),
+            "location_name": location["location_name"],
+        },
+        "layout": {
+            "panels_geojson": layout,
+            "n_panels": layout["properties"]["n_panels"],
+            "n_rows": layout["properties"]["n_rows"],
+            "row_spacing_m": p.row_spacing_m,
+            "total_module_area_m2": round(layout["properties"]["total_area_m2"], 1),
+            "ground_coverage_ratio": round(layout["properties"]["ground_coverage_ratio"], 3),
+        },
+        "solar_data": {
+            "annual_ghi_kwh_m2": round(pvgis_data["ghi"].sum() / n_years / 1000, 1),
+            "annual_dni_kwh_m2": round(pvgis_data["dni"].sum() / n_years / 1000, 1),
+            "optimal_tilt_deg": p.panel_tilt_deg,
+            "avg_temp_c": round(float(pvgis_data["temp_air"].mean()), 1),
+            "avg_wind_speed_ms": round(float(pvgis_data["wind_speed"].mean()), 1),
+        },
+        "shadow_analysis": {
+            "annual_shadow_loss_pct": float(yield_info["shadow_loss_pct"]),
+            "winter_solstice_shadow_loss_pct": seasonal_shadow["winter_shadow_loss_pct"],
+            "summer_solstice_shadow_loss_pct": seasonal_shadow["summer_shadow_loss_pct"],
+            "shadow_matrix": shadow_b64,
+            "optimal_spacing_m": p.row_spacing_m,
+            "shadow_timestamps": [t.isoformat() for t in shadow_matrix.index[:24]],
+        },
+        "heatmaps": {
+            "summer": {
+                "grid": heatmaps["summer"]["grid"],
+                "bounds": heatmaps["bounds"],
+                "resolution_m": 2,
+            },
+            "winter": {
+                "grid": heatmaps["winter"]["grid"],
+                "bounds": heatmaps["bounds"],
+                "resolution_m": 2,
+            },
+        },
+        "yield_info": {
+            "installed_capacity_kwc": yield_info["installed_capacity_kwc"],
+            "installed_capacity_mwc": yield_info["installed_capacity_mwc"],
+            "annual_yield_kwh": yield_info["annual_yield_kwh"],
+            "specific_yield_kwh_kwp": yield_info["specific_yield_kwh_kwp"],
+            "performance_ratio": yield_info["performance_ratio"],
+            "lcoe_eur_mwh": yield_info["lcoe_eur_mwh"],
+            "co2_avoided_tons_yr": yield_info["co2_avoided_tons_yr"],
+            "time_step_min": yield_info.get("time_step_min", 60),
+            "clipping_loss_pct": yield_info.get("clipping_loss_pct", 0.0),
+        },
+    }
+
+    if deps["representative_year"] is not None:
+        response["representative_year"] = deps["representative_year"]
+
+    return sanitize(response)
+
+
+@stage("analysis_id", deps=("report",))
+def _analysis_id(p, report):
+    """Register the report's chat/voice context once and return its id."""
+    from services.analysis_store import save_analysis
+
+    return save_analysis(report, ("report", _stage_key("report", p)))
@@ -0,0 +1,106 @@
+import cProfile
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Read once at import: when disabled, maybe_profile() is a plain nullcontext.
+PROFILING_ENABLED = os.getenv("SOLARSITE_PROFILING", "0").lower() in ("1", "true", "yes")
+PROFILE_DIR = Path(
+    os.getenv("SOLARSITE_PROFILE_DIR", os.path.join(tempfile.gettempdir(), "solarsite-profiles"))
+)
+PROFILE_KEEP = int(os.getenv("SOLARSITE_PROFILE_KEEP", "20"))
+
+_PROFILE_NAME = re.compile(r"^[A-Za-z0-9_\-]+\.pstats$")
+_ring_lock = threading.Lock()
+_active = threading.local()
+
+
+def wants_profile(headers, query_params) -> bool:
+    """True when the request opts in via `X-Profile: 1` or `?profile=1`."""
+    flag = headers.get("x-profile") or query_params.get("profile") or ""
+    return flag.lower() in ("1", "true", "yes")
+
+
+def _trim_ring() -> None:
+    """Keep only the PROFILE_KEEP most recent profiles on disk."""
+    files = sorted(PROFILE_DIR.glob("*.pstats"), key=lambda p: p.stat().st_mtime)
+    for stale in files[: max(len(files) - PROFILE_KEEP, 0)]:
+        try:
+            stale.unlink()
+        except OSError as e:
+            logger.debug(f"Could not remove profile {stale}: {e}")
+
+
+@contextmanager
+def _profile_to_ring(label: str):
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    _active.profiling = True
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _active.profiling = False
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}_{label}_{uuid.uuid4().hex[:8]}.pstats"
+        with _ring_lock:
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(PROFILE_DIR / name)
+            _trim_ring()
+        logger.info("Profile %s written (%.0f ms)", name, elapsed_ms)
+
+
+def maybe_profile(request, label: str):
+    """Context manager profiling the block when enabled and requested.
+
+    Returns a nullcontext unless SOLARSITE_PROFILING is set and the request
+    carries the opt-in flag, so the disabled path costs nothing.
+    """
+    if not PROFILING_ENABLED or not wants_profile(request.headers, request.query_params):
+        return nullcontext()
+    return _profile_to_ring(label)
+
+
+def is_profiling() -> bool:
+    """True while the current thread is inside a profiled block.
+
+    cProfile only sees the thread it was enabled on, so work that would
+    normally be handed to a pool should run inline when this is set.
+    """
+    return getattr(_active, "profiling", False)
+
+
+def list_profiles() -> list[dict]:
+    """Return metadata for stored profiles, newest first."""
+    if not PROFILE_DIR.is_dir():
+        return []
+    profiles = []
+    for path in PROFILE_DIR.glob("*.pstats"):
+        stat = path.stat()
+        profiles.append(
+            {
+                "name": path.name,
+                "size_bytes": stat.st_size,
+                "created_at": time.strftime(
+                    "%Y-%m-%dT%H:%M:%S", time.localtime(stat.st_mtime)
+                ),
+            }
+        )
+    return sorted(profiles, key=lambda p: p["created_at"], reverse=True)
+
+
+def profile_path(name: str) -> Path | None:
+    """Resolve a stored profile by file name, rejecting anything else."""
+    if not _PROFILE_NAME.match(name):
+        return None
+    path = PROFILE_DIR / name
+    return path if path.is_file() else None
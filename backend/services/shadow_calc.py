@@ -23,6 +23,36 @@ def calculate_shadow_length(
     return shadow_length, shadow_azimuth
 
 
+def row_shade_fraction(
+    solar_elevation_deg,
+    solar_azimuth_deg,
+    panel_height_m: float,
+    panel_tilt_deg: float,
+    row_spacing_m: float,
+    panel_azimuth_deg: float = 180,
+) -> np.ndarray:
+    """Shaded fraction of a row behind another row, per sun position (vectorized).
+
+    Positions with the sun at or below the horizon count as fully shaded.
+    """
+    elev = np.asarray(solar_elevation_deg, dtype=np.float64)
+    azi = np.asarray(solar_azimuth_deg, dtype=np.float64)
+    up = elev > 0
+
+    effective_height = panel_height_m * np.sin(np.radians(panel_tilt_deg))
+    with np.errstate(divide="ignore"):
+        shadow_len = effective_height / np.tan(np.radians(np.where(up, elev, 90.0)))
+    relative_azi = np.radians((azi + 180) % 360 - panel_azimuth_deg)
+    perpendicular_shadow = shadow_len * np.abs(np.cos(relative_azi))
+
+    fraction = np.where(
+        perpendicular_shadow > row_spacing_m,
+        np.minimum(1.0, (perpendicular_shadow - row_spacing_m) / panel_height_m),
+        0.0,
+    )
+    return np.where(up, fraction, 1.0)
+
+
 def calculate_shadow_matrix(
     solpos: pd.DataFrame,
     panel_height_m: float,
@@ -31,32 +61,15 @@ def calculate_shadow_matrix(
     n_rows: int,
     panel_azimuth_deg: float = 180,
 ) -> pd.DataFrame:
-    shadow_factors = np.zeros((len(solpos), n_rows))
-
-    for idx, (_, row) in enumerate(solpos.iterrows()):
-        elev = row["apparent_elevation"]
-        azi = row["azimuth"]
-
-        if elev <= 0:
-            shadow_factors[idx, :] = 1.0
-            continue
-
-        shadow_len, shadow_azi = calculate_shadow_length(
-            panel_height_m, panel_tilt_deg, elev, azi, panel_azimuth_deg
-        )
-
-        relative_azi = np.radians(shadow_azi - panel_azimuth_deg)
-        perpendicular_shadow = shadow_len * abs(np.cos(relative_azi))
-
-        if perpendicular_shadow > row_spacing_m:
-            shade_fraction = min(
-                1.0, (perpendicular_shadow - row_spacing_m) / panel_height_m
-            )
-        else:
-            shade_fraction = 0.0
+    elev = solpos["apparent_elevation"].to_numpy()
+    fraction = row_shade_fraction(
+        elev, solpos["azimuth"].to_numpy(), panel_height_m, panel_tilt_deg,
+        row_spacing_m, panel_azimuth_deg,
+    )
 
-        for r in range(1, n_rows):
-            shadow_factors[idx, r] = shade_fraction
+    # The front row is never shaded by another row; night is fully shaded.
+    shadow_factors = np.repeat(fraction[:, None], n_rows, axis=1)
+    shadow_factors[:, 0] = np.where(elev > 0, 0.0, 1.0)
 
     return pd.DataFrame(
         shadow_factors,
@@ -65,6 +78,26 @@ def calculate_shadow_matrix(
     )
 
 
+def align_to_calendar(values: pd.Series, index: pd.DatetimeIndex) -> pd.Series:
+    """Values of a one-year series at the same UTC month, day and hour as `index`.
+
+    The shadow matrix covers one synthetic year in local time, while
+    irradiance records span other years in UTC, so they are matched on the
+    calendar rather than on absolute time. Hours missing from `values`
+    (night) map to 0.
+    """
+
+    def calendar_key(idx: pd.DatetimeIndex) -> np.ndarray:
+        if idx.tz is not None:
+            idx = idx.tz_convert("UTC")
+        idx = idx.round("h")
+        return np.asarray(idx.month * 10000 + idx.day * 100 + idx.hour)
+
+    lookup = pd.Series(values.to_numpy(), index=calendar_key(values.index))
+    lookup = lookup[~lookup.index.duplicated()]
+    return pd.Series(lookup.reindex(calendar_key(index)).fillna(0).to_numpy(), index=index)
+
+
 def compute_seasonal_shadow_losses(shadow_matrix: pd.DataFrame, latitude: float) -> dict:
     """Compute winter/summer shadow loss percentages from actual shadow matrix."""
     if latitude >= 0:
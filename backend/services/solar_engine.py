@@ -1,24 +1,26 @@
+import os
 import numpy as np
 import pvlib
 import pandas as pd
 
 from services.geo_utils import lookup_timezone
 
+PVGIS_URL = os.getenv("PVGIS_URL", "https://re.jrc.ec.europa.eu/api/v5_3/")
+
 
 def _add_derived_columns(data: pd.DataFrame) -> pd.DataFrame:
     """Add ghi, dni, poa_global columns from PVGIS POA components."""
-    data["ghi"] = (
+    global_irradiance = (
         data["poa_direct"] + data["poa_sky_diffuse"] + data["poa_ground_diffuse"]
     )
+    data["ghi"] = global_irradiance
     solar_elev = data.get("solar_elevation")
     if solar_elev is not None:
         sin_elev = np.sin(np.radians(solar_elev.clip(lower=1)))
         data["dni"] = (data["poa_direct"] / sin_elev).clip(lower=0, upper=1500)
     else:
         data["dni"] = data["poa_direct"]
-    data["poa_global"] = (
-        data["poa_direct"] + data["poa_sky_diffuse"] + data["poa_ground_diffuse"]
-    )
+    data["poa_global"] = global_irradiance
     return data
 
 
@@ -57,7 +59,7 @@ def get_pvgis_hourly(lat: float, lon: float, start: int = 2020, end: int = 2023)
         usehorizon=True,
         pvcalculation=False,
         map_variables=True,
-        url="https://re.jrc.ec.europa.eu/api/v5_3/",
+        url=PVGIS_URL,
         timeout=30,
     )
     data = _add_derived_columns(data)
@@ -78,7 +80,7 @@ def get_tilted_irradiance(lat: float, lon: float, tilt: float, azimuth: float):
         usehorizon=True,
         pvcalculation=False,
         map_variables=True,
-        url="https://re.jrc.ec.europa.eu/api/v5_3/",
+        url=PVGIS_URL,
         timeout=30,
     )
     data = _add_derived_columns(data)
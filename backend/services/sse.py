@@ -0,0 +1,128 @@
+"""Server-sent event framing and chunked encodings for large analysis payloads.
+
+A full analysis (every panel polygon plus two heatmap grids) is several
+MB of JSON. `analysis_events` splits it into typed events, small ones
+first, and packs the bulky arrays as base64 float32 so the browser can
+decode them with a typed-array view instead of parsing nested JSON.
+`sse_stream` writes events as they come and slices large frames so one
+event never monopolizes the connection or the event loop.
+"""
+
+import asyncio
+import base64
+import json
+
+import numpy as np
+
+# Panels per analysis_layout event.
+PANELS_PER_CHUNK = 4000
+# Largest single write handed to the ASGI server.
+WRITE_CHUNK_BYTES = 64 * 1024
+
+
+def format_event(event: dict) -> bytes:
+    """One `data:` frame with compact JSON."""
+    payload = json.dumps(event, separators=(",", ":"), default=str)
+    return f"data: {payload}\n\n".encode("utf-8")
+
+
+async def sse_stream(events, on_error=None):
+    """Encode an async iterable of event dicts as incrementally flushed SSE bytes.
+
+    Exceptions from `events` are turned into an `error` event (or passed to
+    `on_error`, which returns the event to send).
+    """
+    try:
+        async for event in events:
+            frame = format_event(event)
+            for start in range(0, len(frame), WRITE_CHUNK_BYTES):
+                yield frame[start : start + WRITE_CHUNK_BYTES]
+                # Let other streams on this loop write between slices.
+                await asyncio.sleep(0)
+    except Exception as e:
+        error = on_error(e) if on_error else {"type": "error", "message": str(e)}
+        yield format_event(error)
+
+
+def encode_array(values, dtype=np.float32) -> str:
+    """Base64 of the little-endian bytes of `values` as `dtype`."""
+    array = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder("<"))
+    return base64.b64encode(array.tobytes()).decode("ascii")
+
+
+def _encode_panels(features: list[dict], origin: tuple[float, float]) -> dict:
+    """Pack panel rectangles as float32 offsets from a float64 origin.
+
+    Each panel is its first four ring corners (8 floats, lon/lat offsets
+    in degrees); the closing corner is implied. Offsets keep sub-millimetre
+    precision where absolute float32 degrees would not.
+    """
+    coords = np.array(
+        [f["geometry"]["coordinates"][0][:4] for f in features], dtype=np.float64
+    ).reshape(len(features), 8)
+    coords[:, 0::2] -= origin[0]
+    coords[:, 1::2] -= origin[1]
+    rows_cols = np.array(
+        [(f["properties"]["row"], f["properties"]["col"]) for f in features], dtype=np.int32
+    ).reshape(len(features), 2)
+    return {
+        "count": len(features),
+        "origin": list(origin),
+        "corners": encode_array(coords),
+        "rows_cols": encode_array(rows_cols, np.int32),
+        "area_m2": features[0]["properties"]["area_m2"] if features else 0,
+    }
+
+
+def _encode_grid(season: dict) -> dict:
+    grid = np.asarray(season["grid"], dtype=np.float32)
+    return {
+        "shape": list(grid.shape),
+        "grid": encode_array(grid),
+        "bounds": season["bounds"],
+        "resolution_m": season["resolution_m"],
+    }
+
+
+def analysis_events(analysis: dict, panels_per_chunk: int = PANELS_PER_CHUNK):
+    """Split an analysis report into KPI, layout and heatmap events.
+
+    Order: `analysis_kpis` (everything but panels and grids), then
+    `analysis_layout` chunks, one `analysis_heatmap` per season, and a
+    closing `analysis_complete`.
+    """
+    layout = analysis["layout"]
+    features = layout["panels_geojson"].get("features", [])
+    site = analysis["site_info"]
+    origin = (float(site["longitude"]), float(site["latitude"]))
+
+    kpis = {k: v for k, v in analysis.items() if k not in ("layout", "heatmaps")}
+    kpis["layout"] = {
+        **{k: v for k, v in layout.items() if k != "panels_geojson"},
+        "panels_geojson": {
+            "type": "FeatureCollection",
+            "features": [],
+            "properties": layout["panels_geojson"].get("properties", {}),
+        },
+    }
+    yield {"type": "analysis_kpis", "data": kpis}
+
+    n_chunks = max(1, -(-len(features) // panels_per_chunk))
+    for i in range(n_chunks):
+        chunk = features[i * panels_per_chunk : (i + 1) * panels_per_chunk]
+        yield {
+            "type": "analysis_layout",
+            "chunk": i,
+            "n_chunks": n_chunks,
+            "data": _encode_panels(chunk, origin),
+        }
+
+    for season in ("summer", "winter"):
+        if season in analysis.get("heatmaps", {}):
+            yield {
+                "type": "analysis_heatmap",
+                "season": season,
+                "data": _encode_grid(analysis["heatmaps"][season]),
+            }
+
+    yield {"type": "analysis_complete"}
@@ -0,0 +1,165 @@
+"""Typical meteorological year (TMY) from the multi-year PVGIS record.
+
+Yield and heatmaps otherwise process all four PVGIS years (about 35k
+hourly rows) on every call. A TMY keeps 8,760 of them: for each calendar
+month it picks the year whose daily weather is closest to the long-term
+distribution, following the Sandia method:
+
+1. Daily irradiation, temperature and wind of each candidate month are
+   compared with all years of that month by their Finkelstein-Schafer
+   statistic (mean distance between the two cumulative distributions),
+   weighted per index.
+2. The best few candidates are ranked by how close their mean daily
+   irradiation is to the long-term mean.
+
+Month selections are cached per site. The selected months are moved onto
+one non-leap reference year, so per-year sums need no special case.
+"""
+
+import logging
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from services.cache import TieredCache
+
+logger = logging.getLogger(__name__)
+
+# Daily indices and their weights (TMY3 weights for the fields PVGIS has).
+TMY_WEIGHTS = {
+    "ghi_sum": 5,
+    "dni_sum": 5,
+    "temp_max": 1,
+    "temp_min": 1,
+    "temp_mean": 2,
+    "wind_max": 1,
+    "wind_mean": 1,
+}
+TMY_CANDIDATES = 3
+TMY_REFERENCE_YEAR = 2023
+TMY_CACHE_SIZE = int(os.getenv("SOLARSITE_TMY_CACHE_SIZE", "1024"))
+
+
+@lru_cache(maxsize=1)
+def _cache() -> TieredCache:
+    return TieredCache("tmy_months", maxsize=TMY_CACHE_SIZE)
+
+
+def _daily_indices(data: pd.DataFrame) -> pd.DataFrame:
+    hourly = pd.DataFrame({name: data[name] for name in ("ghi", "dni", "temp_air", "wind_speed") if name in data})
+    daily = hourly.resample("D")
+    columns = {
+        "ghi_sum": daily["ghi"].sum(),
+        "dni_sum": daily["dni"].sum() if "dni" in hourly else None,
+        "temp_max": daily["temp_air"].max() if "temp_air" in hourly else None,
+        "temp_min": daily["temp_air"].min() if "temp_air" in hourly else None,
+        "temp_mean": daily["temp_air"].mean() if "temp_air" in hourly else None,
+        "wind_max": daily["wind_speed"].max() if "wind_speed" in hourly else None,
+        "wind_mean": daily["wind_speed"].mean() if "wind_speed" in hourly else None,
+    }
+    return pd.DataFrame({k: v for k, v in columns.items() if v is not None}).dropna()
+
+
+def _fs_statistic(sample: np.ndarray, population_sorted: np.ndarray) -> float:
+    """Mean absolute difference between the sample CDF and the long-term CDF."""
+    sample = np.sort(sample)
+    n = len(sample)
+    sample_cdf = np.arange(1, n + 1) / n
+    population_cdf = np.searchsorted(population_sorted, sample, side="right") / len(population_sorted)
+    return float(np.abs(sample_cdf - population_cdf).mean())
+
+
+def select_months(data: pd.DataFrame) -> dict[int, int]:
+    """{calendar month: year} of the most typical year for each month of `data`."""
+    daily = _daily_indices(data)
+    fields = [f for f in TMY_WEIGHTS if f in daily]
+    total_weight = sum(TMY_WEIGHTS[f] for f in fields)
+
+    months = {}
+    for month in range(1, 13):
+        month_days = daily[daily.index.month == month]
+        years = month_days.index.year
+        candidates = sorted(set(years))
+        if len(candidates) <= 1:
+            if candidates:
+                months[month] = candidates[0]
+            continue
+
+        population = {f: np.sort(month_days[f].to_numpy()) for f in fields}
+        scores = {}
+        for year in candidates:
+            sample = month_days[years == year]
+            scores[year] = sum(
+                TMY_WEIGHTS[f] * _fs_statistic(sample[f].to_numpy(), population[f]) for f in fields
+            ) / total_weight
+
+        long_term_mean = month_days["ghi_sum"].mean()
+        shortlist = sorted(candidates, key=scores.get)[:TMY_CANDIDATES]
+        months[month] = min(
+            shortlist, key=lambda y: abs(month_days["ghi_sum"][years == y].mean() - long_term_mean)
+        )
+    return months
+
+
+def months_for_site(latitude: float, longitude: float, data: pd.DataFrame) -> dict[int, int]:
+    """select_months for a site's PVGIS record, cached per site and record span."""
+    key = f"{latitude:.4f}:{longitude:.4f}:{data.index.year.min()}-{data.index.year.max()}"
+    months = _cache().get(key)
+    if months is None:
+        months = select_months(data)
+        _cache().set(key, months)
+        logger.info(f"TMY for {key}: {months}")
+    return months
+
+
+def representative_year(data: pd.DataFrame, months: dict[int, int]) -> pd.DataFrame:
+    """The selected months of `data`, re-dated onto TMY_REFERENCE_YEAR."""
+    index = data.index
+    mask = np.zeros(len(index), dtype=bool)
+    for month, year in months.items():
+        mask |= np.asarray((index.month == month) & (index.year == year))
+    # Feb 29 has no place in the non-leap reference year.
+    mask &= ~np.asarray((index.month == 2) & (index.day == 29))
+
+    tmy = data[mask]
+    dates = pd.to_datetime(
+        {
+            "year": TMY_REFERENCE_YEAR,
+            "month": tmy.index.month,
+            "day": tmy.index.day,
+            "hour": tmy.index.hour,
+            "minute": tmy.index.minute,
+        }
+    )
+    return tmy.set_axis(pd.DatetimeIndex(dates, name=index.name).tz_localize(index.tz)).sort_index()
+
+
+def error_bound(full: pd.DataFrame, tmy: pd.DataFrame, temp_coefficient: float = -0.0035) -> dict:
+    """First-order bound on the yield error of `tmy` against the full record.
+
+    Yield scales with plane-of-array irradiation and, through cell
+    temperature, by `temp_coefficient` per kelvin. The bound adds the TMY's
+    annual irradiation deviation and the effect of its daytime temperature
+    deviation. The year-to-year spread of the full record is reported
+    alongside for scale.
+    """
+    column = "poa_global" if "poa_global" in full else "ghi"
+    per_year = full[column].groupby(full.index.year).sum()
+    full_annual = per_year.mean()
+    tmy_annual = tmy[column].sum()
+    irradiation_dev = (tmy_annual / full_annual - 1) * 100 if full_annual > 0 else 0.0
+
+    temp_dev = 0.0
+    if "temp_air" in full:
+        temp_dev = float(tmy["temp_air"][tmy[column] > 0].mean() - full["temp_air"][full[column] > 0].mean())
+
+    return {
+        "irradiation_deviation_pct": round(float(irradiation_dev), 2),
+        "daytime_temp_deviation_c": round(temp_dev, 2),
+        "yield_error_bound_pct": round(abs(float(irradiation_dev)) + abs(temp_coefficient) * 100 * abs(temp_dev), 2),
+        "interannual_spread_pct": round(float(per_year.std() / full_annual * 100), 2) if len(per_year) > 1 else 0.0,
+        "rows": len(tmy),
+        "full_record_rows": len(full),
+    }
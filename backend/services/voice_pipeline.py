@@ -0,0 +1,130 @@
+"""Streamed voice replies: LLM text, sentence by sentence, into streamed TTS.
+
+The reply is cut at sentence boundaries while the LLM is still writing.
+Each sentence goes to TTS as soon as it is complete, and audio chunks are
+forwarded as Gradium produces them, so the user hears the first sentence
+while the rest is still being generated. Audio stays in sentence order
+because one task synthesizes the sentences sequentially.
+
+Events, in order of first appearance (routers/voice.py decides how audio
+goes on the wire):
+    {"type": "response_delta", "text": sentence}
+    {"type": "audio_chunk", "pcm": bytes, "sample_rate": int, "seq": int}
+    {"type": "response", "spoken_response": full_text, "action": dict | None}
+"""
+
+import asyncio
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# A sentence ends at ., ! or ? followed by whitespace, or at a line break.
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n+")
+# Fragments shorter than this ("Yes.") are merged into the next sentence.
+MIN_SENTENCE_CHARS = 12
+
+_DONE = object()
+
+
+def split_sentences(buffer: str) -> tuple[list[str], str]:
+    """Complete sentences in `buffer` and the unfinished remainder."""
+    sentences, start, pending = [], 0, ""
+    for m in _SENTENCE_BREAK.finditer(buffer):
+        piece = buffer[start : m.start()].strip()
+        start = m.end()
+        if not piece:
+            continue
+        if piece.startswith("ACTION:"):
+            sentences.extend(p for p in (pending, piece) if p)
+            pending = ""
+            continue
+        pending = f"{pending} {piece}".strip()
+        if len(pending) >= MIN_SENTENCE_CHARS:
+            sentences.append(pending)
+            pending = ""
+    rest = buffer[start:]
+    return sentences, f"{pending} {rest}".lstrip() if pending else rest
+
+
+async def _text_deltas(user_text: str, analysis_context: str | None, hit: dict | None):
+    if hit:
+        yield hit["text"]
+        return
+    from services.openai_service import stream_voice_response
+
+    async for delta in stream_voice_response(user_text, analysis_context):
+        yield delta
+
+
+async def voice_reply_events(api_key: str, user_text: str, analysis_context: str | None):
+    """Yield text, audio and final response events for one voice turn."""
+    from services.chat_service import parse_action
+    from services.gradium_service import TTS_SAMPLE_RATE, synthesize_speech_stream
+    from services.intent_router import VOICE_ACTIONS, route
+
+    out: asyncio.Queue = asyncio.Queue()
+    sentences: asyncio.Queue = asyncio.Queue()
+    hit = route(user_text, analysis_context, VOICE_ACTIONS)
+
+    async def write_text():
+        full_text, buffer = "", ""
+        try:
+            async for delta in _text_deltas(user_text, analysis_context, hit):
+                full_text += delta
+                done, buffer = split_sentences(buffer + delta)
+                for sentence in done:
+                    if not sentence.startswith("ACTION:"):
+                        await out.put({"type": "response_delta", "text": sentence})
+                        await sentences.put(sentence)
+            tail = buffer.strip()
+            if tail and not tail.startswith("ACTION:"):
+                await out.put({"type": "response_delta", "text": tail})
+                await sentences.put(tail)
+        finally:
+            await sentences.put(None)
+        spoken, action = parse_action(full_text)
+        if hit:
+            action = hit["action"]
+        await out.put({"type": "response", "spoken_response": spoken, "action": action})
+
+    async def speak():
+        seq = 0
+        while (sentence := await sentences.get()) is not None:
+            if not api_key:
+                continue
+            async for pcm in synthesize_speech_stream(api_key, sentence):
+                await out.put(
+                    {
+                        "type": "audio_chunk",
+                        "pcm": pcm,
+                        "sample_rate": TTS_SAMPLE_RATE,
+                        "seq": seq,
+                    }
+                )
+                seq += 1
+
+    async def run(step, label):
+        try:
+            await step()
+        except Exception as e:
+            logger.error(f"Voice {label} failed: {e}")
+            await out.put({"type": "error", "message": f"Voice {label} failed"})
+        finally:
+            await out.put(_DONE)
+
+    tasks = [
+        asyncio.create_task(run(write_text, "response")),
+        asyncio.create_task(run(speak, "synthesis")),
+    ]
+    try:
+        running = len(tasks)
+        while running:
+            event = await out.get()
+            if event is _DONE:
+                running -= 1
+            else:
+                yield event
+    finally:
+        for task in tasks:
+            task.cancel()
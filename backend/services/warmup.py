@@ -0,0 +1,58 @@
+import importlib
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Service modules whose imports pull in pvlib, pandas, scipy, shapely,
+# langchain/langgraph, openai, fal_client and websockets.
+HEAVY_MODULES = (
+    "services.solar_engine",
+    "services.panel_layout",
+    "services.shadow_calc",
+    "services.yield_calc",
+    "services.heatmap_gen",
+    "services.zone_search",
+    "services.atlas",
+    "services.agent_service",
+    "services.chat_service",
+    "services.openai_service",
+    "services.fal_service",
+    "services.gradium_service",
+)
+
+
+def warmup_enabled() -> bool:
+    return os.getenv("SOLARSITE_WARMUP", "0").lower() in ("1", "true", "yes")
+
+
+def preload() -> float:
+    """Import the heavy service modules and build lazy singletons.
+
+    Returns the elapsed time in seconds.
+    """
+    from services.chat_context import _encoding
+    from services.clients import get_openai_client, get_sync_http_client
+    from services.geo_utils import _timezone_finder
+
+    start = time.perf_counter()
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+    _timezone_finder()
+    _encoding()
+    get_sync_http_client()
+    get_openai_client()
+    try:
+        from services.atlas import load_atlas
+
+        load_atlas()
+    except FileNotFoundError:
+        pass
+    if os.getenv("OPENAI_API_KEY"):
+        from services.agent_service import get_agent_graph
+
+        get_agent_graph()
+    elapsed = time.perf_counter() - start
+    logger.info("Warm-up preloaded %d modules in %.2f s", len(HEAVY_MODULES), elapsed)
+    return elapsed
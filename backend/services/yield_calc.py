@@ -1,6 +1,8 @@
 import numpy as np
 import pandas as pd
 
+from services.shadow_calc import align_to_calendar
+
 
 def calculate_yield(
     pvgis_data: pd.DataFrame,
@@ -14,9 +16,14 @@ def calculate_yield(
     wacc: float = 0.06,
     lifetime_years: int = 25,
     co2_factor_t_per_mwh: float = 0.47,
+    dc_ac_ratio: float | None = None,
 ) -> dict:
+    """Yield and economics KPIs from the hourly record and shadow matrix.
+
+    With `dc_ac_ratio`, hourly AC output is capped at 1 / dc_ac_ratio kW per
+    kWp and the lost energy is reported as `clipping_loss_pct`.
+    """
     installed_capacity_wc = n_panels * module_power_wc
-    installed_capacity_kwc = installed_capacity_wc / 1000
 
     if "poa_global" in pvgis_data.columns:
         poa = pvgis_data["poa_global"]
@@ -25,16 +32,13 @@ def calculate_yield(
 
     if shadow_matrix is not None and not shadow_matrix.empty:
         avg_shadow = shadow_matrix.mean(axis=1)
-        avg_shadow = avg_shadow.reindex(poa.index, method="nearest", fill_value=0)
+        avg_shadow = align_to_calendar(avg_shadow, poa.index)
         effective_irradiance = poa * (1 - avg_shadow)
     else:
         effective_irradiance = poa
 
     if "temp_air" in pvgis_data.columns:
-        t_ambient = pvgis_data["temp_air"]
-        t_cell = t_ambient + 0.03 * effective_irradiance
-        temp_factor = 1 + temp_coefficient * (t_cell - 25)
-        temp_factor = temp_factor.clip(0.7, 1.1)
+        temp_factor = temperature_factor(pvgis_data["temp_air"], effective_irradiance, temp_coefficient)
     else:
         temp_factor = pd.Series(1.0, index=poa.index)
 
@@ -42,17 +46,19 @@ def calculate_yield(
     hourly_specific_yield = (
         (effective_irradiance / 1000) * temp_factor * system_factor
     )
+    clipping_loss_pct = None
+    if dc_ac_ratio:
+        dc_total = hourly_specific_yield.sum()
+        hourly_specific_yield = hourly_specific_yield.clip(upper=1 / dc_ac_ratio)
+        clipping_loss_pct = (1 - hourly_specific_yield.sum() / dc_total) * 100 if dc_total > 0 else 0.0
 
     annual_specific_yield = hourly_specific_yield.sum() / len(
         pvgis_data.index.year.unique()
     )
-    annual_yield_kwh = annual_specific_yield * installed_capacity_kwc
-    annual_yield_mwh = annual_yield_kwh / 1000
 
     annual_ghi = (
         pvgis_data["ghi"].sum() / len(pvgis_data.index.year.unique()) / 1000
     )
-    pr = annual_specific_yield / annual_ghi if annual_ghi > 0 else 0.80
 
     if shadow_matrix is not None:
         total_unshaded = (poa / 1000).sum()
@@ -63,6 +69,46 @@ def calculate_yield(
     else:
         shadow_loss_pct = 0
 
+    result = summarize_yield(
+        installed_capacity_wc=installed_capacity_wc,
+        annual_specific_yield=annual_specific_yield,
+        annual_ghi_kwh_m2=annual_ghi,
+        shadow_loss_pct=shadow_loss_pct,
+        capex_eur_per_wc=capex_eur_per_wc,
+        opex_eur_per_kwc_year=opex_eur_per_kwc_year,
+        wacc=wacc,
+        lifetime_years=lifetime_years,
+        co2_factor_t_per_mwh=co2_factor_t_per_mwh,
+    )
+    if clipping_loss_pct is not None:
+        result["clipping_loss_pct"] = round(clipping_loss_pct, 2)
+    return result
+
+
+def temperature_factor(t_ambient, irradiance, temp_coefficient: float = -0.0035):
+    """Power derating from cell temperature (ambient + 0.03 K per W/m2)."""
+    t_cell = t_ambient + 0.03 * irradiance
+    return (1 + temp_coefficient * (t_cell - 25)).clip(0.7, 1.1)
+
+
+def summarize_yield(
+    installed_capacity_wc: float,
+    annual_specific_yield: float,
+    annual_ghi_kwh_m2: float,
+    shadow_loss_pct: float = 0,
+    capex_eur_per_wc: float = 0.6,
+    opex_eur_per_kwc_year: float = 10.0,
+    wacc: float = 0.06,
+    lifetime_years: int = 25,
+    co2_factor_t_per_mwh: float = 0.47,
+) -> dict:
+    """Energy, economics and CO2 KPIs from an annual specific yield (kWh/kWp)."""
+    installed_capacity_kwc = installed_capacity_wc / 1000
+    annual_yield_kwh = annual_specific_yield * installed_capacity_kwc
+    annual_yield_mwh = annual_yield_kwh / 1000
+
+    pr = annual_specific_yield / annual_ghi_kwh_m2 if annual_ghi_kwh_m2 > 0 else 0.80
+
     capex_eur = installed_capacity_wc * capex_eur_per_wc / 1000 * 1000
     opex_annual_eur = installed_capacity_kwc * opex_eur_per_kwc_year
     annuity_factor = (wacc * (1 + wacc) ** lifetime_years) / (
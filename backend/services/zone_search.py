@@ -0,0 +1,197 @@
+"""Batched zone search for the agent's select_zone tool.
+
+Candidate rectangles of the requested area are generated over a grid of
+aspect ratios, orientations (relative to the east-west panel rows) and
+row pitches, and all of them are scored in one NumPy pass with a cheap
+surrogate of the full analysis:
+
+- packing: rows and modules per row from the exact chord length of each
+  rotated rectangle, matching generate_panel_layout's row sweep;
+- shading: the irradiance-weighted inter-row shade fraction for each
+  pitch, computed from the site's cached solar positions with the same
+  geometry as calculate_shadow_matrix;
+- irradiance: the site's cached plane-of-array irradiance.
+
+Irradiance is uniform at this scale (PVGIS cells are kilometres wide), so
+the search trades ground coverage against shading rather than moving the
+zone around. Pitches start at `min_row_spacing_m` (the app's default
+spacing) because the shading model alone would always favour the densest
+rows.
+"""
+
+import numpy as np
+import pandas as pd
+
+ASPECT_RATIOS = (1.0, 1.5, 2.0, 3.0, 1 / 1.5, 1 / 2.0, 1 / 3.0)
+ROTATIONS_DEG = np.arange(-45.0, 45.1, 7.5)
+PITCH_STEPS = 8
+# Widest pitch searched, as a multiple of the module's north-south depth.
+MAX_PITCH_FACTOR = 2.5
+
+
+def shade_fraction_by_pitch(
+    solpos: pd.DataFrame,
+    tilted_data: pd.DataFrame,
+    pitches_m: np.ndarray,
+    module_height_m: float,
+    panel_tilt_deg: float,
+    panel_azimuth_deg: float = 180,
+) -> np.ndarray:
+    """Irradiance-weighted fraction of a shaded row lost to shade, per pitch."""
+    elev = np.radians(solpos["apparent_elevation"].to_numpy())
+    azi = solpos["azimuth"].to_numpy()
+    shadow_len = module_height_m * np.sin(np.radians(panel_tilt_deg)) / np.tan(elev)
+    relative_azi = np.radians((azi + 180) % 360 - panel_azimuth_deg)
+    perpendicular = shadow_len * np.abs(np.cos(relative_azi))
+
+    # Weight each daylight hour by the mean POA for its (month, UTC hour).
+    poa = tilted_data["poa_global"]
+    poa_index = poa.index.tz_convert("UTC")
+    mean_poa = poa.groupby([poa_index.month, poa_index.hour]).mean()
+    sol_index = solpos.index.tz_convert("UTC")
+    weights = mean_poa.reindex(
+        pd.MultiIndex.from_arrays([sol_index.month, sol_index.hour])
+    ).fillna(0).to_numpy()
+
+    frac = np.clip((perpendicular[:, None] - pitches_m[None, :]) / module_height_m, 0, 1)
+    total = weights.sum()
+    return (weights @ frac) / total if total > 0 else np.zeros(len(pitches_m))
+
+
+def _chord(y, half_w, half_h, cos_t, sin_t):
+    """Width of the rotated rectangle along the horizontal line at height y."""
+    sin_t = np.where(np.abs(sin_t) < 1e-9, 1e-9, sin_t)
+    lo1 = (-half_w - y * sin_t) / cos_t
+    hi1 = (half_w - y * sin_t) / cos_t
+    b1 = (y * cos_t - half_h) / sin_t
+    b2 = (y * cos_t + half_h) / sin_t
+    lo = np.maximum(lo1, np.minimum(b1, b2))
+    hi = np.minimum(hi1, np.maximum(b1, b2))
+    return np.clip(hi - lo, 0, None)
+
+
+def pack_rectangles(
+    widths_m: np.ndarray,
+    heights_m: np.ndarray,
+    angles_deg: np.ndarray,
+    pitches_m: np.ndarray,
+    module_width_m: float,
+    module_height_m: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """(n_rows, n_panels) for each rotated rectangle, all candidates at once."""
+    theta = np.radians(angles_deg)[:, None]
+    cos_t, sin_t = np.cos(theta), np.sin(theta)
+    half_w, half_h = widths_m[:, None] / 2, heights_m[:, None] / 2
+    half_extent = half_w * np.abs(sin_t) + half_h * cos_t
+    pitch = pitches_m[:, None]
+
+    max_rows = int(np.max((2 * half_extent - module_height_m) / pitch)) + 1
+    k = np.arange(max(max_rows, 1))[None, :]
+    y = -half_extent + module_height_m / 2 + k * pitch
+    in_bounds = y + module_height_m / 2 <= half_extent
+
+    # The chord is concave in y, so its minimum over a row strip is at an edge.
+    usable = np.minimum(
+        _chord(y - module_height_m / 2, half_w, half_h, cos_t, sin_t),
+        _chord(y + module_height_m / 2, half_w, half_h, cos_t, sin_t),
+    )
+    per_row = np.where(in_bounds, np.floor(usable / module_width_m), 0)
+    return (per_row > 0).sum(axis=1), per_row.sum(axis=1).astype(int)
+
+
+def rectangle_coords(
+    latitude: float, longitude: float, width_m: float, height_m: float, angle_deg: float
+) -> list[tuple[float, float]]:
+    """Closed lon/lat ring of a width x height rectangle rotated by angle_deg."""
+    lat_scale = 111320
+    lon_scale = 111320 * np.cos(np.radians(latitude))
+    theta = np.radians(angle_deg)
+    c, s = np.cos(theta), np.sin(theta)
+    corners = [(-1, -1), (1, -1), (1, 1), (-1, 1), (-1, -1)]
+    ring = []
+    for sx, sy in corners:
+        x, y = sx * width_m / 2, sy * height_m / 2
+        ring.append(
+            (
+                float(longitude + (x * c - y * s) / lon_scale),
+                float(latitude + (x * s + y * c) / lat_scale),
+            )
+        )
+    return ring
+
+
+def search_zones(
+    latitude: float,
+    longitude: float,
+    area_hectares: float,
+    solpos: pd.DataFrame,
+    tilted_data: pd.DataFrame,
+    module_width_m: float = 1.134,
+    module_height_m: float = 2.278,
+    module_power_wc: float = 550.0,
+    panel_tilt_deg: float = 25.0,
+    system_loss_pct: float = 14.0,
+    min_row_spacing_m: float = 3.0,
+    top: int = 3,
+) -> dict:
+    """Score every candidate zone and return the best ones, highest yield first.
+
+    The first candidate is the axis-aligned square at the minimum pitch,
+    i.e. the zone select_zone returns without optimization; the result
+    reports the best zone's gain over it.
+    """
+    area_m2 = area_hectares * 10000
+    pitch_grid = np.linspace(
+        min_row_spacing_m,
+        max(min_row_spacing_m, MAX_PITCH_FACTOR * module_height_m),
+        PITCH_STEPS,
+    )
+    rotations = np.concatenate([[0.0], ROTATIONS_DEG[ROTATIONS_DEG != 0]])
+    aspect, angle, pitches = (
+        g.ravel() for g in np.meshgrid(ASPECT_RATIOS, rotations, pitch_grid, indexing="ij")
+    )
+    widths = np.sqrt(area_m2 * aspect)
+    heights = area_m2 / widths
+
+    n_rows, n_panels = pack_rectangles(
+        widths, heights, angle, pitches, module_width_m, module_height_m
+    )
+    shade = shade_fraction_by_pitch(
+        solpos, tilted_data, pitch_grid, module_height_m, panel_tilt_deg
+    )
+    # Only rows behind the first are shaded (see calculate_shadow_matrix).
+    pitch_idx = np.tile(np.arange(len(pitch_grid)), len(ASPECT_RATIOS) * len(rotations))
+    shade_loss = shade[pitch_idx] * np.where(n_rows > 0, (n_rows - 1) / np.maximum(n_rows, 1), 0)
+
+    n_years = len(tilted_data.index.year.unique())
+    annual_poa_kwh_m2 = tilted_data["poa_global"].sum() / n_years / 1000
+    capacity_kwc = n_panels * module_power_wc / 1000
+    yield_mwh = (
+        capacity_kwc * annual_poa_kwh_m2 * (1 - system_loss_pct / 100) * (1 - shade_loss) / 1000
+    )
+
+    order = np.argsort(-yield_mwh)[:top]
+    zones = [
+        {
+            "width_m": round(float(widths[i]), 1),
+            "height_m": round(float(heights[i]), 1),
+            "rotation_deg": float(angle[i]),
+            "row_spacing_m": round(float(pitches[i]), 2),
+            "n_rows": int(n_rows[i]),
+            "n_panels": int(n_panels[i]),
+            "shadow_loss_pct": round(float(shade_loss[i] * 100), 2),
+            "estimated_annual_yield_mwh": round(float(yield_mwh[i]), 1),
+            "coordinates": rectangle_coords(
+                latitude, longitude, widths[i], heights[i], angle[i]
+            ),
+        }
+        for i in order
+    ]
+    baseline = yield_mwh[0]
+    return {
+        "candidates_evaluated": int(len(widths)),
+        "gain_vs_square_pct": (
+            round(float((yield_mwh[order[0]] / baseline - 1) * 100), 1) if baseline > 0 else 0.0
+        ),
+        "zones": zones,
+    }
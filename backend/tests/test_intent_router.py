@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from services.intent_router import CHAT_ACTIONS, VOICE_ACTIONS, route
+
+CONTEXT = json.dumps(
+    {
+        "yield_info": {"lcoe_eur_mwh": 34.5, "annual_yield_kwh": 2_632_600},
+        "layout": {"n_panels": 1200},
+    }
+)
+
+
+@pytest.mark.parametrize(
+    "text, actions, intent, action",
+    [
+        ("show the heatmap", CHAT_ACTIONS, "toggle_heatmap", {"action": "toggle_heatmap"}),
+        ("Turn the heatmap off please", CHAT_ACTIONS, "toggle_heatmap", {"action": "toggle_heatmap"}),
+        ("open the report", CHAT_ACTIONS, "show_report", {"action": "show_report"}),
+        ("run the analysis", CHAT_ACTIONS, "run_analysis", {"action": "run_analysis"}),
+        ("Rerun the analysis again.", CHAT_ACTIONS, "run_analysis", {"action": "run_analysis"}),
+        ("set the time to 3pm", VOICE_ACTIONS, "set_time", {"action": "set_time", "hour": 15, "minute": 0}),
+        ("move the sun to 14:30", VOICE_ACTIONS, "set_time", {"action": "set_time", "hour": 14, "minute": 30}),
+        ("go to noon", VOICE_ACTIONS, "set_time", {"action": "set_time", "hour": 12, "minute": 0}),
+        ("zoom to panels", VOICE_ACTIONS, "zoom_to", {"action": "zoom_to", "target": "panels"}),
+        ("zoom in on the site", VOICE_ACTIONS, "zoom_to", {"action": "zoom_to", "target": "site"}),
+    ],
+)
+def test_short_imperatives_are_routed(text, actions, intent, action):
+    hit = route(text, CONTEXT, actions)
+    assert hit["intent"] == intent
+    assert hit["action"] == action
+
+
+def test_zoom_reply_keeps_the_plural():
+    assert route("zoom to panels", CONTEXT, VOICE_ACTIONS)["text"] == "Zooming to the panels."
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "don't show the heatmap",
+        "can you give me the LCOE from the report",
+        "show me the yield at 5",
+        "run the analysis again with 4m spacing",
+        "can you show the report?",
+        "set the time to 25",
+    ],
+)
+def test_qualified_commands_go_to_the_llm(text):
+    assert route(text, CONTEXT, CHAT_ACTIONS | VOICE_ACTIONS) is None
+
+
+@pytest.mark.parametrize("text", ["set the time to 3pm", "zoom to the site"])
+def test_chat_does_not_route_actions_it_cannot_perform(text):
+    assert route(text, CONTEXT) is None
+
+
+def test_voice_does_not_route_run_analysis():
+    assert route("run the analysis", CONTEXT, VOICE_ACTIONS) is None
+
+
+@pytest.mark.parametrize(
+    "text, reply",
+    [
+        ("what's the LCOE?", "The LCOE is 34.5 €/MWh."),
+        ("how many panels", "The layout has 1,200 panels."),
+        ("annual production", "Annual production is 2,633 MWh."),
+    ],
+)
+def test_plain_kpi_lookups_are_answered(text, reply):
+    assert route(text, CONTEXT)["text"] == reply
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "yield in July",
+        "monthly production",
+        "yield per panel",
+        "capacity factor",
+        "what does PR mean?",
+        "show the irradiance map",
+        "lcoe and capacity",
+    ],
+)
+def test_qualified_kpi_questions_go_to_the_llm(text):
+    assert route(text, CONTEXT) is None
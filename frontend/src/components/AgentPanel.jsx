@@ -84,6 +84,9 @@ export default function AgentPanel({
               >
                 {TOOL_LABELS[step.tool] || step.tool}
               </span>
+              {step.status === "running" && step.detail && (
+                <span className="text-xs text-gray-500">{step.detail}</span>
+              )}
             </div>
           ))}
 
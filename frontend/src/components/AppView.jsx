@@ -230,21 +230,27 @@ export default function AppView({ onBack }) {
 
     console.log("[3D] Auto-trigger: n_panels =", data.layout.n_panels);
 
-    // Wait for map to render panels
-    await new Promise((r) => setTimeout(r, 2000));
-
-    console.log("[3D] Capturing map screenshot...");
+    // Procedural models are built from the layout itself, no screenshot needed
+    const procedural = mode === "procedural";
     let screenshot = null;
-    try {
-      screenshot = await mapViewRef.current?.captureScreenshot();
-    } catch (err) {
-      console.error("[3D] Screenshot capture threw:", err);
+    if (!procedural) {
+      // Wait for map to render panels
+      await new Promise((r) => setTimeout(r, 2000));
+
+      console.log("[3D] Capturing map screenshot...");
+      try {
+        screenshot = await mapViewRef.current?.captureScreenshot();
+      } catch (err) {
+        console.error("[3D] Screenshot capture threw:", err);
+      }
     }
 
-    if (!screenshot) {
+    if (procedural) {
+      console.log("[3D] Procedural mode — building from layout");
+    } else if (!screenshot) {
       console.warn("[3D] Screenshot null — proceeding without screenshot");
     } else {
-      console.log("[3D] Screenshot captured:", screenshot.length, "chars");
+      console.log("[3D] Screenshot captured:", screenshot.size, "bytes");
     }
 
     try {
@@ -253,15 +259,27 @@ export default function AppView({ onBack }) {
         longitude: data.site_info.longitude,
         n_panels: data.layout.n_panels,
         render_type: mode,
-        ...(screenshot && { map_screenshot: screenshot }),
+        ...(procedural && {
+          polygon_geojson: effectivePolygon,
+          ...(data.layout.row_spacing_m && { row_spacing_m: data.layout.row_spacing_m }),
+        }),
       };
       console.log("[3D] POST /api/generate-3d — render_type:", mode, "has_screenshot:", !!screenshot);
 
-      const res = await fetch(`${API_URL}/api/generate-3d`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify(payload),
-      });
+      let res;
+      if (screenshot) {
+        // Raw image bytes as multipart instead of base64 inside JSON
+        const form = new FormData();
+        Object.entries(payload).forEach(([k, v]) => form.append(k, v));
+        form.append("screenshot", screenshot, "screenshot.jpg");
+        res = await fetch(`${API_URL}/api/generate-3d/upload`, { method: "POST", body: form });
+      } else {
+        res = await fetch(`${API_URL}/api/generate-3d`, {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify(payload),
+        });
+      }
 
       if (!res.ok) {
         const errText = await res.text();
@@ -281,7 +299,7 @@ export default function AppView({ onBack }) {
       setModel3DLoading(false);
       generating3DRef.current = false;
     }
-  }, [mode]);
+  }, [mode, effectivePolygon]);
 
   useEffect(() => {
     const data = effectiveAnalysis;
@@ -511,7 +529,7 @@ export default function AppView({ onBack }) {
         <div style={{ display: "flex", alignItems: "center", gap: 20, fontSize: "11px", letterSpacing: "0.1em", textTransform: "uppercase" }}>
           {/* Mode toggle */}
           <div style={{ display: "flex", border: "1px solid rgba(26,26,26,0.15)", overflow: "hidden" }}>
-            {["test", "demo"].map((m) => (
+            {["test", "demo", "procedural"].map((m) => (
               <button
                 key={m}
                 onClick={() => setMode(m)}
@@ -527,7 +545,7 @@ export default function AppView({ onBack }) {
                   transition: "all 0.15s",
                 }}
               >
-                {m === "test" ? "TEST" : "DEMO"}
+                {m === "test" ? "TEST" : m === "demo" ? "DEMO" : "LOCAL"}
               </button>
             ))}
           </div>
@@ -599,6 +617,9 @@ export default function AppView({ onBack }) {
                     <span style={{ opacity: step.status === "done" ? 0.5 : 1 }}>
                       {toolLabels[step.tool] || step.tool}
                     </span>
+                    {step.status !== "done" && step.detail && (
+                      <span style={{ opacity: 0.5 }}>· {step.detail}</span>
+                    )}
                   </div>
                 ))}
               </div>
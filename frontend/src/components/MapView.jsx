@@ -100,9 +100,7 @@ const MapView = forwardRef(function MapView({
         const timeout = setTimeout(() => {
           console.warn("[MapView] captureScreenshot: render event timed out, trying direct capture");
           try {
-            const canvas = map.getCanvas();
-            const dataUrl = canvas.toDataURL("image/png");
-            resolve(dataUrl.split(",")[1]);
+            map.getCanvas().toBlob((blob) => resolve(blob), "image/jpeg", 0.9);
           } catch {
             resolve(null);
           }
@@ -112,12 +110,13 @@ const MapView = forwardRef(function MapView({
         map.once("render", () => {
           clearTimeout(timeout);
           try {
-            const canvas = map.getCanvas();
-            const dataUrl = canvas.toDataURL("image/png");
-            console.log("[MapView] Screenshot captured via render event");
-            resolve(dataUrl.split(",")[1]);
+            // JPEG Blob, sent as multipart: far smaller than a base64 PNG in JSON
+            map.getCanvas().toBlob((blob) => {
+              console.log("[MapView] Screenshot captured via render event");
+              resolve(blob);
+            }, "image/jpeg", 0.9);
           } catch (err) {
-            console.error("[MapView] toDataURL failed:", err);
+            console.error("[MapView] toBlob failed:", err);
             resolve(null);
           }
         });
@@ -1,5 +1,6 @@
 import { useState, useCallback, useRef } from "react";
 import { API_URL } from "../constants";
+import { decodePanels, decodeHeatmap } from "../utils/analysis-stream";
 
 export default function useAgent() {
   const [agentState, setAgentState] = useState("idle");
@@ -75,6 +76,14 @@ export default function useAgent() {
                   setThinking("");
                   break;
 
+                case "progress":
+                  setSteps((prev) =>
+                    prev.map((s) =>
+                      s.tool === event.tool ? { ...s, detail: event.message } : s
+                    )
+                  );
+                  break;
+
                 case "polygon":
                   setPolygon(event.data);
                   setSteps((prev) =>
@@ -84,12 +93,45 @@ export default function useAgent() {
                   );
                   break;
 
-                case "analysis":
-                  setAnalysisData(event.data);
+                case "analysis_kpis":
+                  // KPIs arrive first; panels and heatmaps stream in after.
+                  setAnalysisData({ ...event.data, heatmaps: {} });
+                  break;
+
+                case "analysis_layout": {
+                  const features = decodePanels(event.data);
+                  setAnalysisData((prev) =>
+                    prev && {
+                      ...prev,
+                      layout: {
+                        ...prev.layout,
+                        panels_geojson: {
+                          ...prev.layout.panels_geojson,
+                          features: prev.layout.panels_geojson.features.concat(features),
+                        },
+                      },
+                    }
+                  );
+                  break;
+                }
+
+                case "analysis_heatmap":
+                  setAnalysisData((prev) =>
+                    prev && {
+                      ...prev,
+                      heatmaps: {
+                        ...prev.heatmaps,
+                        [event.season]: decodeHeatmap(event.data),
+                      },
+                    }
+                  );
+                  break;
+
+                case "analysis_complete":
                   setSteps((prev) =>
                     prev.map((s) =>
                       s.tool === "run_solar_analysis"
-                        ? { ...s, status: "done" }
+                        ? { ...s, status: "done", detail: null }
                         : s
                     )
                   );
@@ -2,6 +2,8 @@ import { useState, useCallback, useRef } from "react";
 import { API_URL } from "../constants";
 
 let msgId = 0;
+// Matches the server's STT drain timeout (gradium_service.STT_DRAIN_TIMEOUT_S).
+const STT_DRAIN_MS = 2000;
 
 export default function useChat({ onAction } = {}) {
   const [messages, setMessages] = useState([]);
@@ -77,7 +79,11 @@ export default function useChat({ onAction } = {}) {
           body: JSON.stringify({
             message: text.trim(),
             history,
-            analysis_data: compactAnalysis(analysisData),
+            // The server keeps the analysis context; only send the data
+            // itself for analyses it never produced.
+            ...(analysisData?.analysis_id
+              ? { analysis_id: analysisData.analysis_id }
+              : { analysis_data: compactAnalysis(analysisData) }),
           }),
           signal: abort.signal,
         });
@@ -188,12 +194,7 @@ export default function useChat({ onAction } = {}) {
 
         recorder.ondataavailable = (e) => {
           if (e.data.size > 0 && ws.readyState === WebSocket.OPEN) {
-            const reader = new FileReader();
-            reader.onloadend = () => {
-              const base64 = reader.result.split(",")[1];
-              ws.send(JSON.stringify({ type: "audio", data: base64 }));
-            };
-            reader.readAsDataURL(e.data);
+            ws.send(e.data);
           }
         };
 
@@ -208,18 +209,26 @@ export default function useChat({ onAction } = {}) {
   );
 
   const stopListening = useCallback(() => {
+    const ws = wsRef.current;
+    wsRef.current = null;
     if (recorderRef.current) {
+      // End the server's STT stream once the last chunk is out, then give
+      // it time to send the trailing transcript before closing.
+      recorderRef.current.onstop = () => {
+        if (ws?.readyState === WebSocket.OPEN) {
+          ws.send(JSON.stringify({ type: "audio_end" }));
+          setTimeout(() => ws.close(), STT_DRAIN_MS);
+        }
+      };
       recorderRef.current.stop();
       recorderRef.current = null;
+    } else {
+      ws?.close();
     }
     if (streamRef.current) {
       streamRef.current.getTracks().forEach((t) => t.stop());
       streamRef.current = null;
     }
-    if (wsRef.current) {
-      wsRef.current.close();
-      wsRef.current = null;
-    }
     setIsListening(false);
   }, []);
 
@@ -6,23 +6,45 @@ export default function useVoice() {
   const [transcript, setTranscript] = useState("");
   const [response, setResponse] = useState(null);
   const wsRef = useRef(null);
+  const playerRef = useRef(null);
+  const sampleRateRef = useRef(48000);
 
   const connect = useCallback(() => {
     const wsUrl = API_URL.replace("http", "ws") + "/ws/voice";
     const ws = new WebSocket(wsUrl);
+    ws.binaryType = "arraybuffer";
 
     ws.onopen = () => {
       wsRef.current = ws;
+      // Audio in both directions as binary frames; JSON for control only.
+      ws.send(JSON.stringify({ type: "set_mode", binary_audio: true }));
     };
 
     ws.onmessage = (event) => {
+      if (event.data instanceof ArrayBuffer) {
+        playerRef.current ??= createPcmPlayer();
+        playerRef.current.enqueuePcm(event.data, sampleRateRef.current);
+        return;
+      }
       const msg = JSON.parse(event.data);
       if (msg.type === "transcript") {
         setTranscript(msg.text);
+      } else if (msg.type === "response_delta") {
+        // Sentences arrive ahead of the final response; show them as they come.
+        setResponse((prev) => ({
+          spoken_response: prev?.streaming
+            ? `${prev.spoken_response} ${msg.text}`
+            : msg.text,
+          action: null,
+          streaming: true,
+        }));
       } else if (msg.type === "response") {
         setResponse(msg);
-      } else if (msg.type === "audio") {
-        playAudio(msg.data);
+      } else if (msg.type === "audio_start") {
+        sampleRateRef.current = msg.sample_rate;
+      } else if (msg.type === "audio_chunk") {
+        playerRef.current ??= createPcmPlayer();
+        playerRef.current.enqueue(msg.data, msg.sample_rate);
       }
     };
 
@@ -39,7 +61,10 @@ export default function useVoice() {
 
   const setContext = useCallback((data) => {
     if (wsRef.current?.readyState === WebSocket.OPEN) {
-      wsRef.current.send(JSON.stringify({ type: "set_context", data }));
+      const message = data?.analysis_id
+        ? { type: "set_context", analysis_id: data.analysis_id }
+        : { type: "set_context", data };
+      wsRef.current.send(JSON.stringify(message));
     }
   }, []);
 
@@ -54,14 +79,7 @@ export default function useVoice() {
 
       mediaRecorder.ondataavailable = (e) => {
         if (e.data.size > 0 && wsRef.current?.readyState === WebSocket.OPEN) {
-          const reader = new FileReader();
-          reader.onloadend = () => {
-            const base64 = reader.result.split(",")[1];
-            wsRef.current.send(
-              JSON.stringify({ type: "audio", data: base64 })
-            );
-          };
-          reader.readAsDataURL(e.data);
+          wsRef.current.send(e.data);
         }
       };
 
@@ -69,6 +87,11 @@ export default function useVoice() {
       setIsListening(true);
 
       return () => {
+        mediaRecorder.onstop = () => {
+          if (wsRef.current?.readyState === WebSocket.OPEN) {
+            wsRef.current.send(JSON.stringify({ type: "audio_end" }));
+          }
+        };
         mediaRecorder.stop();
         stream.getTracks().forEach((t) => t.stop());
         setIsListening(false);
@@ -95,16 +118,32 @@ export default function useVoice() {
   };
 }
 
-function playAudio(base64Data) {
-  const raw = atob(base64Data);
-  const bytes = new Uint8Array(raw.length);
-  for (let i = 0; i < raw.length; i++) bytes[i] = raw.charCodeAt(i);
-
+/* Plays 16-bit mono PCM chunks (binary frames or base64) back to back. */
+function createPcmPlayer() {
   const audioCtx = new AudioContext();
-  audioCtx.decodeAudioData(bytes.buffer).then((buffer) => {
+  let nextStart = 0;
+
+  const enqueuePcm = (arrayBuffer, sampleRate) => {
+    const pcm = new Int16Array(arrayBuffer, 0, arrayBuffer.byteLength >> 1);
+    const buffer = audioCtx.createBuffer(1, pcm.length, sampleRate);
+    const channel = buffer.getChannelData(0);
+    for (let i = 0; i < pcm.length; i++) channel[i] = pcm[i] / 32768;
+
     const source = audioCtx.createBufferSource();
     source.buffer = buffer;
     source.connect(audioCtx.destination);
-    source.start();
-  });
+    nextStart = Math.max(nextStart, audioCtx.currentTime);
+    source.start(nextStart);
+    nextStart += buffer.duration;
+  };
+
+  return {
+    enqueuePcm,
+    enqueue(base64Data, sampleRate) {
+      const raw = atob(base64Data);
+      const bytes = new Uint8Array(raw.length);
+      for (let i = 0; i < raw.length; i++) bytes[i] = raw.charCodeAt(i);
+      enqueuePcm(bytes.buffer, sampleRate);
+    },
+  };
 }
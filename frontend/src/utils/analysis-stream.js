@@ -0,0 +1,45 @@
+// Decoders for the chunked analysis events sent by /api/agent/run
+// (see backend/services/sse.py).
+
+function base64ToBuffer(b64) {
+  const binary = atob(b64);
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+  return bytes.buffer;
+}
+
+export function decodePanels(chunk) {
+  const [lon0, lat0] = chunk.origin;
+  const corners = new Float32Array(base64ToBuffer(chunk.corners));
+  const rowsCols = new Int32Array(base64ToBuffer(chunk.rows_cols));
+  const features = new Array(chunk.count);
+
+  for (let i = 0; i < chunk.count; i++) {
+    const o = i * 8;
+    const ring = [];
+    for (let k = 0; k < 4; k++) {
+      ring.push([lon0 + corners[o + 2 * k], lat0 + corners[o + 2 * k + 1]]);
+    }
+    ring.push(ring[0]);
+    features[i] = {
+      type: "Feature",
+      properties: {
+        row: rowsCols[2 * i],
+        col: rowsCols[2 * i + 1],
+        area_m2: chunk.area_m2,
+      },
+      geometry: { type: "Polygon", coordinates: [ring] },
+    };
+  }
+  return features;
+}
+
+export function decodeHeatmap(data) {
+  const values = new Float32Array(base64ToBuffer(data.grid));
+  const [ny, nx] = data.shape;
+  const grid = new Array(ny);
+  for (let j = 0; j < ny; j++) {
+    grid[j] = Array.from(values.subarray(j * nx, (j + 1) * nx));
+  }
+  return { grid, bounds: data.bounds, resolution_m: data.resolution_m };
+}